@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+端到端压测：使用本地 new-api 替身服务器驱动真实的 checkin.main 流程
+
+每个账号规模在独立的子进程中运行（便于统计峰值内存），输出吞吐量、
+账号级 p50/p99 耗时、峰值 RSS 与子进程退出码；默认场景每个账号都会请求用户信息与签到接口。
+
+用法:
+  python benchmarks/bench_load.py --accounts 10,100,1000,10000 --latency-ms 20 --concurrency 50
+  python benchmarks/bench_load.py --waf --error-rate 0.05 --rate-limit 200
+  python benchmarks/bench_load.py --no-sign-in  # 只请求用户信息（签到随用户信息自动完成的 provider）
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.fake_newapi import FakeNewApiConfig, FakeNewApiServer, provider_config
+
+# 子进程中清空的通知配置，避免压测向真实渠道推送
+NOTIFY_ENV_KEYS = [
+	'EMAIL_USER',
+	'EMAIL_PASS',
+	'EMAIL_TO',
+	'PUSHPLUS_TOKEN',
+	'SERVERPUSHKEY',
+	'DINGDING_WEBHOOK',
+	'FEISHU_WEBHOOK',
+	'WEIXIN_WEBHOOK',
+	'GOTIFY_URL',
+	'GOTIFY_TOKEN',
+	'TELEGRAM_BOT_TOKEN',
+	'TELEGRAM_CHAT_ID',
+]
+
+
+def make_accounts(count: int) -> Iterator[dict]:
+	"""生成合成账号配置"""
+	for i in range(count):
+		yield {'name': f'Bench {i + 1}', 'provider': 'fake', 'cookies': {'session': f's{i}'}, 'api_user': str(i + 1)}
+
+
+def run_scale(count: int, domain: str, waf: bool, sign_in: bool, concurrency: int, processes: int) -> dict:
+	"""在子进程中对指定账号规模执行一次完整签到流程"""
+	with tempfile.TemporaryDirectory() as temp_dir:
+		# 使用 JSON Lines 账号文件，规避环境变量长度限制且按需流式读取
+		accounts_file = os.path.join(temp_dir, 'accounts.jsonl')
+		with open(accounts_file, 'w', encoding='utf-8') as f:
+			for account in make_accounts(count):
+				f.write(json.dumps(account) + '\n')
+
+		env = {
+			**os.environ,
+			**{key: '' for key in NOTIFY_ENV_KEYS},
+			'ANYROUTER_ACCOUNTS_FILE': accounts_file,
+			'PROVIDERS': json.dumps({'fake': provider_config(domain, waf, sign_in)}),
+			'CHECKIN_CONCURRENCY': str(concurrency),
+			'CHECKIN_PROCESSES': str(processes),
+		}
+
+		stderr_path = os.path.join(temp_dir, 'stderr.log')
+		started_at = time.perf_counter()
+		with open(stderr_path, 'wb') as stderr:
+			process = subprocess.Popen(
+				[sys.executable, str(PROJECT_ROOT / 'checkin.py')],
+				cwd=temp_dir,
+				env=env,
+				stdout=subprocess.DEVNULL,
+				stderr=stderr,
+			)
+			peak_rss_mb = None
+			if hasattr(os, 'wait4'):
+				_, status, rusage = os.wait4(process.pid, 0)
+				process.returncode = os.waitstatus_to_exitcode(status)
+				# Linux 上 ru_maxrss 单位为 KB，macOS 为字节
+				peak_rss_mb = rusage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+			else:
+				process.wait()
+		wall_time = time.perf_counter() - started_at
+
+		report_path = os.path.join(temp_dir, 'run_report.json')
+		if not os.path.exists(report_path):
+			with open(stderr_path, 'r', encoding='utf-8', errors='replace') as f:
+				stderr_tail = f.read()[-2000:]
+			raise RuntimeError(f'checkin.py exited with code {process.returncode} without a run report:\n{stderr_tail}')
+		with open(report_path, 'r', encoding='utf-8') as f:
+			report = json.load(f)
+
+	accounts_time = report['run_phases'].get('accounts', wall_time)
+	totals = report['account_phases'].get('total', {})
+	return {
+		'accounts': count,
+		'wall_time': wall_time,
+		'throughput': count / accounts_time if accounts_time else 0.0,
+		'p50': totals.get('p50', 0.0),
+		'p99': totals.get('p99', 0.0),
+		'peak_rss_mb': peak_rss_mb,
+		'exit_code': process.returncode,
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description='End-to-end load benchmark against a local fake new-api server')
+	parser.add_argument('--accounts', default='10,100,1000,10000', help='comma-separated account counts')
+	parser.add_argument('--concurrency', type=int, default=50, help='CHECKIN_CONCURRENCY for the run')
+	parser.add_argument('--processes', type=int, default=1, help='CHECKIN_PROCESSES for the run')
+	parser.add_argument('--latency-ms', type=float, default=20.0, help='server latency per API request')
+	parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of API requests answered with 502')
+	parser.add_argument('--rate-limit', type=float, default=0.0, help='API requests per second before 429')
+	parser.add_argument('--waf', action='store_true', help='require the acw_sc__v2 WAF cookie challenge')
+	parser.add_argument(
+		'--no-sign-in', dest='sign_in', action='store_false', help='only request user info, skip the sign-in endpoint'
+	)
+	args = parser.parse_args()
+
+	server = FakeNewApiServer(
+		FakeNewApiConfig(
+			latency_ms=args.latency_ms, error_rate=args.error_rate, rate_limit=args.rate_limit, waf=args.waf
+		)
+	)
+	domain = server.start()
+
+	print(
+		f'[BENCH] Fake new-api at {domain} (latency {args.latency_ms}ms, error rate {args.error_rate}, '
+		f'rate limit {args.rate_limit or "off"}, WAF {"on" if args.waf else "off"}, '
+		f'sign-in {"on" if args.waf or args.sign_in else "off"}), concurrency {args.concurrency}, processes {args.processes}'
+	)
+	print(
+		f'{"accounts":>10} {"wall(s)":>10} {"acct/s":>10} {"p50(ms)":>10} {"p99(ms)":>10} {"peak RSS(MB)":>14} {"exit":>6}'
+	)
+
+	failed_runs = 0
+	try:
+		for count in (int(c) for c in args.accounts.split(',') if c.strip()):
+			result = run_scale(count, domain, args.waf, args.sign_in, args.concurrency, args.processes)
+			rss = f'{result["peak_rss_mb"]:.1f}' if result['peak_rss_mb'] is not None else 'n/a'
+			print(
+				f'{result["accounts"]:>10} {result["wall_time"]:>10.2f} {result["throughput"]:>10.1f} '
+				f'{result["p50"] * 1000:>10.1f} {result["p99"] * 1000:>10.1f} {rss:>14} {result["exit_code"]:>6}'
+			)
+			failed_runs += 1 if result['exit_code'] != 0 else 0
+	finally:
+		server.stop()
+
+	print(
+		f'[BENCH] Server requests: {server.stats.requests}, 5xx: {server.stats.errors}, '
+		f'429: {server.stats.rate_limited}, WAF challenges: {server.stats.challenges}'
+	)
+	if failed_runs:
+		print(f'[BENCH] {failed_runs} run(s) exited with a non-zero code')
+		sys.exit(1)
+
+
+if __name__ == '__main__':
+	main()
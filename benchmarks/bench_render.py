@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+HTML 邮件渲染基准测试
+
+按账号规模生成合成的签到结果（5% 失败、10% 余额变化、其余为首次记录），
+分别测量完整模式、精简模式与默认大小上限下的渲染耗时和输出大小，
+并与从纯文本报告解析的旧路径对比。
+
+用法: python benchmarks/bench_render.py [--accounts 10,100,1000,10000] [--runs 5]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.html_report import DEFAULT_EMAIL_MAX_BYTES, format_run_html
+from utils.notify import format_html_email
+from utils.result import AccountResult, RunResult
+
+
+def make_run(count: int) -> RunResult:
+	"""生成包含 count 个账号的签到结果"""
+	failures, balances = [], []
+	for i in range(count):
+		if i % 20 == 0:
+			failures.append(AccountResult(i, f'Account {i + 1}', 'anyrouter', str(i), False, error='HTTP 500'))
+			continue
+		account = AccountResult(i, f'Account {i + 1}', 'anyrouter', str(i), True, quota=12.34, used_quota=5.67)
+		if i % 10 == 1:
+			account.change = -0.5
+		balances.append(account)
+	return RunResult('2026-01-01 08:00:00', count, count - len(failures), failures=failures, balances=balances)
+
+
+def measure(render, runs: int) -> tuple[float, int]:
+	"""返回 (中位耗时秒数, 输出字节数)"""
+	timings = []
+	for _ in range(runs):
+		started_at = time.perf_counter()
+		html = render()
+		timings.append(time.perf_counter() - started_at)
+	return statistics.median(timings), len(html.encode('utf-8'))
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Measure HTML email render time and size by account count')
+	parser.add_argument('--accounts', default='10,100,1000,10000', help='comma-separated account counts')
+	parser.add_argument('--runs', type=int, default=5, help='number of runs per measurement')
+	args = parser.parse_args()
+
+	print(f'[BENCH] Runs: {args.runs} (median values), size cap: {DEFAULT_EMAIL_MAX_BYTES} bytes')
+	print(f'{"accounts":>8}  {"mode":<16}  {"time (ms)":>10}  {"bytes":>10}')
+	for count in (int(value) for value in args.accounts.split(',')):
+		run = make_run(count)
+		modes = {
+			'text (parsed)': lambda: format_html_email('Title', run.text, run.execution_time),
+			'full, no cap': lambda: format_run_html('Title', run, mode='full', max_bytes=0),
+			'compact, no cap': lambda: format_run_html('Title', run, mode='compact', max_bytes=0),
+			'default (capped)': lambda: format_run_html('Title', run, mode='full', max_bytes=DEFAULT_EMAIL_MAX_BYTES),
+		}
+		for mode, render in modes.items():
+			elapsed, size = measure(render, args.runs)
+			print(f'{count:>8}  {mode:<16}  {elapsed * 1000:>10.2f}  {size:>10}')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+启动性能基准测试
+
+在全新的子进程中测量：
+1. `import checkin` 的耗时，以及是否加载了 Playwright
+2. 直接导入 `playwright.async_api` 的耗时（即延迟导入节省的时间）
+3. 从进程启动到本地服务器收到第一个请求的耗时（无需 WAF 的 provider）
+
+用法: python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, 'playwright' in sys.modules)
+"""
+
+
+class FirstRequestHandler(BaseHTTPRequestHandler):
+	"""记录第一个请求到达时间的最小 new-api 用户信息接口"""
+
+	first_request_at: float | None = None
+
+	def do_GET(self):
+		if FirstRequestHandler.first_request_at is None:
+			FirstRequestHandler.first_request_at = time.perf_counter()
+		body = json.dumps({'success': True, 'data': {'quota': 500000, 'used_quota': 0}}).encode()
+		self.send_response(200)
+		self.send_header('Content-Type', 'application/json')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+
+def measure_import(module: str) -> tuple[float, bool]:
+	"""在子进程中测量模块导入耗时"""
+	output = subprocess.run(
+		[sys.executable, '-c', IMPORT_SCRIPT.format(module=module)],
+		cwd=PROJECT_ROOT,
+		capture_output=True,
+		text=True,
+		check=True,
+	).stdout.split()
+	return float(output[0]), output[1] == 'True'
+
+
+def measure_first_request() -> float:
+	"""测量从启动 checkin.py 到本地服务器收到第一个请求的耗时"""
+	FirstRequestHandler.first_request_at = None
+	server = ThreadingHTTPServer(('127.0.0.1', 0), FirstRequestHandler)
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+
+	domain = f'http://127.0.0.1:{server.server_address[1]}'
+	env = {
+		**os.environ,
+		'PYTHONPATH': str(PROJECT_ROOT),
+		'ANYROUTER_ACCOUNTS': json.dumps([{'cookies': {'session': 'x'}, 'api_user': '1', 'provider': 'local'}]),
+		'PROVIDERS': json.dumps({'local': {'domain': domain}}),
+	}
+
+	try:
+		# 在临时目录运行，避免写入仓库中的余额与缓存文件
+		with tempfile.TemporaryDirectory() as temp_dir:
+			started_at = time.perf_counter()
+			subprocess.run(
+				[sys.executable, str(PROJECT_ROOT / 'checkin.py')], cwd=temp_dir, env=env, capture_output=True
+			)
+	finally:
+		server.shutdown()
+		server.server_close()
+
+	if FirstRequestHandler.first_request_at is None:
+		raise RuntimeError('checkin.py did not reach the local server')
+	return FirstRequestHandler.first_request_at - started_at
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Measure cold-start cost of checkin.py')
+	parser.add_argument('--runs', type=int, default=5, help='number of runs per measurement')
+	args = parser.parse_args()
+
+	checkin_imports = [measure_import('checkin') for _ in range(args.runs)]
+	playwright_imports = [measure_import('playwright.async_api')[0] for _ in range(args.runs)]
+	first_requests = [measure_first_request() for _ in range(args.runs)]
+
+	print(f'[BENCH] Runs: {args.runs} (median values)')
+	print(f'[BENCH] import checkin: {statistics.median(t for t, _ in checkin_imports) * 1000:.1f} ms')
+	print(f'[BENCH] Playwright loaded by import checkin: {any(loaded for _, loaded in checkin_imports)}')
+	print(f'[BENCH] import playwright.async_api (deferred): {statistics.median(playwright_imports) * 1000:.1f} ms')
+	print(f'[BENCH] Time to first request (no WAF provider): {statistics.median(first_requests) * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+本地 new-api 替身服务器，用于离线压测签到流程
+
+实现的接口：
+- /login：可选的 acw_sc__v2 WAF cookie 挑战
+- /api/user/self：用户信息
+- /api/user/sign_in：签到
+
+支持可配置的响应延迟、5xx 错误率与 429 限流。
+"""
+
+import json
+import random
+import secrets
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.waf_solver import solve_acw_sc_v2
+
+CHALLENGE_TEMPLATE = """<html><script>
+var arg1='{arg1}';
+String['prototype']['unsbox']=function(){{}};String['prototype']['hexXor']=function(){{}};
+setCookie('acw_sc__v2',arg1['unsbox']()['hexXor']('3000176000856006061501533003690027800375'));
+document['location']['reload']();
+</script></html>"""
+
+PLAIN_WAF_COOKIES = ['acw_tc=tc; Path=/; Max-Age=1800; HttpOnly', 'cdn_sec_tc=sec; Path=/; Max-Age=1800']
+
+LOGIN_PAGE = '<!doctype html><html><head><title>New API</title></head><body><div id="root"></div></body></html>'
+
+
+@dataclass
+class FakeNewApiConfig:
+	"""替身服务器行为配置"""
+
+	latency_ms: float = 0.0
+	error_rate: float = 0.0
+	rate_limit: float = 0.0  # 每秒允许的 API 请求数，0 表示不限流
+	waf: bool = False
+	seed: int | None = None
+
+
+@dataclass
+class FakeNewApiStats:
+	"""替身服务器请求统计"""
+
+	requests: dict[str, int] = field(default_factory=dict)
+	errors: int = 0
+	rate_limited: int = 0
+	challenges: int = 0
+
+	def count(self, path: str):
+		self.requests[path] = self.requests.get(path, 0) + 1
+
+
+class FakeNewApiHandler(BaseHTTPRequestHandler):
+	protocol_version = 'HTTP/1.1'
+	server: 'FakeNewApiServer'
+
+	def do_GET(self):
+		self.handle_request()
+
+	def do_POST(self):
+		length = int(self.headers.get('Content-Length') or 0)
+		if length:
+			self.rfile.read(length)
+		self.handle_request()
+
+	def handle_request(self):
+		path = self.path.split('?', 1)[0]
+		server = self.server
+		with server.lock:
+			server.stats.count(path)
+
+		cookies = SimpleCookie(self.headers.get('Cookie', ''))
+
+		if path == '/login':
+			self.handle_login(cookies)
+			return
+
+		if path not in ('/api/user/self', '/api/user/sign_in'):
+			self.send_json(404, {'success': False, 'message': 'Not found'})
+			return
+
+		if server.config.waf and not server.is_waf_solved(cookies):
+			self.send_challenge()
+			return
+
+		if server.config.latency_ms:
+			time.sleep(server.config.latency_ms / 1000)
+
+		if not server.acquire_rate_limit():
+			self.send_json(429, {'success': False, 'message': 'Too many requests'})
+			return
+
+		if server.config.error_rate and server.random() < server.config.error_rate:
+			with server.lock:
+				server.stats.errors += 1
+			self.send_json(502, {'success': False, 'message': 'Bad gateway'})
+			return
+
+		if 'session' not in cookies:
+			self.send_json(401, {'success': False, 'message': 'Unauthorized'})
+			return
+
+		if path == '/api/user/self':
+			api_user = self.headers.get('new-api-user', '0')
+			quota = (int(api_user) if api_user.isdigit() else 0) * 500000 + 25 * 500000
+			self.send_json(200, {'success': True, 'data': {'quota': quota, 'used_quota': 500000}})
+		else:
+			self.send_json(200, {'success': True, 'message': ''})
+
+	def handle_login(self, cookies: SimpleCookie):
+		server = self.server
+		if not server.config.waf:
+			# 没有挑战时直接下发 WAF cookies，需要签到接口的 provider 无需浏览器即可获取
+			self.send_body(200, 'text/html', LOGIN_PAGE.encode(), PLAIN_WAF_COOKIES)
+			return
+
+		if server.is_waf_solved(cookies, require_all=False):
+			self.send_body(200, 'text/html', LOGIN_PAGE.encode(), ['cdn_sec_tc=sec; Path=/; Max-Age=1800'])
+		else:
+			self.send_challenge()
+
+	def send_challenge(self):
+		server = self.server
+		arg1 = secrets.token_hex(20).upper()
+		with server.lock:
+			server.stats.challenges += 1
+			server.valid_acw_sc_v2.add(solve_acw_sc_v2(arg1))
+		body = CHALLENGE_TEMPLATE.format(arg1=arg1).encode()
+		self.send_body(200, 'text/html', body, ['acw_tc=tc; Path=/; Max-Age=1800; HttpOnly'])
+
+	def send_json(self, status: int, data: dict):
+		self.send_body(status, 'application/json', json.dumps(data).encode())
+
+	def send_body(self, status: int, content_type: str, body: bytes, set_cookies: list[str] | None = None):
+		self.send_response(status)
+		self.send_header('Content-Type', content_type)
+		self.send_header('Content-Length', str(len(body)))
+		for cookie in set_cookies or []:
+			self.send_header('Set-Cookie', cookie)
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+
+class FakeNewApiServer(ThreadingHTTPServer):
+	"""在本地回环地址上运行的 new-api 替身服务器"""
+
+	daemon_threads = True
+	request_queue_size = 1024
+
+	def __init__(self, config: FakeNewApiConfig | None = None, port: int = 0):
+		super().__init__(('127.0.0.1', port), FakeNewApiHandler)
+		self.config = config or FakeNewApiConfig()
+		self.stats = FakeNewApiStats()
+		self.lock = threading.Lock()
+		self.valid_acw_sc_v2: set[str] = set()
+		self._random = random.Random(self.config.seed)
+		self._tokens = self.config.rate_limit
+		self._refilled_at = time.monotonic()
+		self._thread: threading.Thread | None = None
+
+	@property
+	def domain(self) -> str:
+		return f'http://127.0.0.1:{self.server_address[1]}'
+
+	def random(self) -> float:
+		with self.lock:
+			return self._random.random()
+
+	def is_waf_solved(self, cookies: SimpleCookie, require_all: bool = True) -> bool:
+		"""请求是否携带了有效的 WAF cookies"""
+		acw_sc_v2 = cookies.get('acw_sc__v2')
+		if acw_sc_v2 is None or acw_sc_v2.value not in self.valid_acw_sc_v2 or 'acw_tc' not in cookies:
+			return False
+		return not require_all or 'cdn_sec_tc' in cookies
+
+	def acquire_rate_limit(self) -> bool:
+		"""令牌桶限流，超出速率时返回 False"""
+		if not self.config.rate_limit:
+			return True
+
+		with self.lock:
+			now = time.monotonic()
+			self._tokens = min(
+				self.config.rate_limit, self._tokens + (now - self._refilled_at) * self.config.rate_limit
+			)
+			self._refilled_at = now
+			if self._tokens >= 1:
+				self._tokens -= 1
+				return True
+			self.stats.rate_limited += 1
+			return False
+
+	def start(self) -> str:
+		"""在后台线程启动服务器，返回服务地址"""
+		self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+		self._thread.start()
+		return self.domain
+
+	def stop(self):
+		self.shutdown()
+		self.server_close()
+
+
+def provider_config(domain: str, waf: bool, sign_in: bool = False) -> dict:
+	"""替身服务器对应的 PROVIDERS 配置
+
+	waf 为 True 时需要求解 acw_sc__v2 挑战；sign_in 为 True 时即使没有挑战也调用签到接口
+	（与 anyrouter 相同，签到接口只对使用 WAF cookies 的 provider 启用，此时 cookies 由登录页直接下发）。
+	"""
+	config = {'domain': domain}
+	if waf:
+		config.update({'bypass_method': 'waf_cookies', 'waf_cookie_names': ['acw_tc', 'cdn_sec_tc', 'acw_sc__v2']})
+	elif sign_in:
+		config.update({'bypass_method': 'waf_cookies', 'waf_cookie_names': ['acw_tc', 'cdn_sec_tc']})
+	return config
+
+
+if __name__ == '__main__':
+	import argparse
+
+	parser = argparse.ArgumentParser(description='Run a local stand-in new-api server')
+	parser.add_argument('--port', type=int, default=8765)
+	parser.add_argument('--latency-ms', type=float, default=0.0)
+	parser.add_argument('--error-rate', type=float, default=0.0)
+	parser.add_argument('--rate-limit', type=float, default=0.0)
+	parser.add_argument('--waf', action='store_true')
+	args = parser.parse_args()
+
+	server = FakeNewApiServer(
+		FakeNewApiConfig(args.latency_ms, args.error_rate, args.rate_limit, args.waf), port=args.port
+	)
+	print(f'[INFO] Fake new-api server listening on {server.domain}')
+	print(f'[INFO] PROVIDERS={json.dumps({"fake": provider_config(server.domain, args.waf)})}')
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		server.server_close()
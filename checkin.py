@@ -3,51 +3,85 @@
 AnyRouter.top 自动签到脚本
 """
 
+import argparse
 import asyncio
-import hashlib
 import json
+import multiprocessing
 import os
 import sys
+import time
+from collections.abc import Awaitable, Callable, Iterable, Sized
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from urllib.parse import urlparse
 
 import httpx
-from dotenv import load_dotenv
-from playwright.async_api import async_playwright
-
+from dotenv import dotenv_values, load_dotenv
+
+from utils.balance_store import BalanceStore
+from utils.browser import (
+	BrowserManager,
+	LoadBaseline,
+	PageTrafficStats,
+	describe_load,
+	enable_lean_mode,
+	load_cookie_timeout,
+	load_lean_mode,
+	wait_for_cookies,
+)
 from utils.config import AccountConfig, AppConfig, load_accounts_config
+from utils.http_client import HttpClientPool, build_cookie_header
+from utils.ledger import CheckInLedger
+from utils.log import get_logger, log_context, setup_logging
+from utils.metrics import (
+	account_quota,
+	account_used_quota,
+	checkins_total,
+	http_request_seconds,
+	http_requests_total,
+	last_run_seconds,
+	last_run_timestamp,
+	load_metrics_textfile,
+	registry,
+	start_metrics_server,
+)
 from utils.notify import notify
+from utils.result import AccountResult, RunResult
+from utils.retry import CheckInError, RetryBudget, is_already_checked_in, raise_for_failure, with_retry
+from utils.scheduler import StopSignal, load_schedule
+from utils.shard import (
+	ShardedAccounts,
+	ShardResultWriter,
+	find_shard_files,
+	load_shard_results_dir,
+	load_shard_run_id,
+	parse_shard,
+	read_shard_records,
+	remove_shard_files,
+)
+from utils.timing import RunReport, current_timer, load_run_report_file, phase
+from utils.waf import WafCookieCache, WafCookieManager, load_waf_cookie_ttl
+from utils.waf_solver import get_waf_cookies_with_solver
+
+logger = get_logger('checkin')
+
+# 进程启动时已存在的环境变量优先于 .env，常驻模式重新加载 .env 时不覆盖
+PROCESS_ENV_KEYS = frozenset(os.environ)
 
 load_dotenv()
 
-BALANCE_HASH_FILE = 'balance_hash.txt'
-
+# 当前由 .env 设置的环境变量，重新加载时从 .env 中删除的键会从环境变量中移除
+DOTENV_KEYS = {key for key, value in dotenv_values().items() if key not in PROCESS_ENV_KEYS and value is not None}
 
-def load_balance_hash():
-	"""加载余额hash"""
-	try:
-		if os.path.exists(BALANCE_HASH_FILE):
-			with open(BALANCE_HASH_FILE, 'r', encoding='utf-8') as f:
-				return f.read().strip()
-	except Exception:
-		pass
-	return None
+BALANCE_HISTORY_FILE = 'balance_history.db'
+WAF_COOKIE_CACHE_FILE = 'waf_cookie_cache.json'
+WAF_LOAD_BASELINE_FILE = 'waf_load_baseline.json'
+CHECK_IN_LEDGER_FILE = 'checkin_ledger.json'
 
 
-def save_balance_hash(balance_hash):
-	"""保存余额hash"""
-	try:
-		with open(BALANCE_HASH_FILE, 'w', encoding='utf-8') as f:
-			f.write(balance_hash)
-	except Exception as e:
-		print(f'Warning: Failed to save balance hash: {e}')
-
-
-def generate_balance_hash(balances):
-	"""生成余额数据的hash"""
-	# 将包含 quota 和 used 的结构转换为简单的 quota 值用于 hash 计算
-	simple_balances = {k: v['quota'] for k, v in balances.items()} if balances else {}
-	balance_json = json.dumps(simple_balances, sort_keys=True, separators=(',', ':'))
-	return hashlib.sha256(balance_json.encode('utf-8')).hexdigest()[:16]
+def format_timestamp(timestamp: float) -> str:
+	"""格式化 Unix 时间戳为本地时间字符串"""
+	return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
 
 
 def parse_cookies(cookies_data):
@@ -66,89 +100,133 @@ def parse_cookies(cookies_data):
 
 
 async def get_waf_cookies_with_playwright(account_name: str, login_url: str, required_cookies: list[str]):
-	"""使用 Playwright 获取 WAF cookies（隐私模式）"""
-	print(f'[PROCESSING] {account_name}: Starting browser to get WAF cookies...')
-
-	async with async_playwright() as p:
-		import tempfile
-
-		with tempfile.TemporaryDirectory() as temp_dir:
-			context = await p.chromium.launch_persistent_context(
-				user_data_dir=temp_dir,
-				headless=True,
-				user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
-				viewport={'width': 1920, 'height': 1080},
-				args=[
-					'--disable-blink-features=AutomationControlled',
-					'--disable-dev-shm-usage',
-					'--disable-web-security',
-					'--disable-features=VizDisplayCompositor',
-					'--no-sandbox',
-				],
-			)
-
+	"""使用 Playwright 获取 WAF cookies（隐私模式），返回包含值与过期时间的 cookie 元数据"""
+	logger.info(f'{account_name}: Starting browser to get WAF cookies...', tag='PROCESSING')
+
+	context = None
+	lean_mode = load_lean_mode()
+	traffic = PageTrafficStats()
+	acquired = False
+	started_at = time.perf_counter()
+	try:
+		with phase('waf.browser_launch'):
+			context = await browser_manager.new_context()
 			page = await context.new_page()
+		page.on('requestfinished', traffic.on_request_finished)
+		if lean_mode:
+			await enable_lean_mode(page, login_url, traffic)
 
-			try:
-				print(f'[PROCESSING] {account_name}: Access login page to get initial cookies...')
+		logger.info(f'{account_name}: Access login page to get initial cookies...', tag='PROCESSING')
 
-				await page.goto(login_url, wait_until='networkidle')
+		# 导航提交后即开始监听 cookies，不等待 networkidle
+		with phase('waf.navigation'):
+			await page.goto(login_url, wait_until='commit')
 
-				try:
-					await page.wait_for_function('document.readyState === "complete"', timeout=5000)
-				except Exception:
-					await page.wait_for_timeout(3000)
+		with phase('waf.cookie_wait'):
+			waf_cookies, missing_cookies = await wait_for_cookies(page, required_cookies, load_cookie_timeout())
 
-				cookies = await page.context.cookies()
+		logger.info(f'{account_name}: Got {len(waf_cookies)} WAF cookies')
 
-				waf_cookies = {}
-				for cookie in cookies:
-					cookie_name = cookie.get('name')
-					cookie_value = cookie.get('value')
-					if cookie_name in required_cookies and cookie_value is not None:
-						waf_cookies[cookie_name] = cookie_value
+		if missing_cookies:
+			logger.error(f'{account_name}: Missing WAF cookies: {missing_cookies}')
+			return None
 
-				print(f'[INFO] {account_name}: Got {len(waf_cookies)} WAF cookies')
+		logger.info(f'{account_name}: Successfully got all WAF cookies', tag='SUCCESS')
 
-				missing_cookies = [c for c in required_cookies if c not in waf_cookies]
+		acquired = True
+		return waf_cookies
 
-				if missing_cookies:
-					print(f'[FAILED] {account_name}: Missing WAF cookies: {missing_cookies}')
-					await context.close()
-					return None
+	except Exception as e:
+		logger.error(f'{account_name}: Error occurred while getting WAF cookies: {e}')
+		return None
+	finally:
+		transferred_bytes = await traffic.total_bytes()
+		if context is not None:
+			await context.close()
+
+		elapsed = time.perf_counter() - started_at
+		domain = urlparse(login_url).hostname or login_url
+		if acquired:
+			# 精简模式节省的流量与时间需要与同一域名完整页面加载的基线对比
+			load_mode, savings = describe_load(
+				lean_mode, traffic, transferred_bytes, elapsed, waf_load_baseline.get(domain)
+			)
+			if not lean_mode:
+				waf_load_baseline.record(domain, transferred_bytes, elapsed)
+		else:
+			load_mode = f'lean mode, blocked {traffic.blocked} request(s)' if lean_mode else 'full page load'
+			load_mode, savings = f'{load_mode}, acquisition failed', {}
+		logger.info(
+			f'{account_name}: WAF acquisition transferred {transferred_bytes / 1024:.1f} KB '
+			f'in {traffic.requests} request(s), took {elapsed:.2f}s ({load_mode})',
+			phase='waf_browser',
+			duration=round(elapsed, 4),
+			blocked=traffic.blocked,
+			transferred_bytes=transferred_bytes,
+			**savings,
+		)
+
+
+async def acquire_waf_cookies(account_name: str, login_url: str, required_cookies: list[str]):
+	"""获取 WAF cookies：优先使用纯 Python 求解器，页面格式无法识别时回退到 Playwright"""
+	with phase('waf.solver'):
+		waf_cookies = await get_waf_cookies_with_solver(account_name, login_url, required_cookies)
+	if waf_cookies:
+		return waf_cookies
+
+	logger.info(f'{account_name}: Falling back to browser for WAF cookies')
+	return await get_waf_cookies_with_playwright(account_name, login_url, required_cookies)
+
+
+browser_manager = BrowserManager()
+waf_load_baseline = LoadBaseline(WAF_LOAD_BASELINE_FILE)
+retry_budget = RetryBudget()
+check_in_ledger = CheckInLedger(CHECK_IN_LEDGER_FILE)
+http_client_pool = HttpClientPool()
+waf_cookie_cache = WafCookieCache(WAF_COOKIE_CACHE_FILE, load_waf_cookie_ttl())
+waf_cookie_manager = WafCookieManager(acquire_waf_cookies, waf_cookie_cache)
+
+
+async def observe_request(provider_config, endpoint: str, request: Awaitable[httpx.Response]) -> httpx.Response:
+	"""等待请求完成，按 provider 与接口路径记录请求数（含状态码）与延迟指标"""
+	status = 'error'
+	try:
+		with http_request_seconds.time(provider=provider_config.name, endpoint=endpoint):
+			response = await request
+		status = str(response.status_code)
+		return response
+	finally:
+		http_requests_total.inc(provider=provider_config.name, endpoint=endpoint, status=status)
 
-				print(f'[SUCCESS] {account_name}: Successfully got all WAF cookies')
 
-				await context.close()
+async def get_user_info(client: httpx.AsyncClient, headers: dict, provider_config):
+	"""获取用户信息，可识别的失败类别抛出 CheckInError"""
+	user_info_url = f'{provider_config.domain}{provider_config.user_info_path}'
+	response = await observe_request(
+		provider_config, provider_config.user_info_path, client.get(user_info_url, headers=headers, timeout=30)
+	)
+	raise_for_failure(response, 'User info request')
 
-				return waf_cookies
+	if response.status_code != 200:
+		return {'success': False, 'error': f'Failed to get user info: HTTP {response.status_code}'}
 
-			except Exception as e:
-				print(f'[FAILED] {account_name}: Error occurred while getting WAF cookies: {e}')
-				await context.close()
-				return None
+	try:
+		data = response.json()
+	except json.JSONDecodeError:
+		return {'success': False, 'error': 'Failed to get user info: Invalid response format'}
 
+	if not data.get('success'):
+		raise CheckInError('business_error', data.get('message') or data.get('msg') or 'Unknown error')
 
-def get_user_info(client, headers, user_info_url: str):
-	"""获取用户信息"""
-	try:
-		response = client.get(user_info_url, headers=headers, timeout=30)
-
-		if response.status_code == 200:
-			data = response.json()
-			if data.get('success'):
-				user_data = data.get('data', {})
-				quota = round(user_data.get('quota', 0) / 500000, 2)
-				used_quota = round(user_data.get('used_quota', 0) / 500000, 2)
-				return {
-					'success': True,
-					'quota': quota,
-					'used_quota': used_quota,
-					'display': f':money: Current balance: ${quota}, Used: ${used_quota}',
-				}
-		return {'success': False, 'error': f'Failed to get user info: HTTP {response.status_code}'}
-	except Exception as e:
-		return {'success': False, 'error': f'Failed to get user info: {str(e)[:50]}...'}
+	user_data = data.get('data', {})
+	quota = round(user_data.get('quota', 0) / 500000, 2)
+	used_quota = round(user_data.get('used_quota', 0) / 500000, 2)
+	return {
+		'success': True,
+		'quota': quota,
+		'used_quota': used_quota,
+		'display': f':money: Current balance: ${quota}, Used: ${used_quota}',
+	}
 
 
 async def prepare_cookies(account_name: str, provider_config, user_cookies: dict) -> dict | None:
@@ -156,245 +234,716 @@ async def prepare_cookies(account_name: str, provider_config, user_cookies: dict
 	waf_cookies = {}
 
 	if provider_config.needs_waf_cookies():
-		login_url = f'{provider_config.domain}{provider_config.login_path}'
-		waf_cookies = await get_waf_cookies_with_playwright(account_name, login_url, provider_config.waf_cookie_names)
+		with phase('waf'):
+			waf_cookies = await waf_cookie_manager.get(account_name, provider_config)
 		if not waf_cookies:
-			print(f'[FAILED] {account_name}: Unable to get WAF cookies')
+			logger.error(f'{account_name}: Unable to get WAF cookies')
 			return None
 	else:
-		print(f'[INFO] {account_name}: Bypass WAF not required, using user cookies directly')
+		logger.info(f'{account_name}: Bypass WAF not required, using user cookies directly')
 
 	return {**waf_cookies, **user_cookies}
 
 
-def execute_check_in(client, account_name: str, provider_config, headers: dict):
-	"""执行签到请求"""
-	print(f'[NETWORK] {account_name}: Executing check-in')
+async def execute_check_in(
+	client: httpx.AsyncClient, account_name: str, provider_config, headers: dict, retried: bool = False
+):
+	"""执行签到请求，失败时抛出带失败类别的 CheckInError
+
+	签到请求不是幂等的：重试时（上一次请求可能已在服务端成功，只是客户端超时或收到 5xx）
+	“今天已签到”的回复视为签到成功。
+	"""
+	logger.info(f'{account_name}: Executing check-in', tag='NETWORK')
 
 	checkin_headers = headers.copy()
 	checkin_headers.update({'Content-Type': 'application/json', 'X-Requested-With': 'XMLHttpRequest'})
 
 	sign_in_url = f'{provider_config.domain}{provider_config.sign_in_path}'
-	response = client.post(sign_in_url, headers=checkin_headers, timeout=30)
+	response = await observe_request(
+		provider_config, provider_config.sign_in_path, client.post(sign_in_url, headers=checkin_headers, timeout=30)
+	)
 
-	print(f'[RESPONSE] {account_name}: Response status code {response.status_code}')
+	logger.info(f'{account_name}: Response status code {response.status_code}', tag='RESPONSE')
 
-	if response.status_code == 200:
-		try:
-			result = response.json()
-			if result.get('ret') == 1 or result.get('code') == 0 or result.get('success'):
-				print(f'[SUCCESS] {account_name}: Check-in successful!')
-				return True
-			else:
-				error_msg = result.get('msg', result.get('message', 'Unknown error'))
-				print(f'[FAILED] {account_name}: Check-in failed - {error_msg}')
-				return False
-		except json.JSONDecodeError:
-			# 如果不是 JSON 响应，检查是否包含成功标识
-			if 'success' in response.text.lower():
-				print(f'[SUCCESS] {account_name}: Check-in successful!')
-				return True
-			else:
-				print(f'[FAILED] {account_name}: Check-in failed - Invalid response format')
-				return False
-	else:
-		print(f'[FAILED] {account_name}: Check-in failed - HTTP {response.status_code}')
-		return False
+	raise_for_failure(response, 'Check-in request')
+
+	if response.status_code != 200:
+		raise CheckInError('business_error', f'HTTP {response.status_code}')
+
+	try:
+		result = response.json()
+	except json.JSONDecodeError:
+		# 如果不是 JSON 响应，检查是否包含成功标识
+		if 'success' in response.text.lower():
+			logger.info(f'{account_name}: Check-in successful!', tag='SUCCESS')
+			return True
+		raise CheckInError('business_error', 'Invalid response format')
+
+	if result.get('ret') == 1 or result.get('code') == 0 or result.get('success'):
+		logger.info(f'{account_name}: Check-in successful!', tag='SUCCESS')
+		return True
+
+	message = result.get('msg', result.get('message', 'Unknown error'))
+	if retried and is_already_checked_in(str(message)):
+		logger.info(f'{account_name}: Already checked in by the previous attempt ({message})', tag='SUCCESS')
+		return True
+
+	raise CheckInError('business_error', message)
 
 
 async def check_in_account(account: AccountConfig, account_index: int, app_config: AppConfig):
 	"""为单个账号执行签到操作"""
 	account_name = account.get_display_name(account_index)
-	print(f'\n[PROCESSING] Starting to process {account_name}')
+	logger.info(f'Starting to process {account_name}', tag='PROCESSING')
 
 	provider_config = app_config.get_provider(account.provider)
 	if not provider_config:
-		print(f'[FAILED] {account_name}: Provider "{account.provider}" not found in configuration')
+		logger.error(f'{account_name}: Provider "{account.provider}" not found in configuration')
 		return False, None
 
-	print(f'[INFO] {account_name}: Using provider "{account.provider}" ({provider_config.domain})')
+	logger.info(f'{account_name}: Using provider "{account.provider}" ({provider_config.domain})')
+
+	checked_in_at = check_in_ledger.checked_in_at(account.key)
+	if checked_in_at is not None and check_in_ledger.mode == 'skip':
+		logger.info(f'{account_name}: Already checked in at {format_timestamp(checked_in_at)}, skipped')
+		return True, None
 
 	user_cookies = parse_cookies(account.cookies)
 	if not user_cookies:
-		print(f'[FAILED] {account_name}: Invalid configuration format')
+		logger.error(f'{account_name}: Invalid configuration format')
 		return False, None
 
+	return await request_account(account, account_name, provider_config, user_cookies)
+
+
+async def request_account(account: AccountConfig, account_name: str, provider_config, user_cookies: dict):
+	"""准备 cookies 后请求用户信息并签到，失败时按失败类别的策略重试"""
 	all_cookies = await prepare_cookies(account_name, provider_config, user_cookies)
 	if not all_cookies:
 		return False, None
 
-	client = httpx.Client(http2=True, timeout=30.0)
+	client = http_client_pool.get(provider_config.domain)
+
+	headers = {
+		'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
+		'Accept': 'application/json, text/plain, */*',
+		'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+		'Accept-Encoding': 'gzip, deflate, br, zstd',
+		'Referer': provider_config.domain,
+		'Origin': provider_config.domain,
+		'Connection': 'keep-alive',
+		'Sec-Fetch-Dest': 'empty',
+		'Sec-Fetch-Mode': 'cors',
+		'Sec-Fetch-Site': 'same-origin',
+		provider_config.api_user_key: account.api_user,
+		# 共享连接池不保存 cookie，每个账号的 cookies 通过请求头单独传递
+		'Cookie': build_cookie_header(all_cookies),
+	}
+
+	async def refresh_waf_cookies():
+		"""WAF cookies 已失效：作废共享 cookies 后重新获取"""
+		nonlocal all_cookies
+		waf_cookie_manager.invalidate(provider_config, all_cookies)
+		refreshed_cookies = await prepare_cookies(account_name, provider_config, user_cookies)
+		if not refreshed_cookies:
+			raise CheckInError('waf_challenge', 'Unable to re-acquire WAF cookies')
+		all_cookies = refreshed_cookies
+		headers['Cookie'] = build_cookie_header(all_cookies)
+
+	on_waf_challenge = refresh_waf_cookies if provider_config.needs_waf_cookies() else None
+	check_in_attempts = 0
+
+	async def check_in():
+		nonlocal check_in_attempts
+		check_in_attempts += 1
+		return await execute_check_in(client, account_name, provider_config, headers, retried=check_in_attempts > 1)
 
 	try:
-		client.cookies.update(all_cookies)
-
-		headers = {
-			'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36',
-			'Accept': 'application/json, text/plain, */*',
-			'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-			'Accept-Encoding': 'gzip, deflate, br, zstd',
-			'Referer': provider_config.domain,
-			'Origin': provider_config.domain,
-			'Connection': 'keep-alive',
-			'Sec-Fetch-Dest': 'empty',
-			'Sec-Fetch-Mode': 'cors',
-			'Sec-Fetch-Site': 'same-origin',
-			provider_config.api_user_key: account.api_user,
-		}
-
-		user_info_url = f'{provider_config.domain}{provider_config.user_info_path}'
-		user_info = get_user_info(client, headers, user_info_url)
-		if user_info and user_info.get('success'):
-			print(user_info['display'])
-		elif user_info:
-			print(user_info.get('error', 'Unknown error'))
+		try:
+			with phase('user_info'):
+				user_info = await with_retry(
+					account_name,
+					'User info request',
+					lambda: get_user_info(client, headers, provider_config),
+					retry_budget,
+					on_waf_challenge,
+				)
+		except CheckInError as e:
+			user_info = {'success': False, 'error': f'Failed to get user info ({e.failure}): {e}', 'failure': e.failure}
+
+		if user_info.get('success'):
+			logger.info(
+				f'{account_name}: {user_info["display"]}', quota=user_info['quota'], used_quota=user_info['used_quota']
+			)
+		else:
+			logger.error(f'{account_name}: {user_info.get("error", "Unknown error")}')
+			if user_info.get('failure') == 'session_expired':
+				# session 过期时签到必然失败，不再发送签到请求
+				logger.error(f'{account_name}: Session expired, please update cookies')
+				return False, user_info
 
 		if provider_config.needs_manual_check_in():
-			success = execute_check_in(client, account_name, provider_config, headers)
-			return success, user_info
+			checked_in_at = check_in_ledger.checked_in_at(account.key)
+			if checked_in_at is not None:
+				logger.info(
+					f'{account_name}: Already checked in at {format_timestamp(checked_in_at)}, skipping check-in request'
+				)
+				return True, user_info
+
+			try:
+				with phase('check_in'):
+					await with_retry(
+						account_name,
+						'Check-in request',
+						check_in,
+						retry_budget,
+						on_waf_challenge,
+					)
+			except CheckInError as e:
+				logger.error(f'{account_name}: Check-in failed ({e.failure}) - {e}')
+				return False, user_info
+			check_in_ledger.record(account.key)
+			return True, user_info
 		else:
-			print(f'[INFO] {account_name}: Check-in completed automatically (triggered by user info request)')
+			logger.info(f'{account_name}: Check-in completed automatically (triggered by user info request)')
+			if user_info.get('success'):
+				check_in_ledger.record(account.key)
 			return True, user_info
 
 	except Exception as e:
-		print(f'[FAILED] {account_name}: Error occurred during check-in process - {str(e)[:50]}...')
+		logger.error(f'{account_name}: Error occurred during check-in process - {str(e)[:50]}...')
 		return False, None
-	finally:
-		client.close()
 
 
-async def main():
-	"""主函数"""
-	print('[SYSTEM] AnyRouter.top multi-account auto check-in script started (using Playwright)')
-	print(f'[TIME] Execution time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
+def record_account_metrics(record: AccountResult):
+	"""记录账号的签到结果指标与当前余额（签到时调用，分片模式下由合并步骤对合并后的结果调用）"""
+	if record.exception is not None:
+		outcome = 'error'
+	else:
+		outcome = 'success' if record.success else 'failed'
+	checkins_total.inc(provider=record.provider, outcome=outcome)
+
+	if record.has_balance:
+		labels = {'provider': record.provider, 'api_user': record.api_user, 'account': record.name}
+		account_quota.set(record.quota, **labels)
+		account_used_quota.set(record.used_quota, **labels)
+
+
+async def run_accounts(
+	accounts: Iterable[AccountConfig],
+	app_config: AppConfig,
+	run_report: RunReport | None = None,
+	on_result: Callable[[int, AccountConfig, dict], None] | None = None,
+) -> list[dict]:
+	"""使用有界并发的 worker 池执行所有账号签到
+
+	账号从共享迭代器中按需取出，可以是流式读取的账号文件。提供 on_result 时每个账号完成后立即回调，
+	不保留结果；否则结果按账号顺序返回（与完成顺序无关）。
+	"""
+	results: dict[int, dict] = {}
+	# 分片视图保留账号在完整列表中的序号
+	pending = accounts.indexed() if isinstance(accounts, ShardedAccounts) else enumerate(accounts)
+
+	async def worker():
+		for i, account in pending:
+			account_name = account.get_display_name(i)
+			timer = run_report.account(i, account_name) if run_report else None
+			token = current_timer.set(timer)
+			context_token = log_context.set({'account': account_name, 'provider': account.provider})
+			started_at = time.perf_counter()
+			try:
+				with phase('total'):
+					success, user_info = await check_in_account(account, i, app_config)
+				result = {'success': success, 'user_info': user_info, 'exception': None}
+			except Exception as e:
+				result = {'success': False, 'user_info': None, 'exception': e}
+			finally:
+				elapsed = time.perf_counter() - started_at
+				logger.info(f'{account_name}: Finished in {elapsed:.2f}s', phase='total', duration=round(elapsed, 4))
+				current_timer.reset(token)
+				log_context.reset(context_token)
+			result['timings'] = dict(timer.phases) if timer else {}
+			record_account_metrics(account_result(i, account, result))
+
+			if on_result is not None:
+				on_result(i, account, result)
+			else:
+				results[i] = result
 
-	app_config = AppConfig.load_from_env()
-	print(f'[INFO] Loaded {len(app_config.providers)} provider configuration(s)')
+	# 账号数量未知（例如生成器）时按配置的并发数启动 worker
+	account_count = len(accounts) if isinstance(accounts, Sized) else app_config.concurrency
+	worker_count = max(1, min(app_config.concurrency, account_count))
+	if worker_count > 1:
+		logger.info(f'Running check-in with {worker_count} concurrent workers')
 
-	accounts = load_accounts_config()
-	if not accounts:
-		print('[FAILED] Unable to load account configuration, program exits')
-		sys.exit(1)
+	await asyncio.gather(*(worker() for _ in range(worker_count)))
+	return [results[i] for i in sorted(results)]
 
-	print(f'[INFO] Found {len(accounts)} account configurations')
 
-	last_balance_hash = load_balance_hash()
+async def run_process_shard(
+	accounts: Iterable[AccountConfig], app_config: AppConfig, shard_index: int, shard_count: int, budget: int
+) -> dict:
+	"""进程池 worker 的事件循环：处理一个分片的账号，返回可序列化的结果供父进程汇总
 
-	success_count = 0
-	total_count = len(accounts)
-	notification_content = []
-	current_balances = {}
-	need_notify = False  # 是否需要发送通知
-	balance_changed = False  # 余额是否有变化
-
-	for i, account in enumerate(accounts):
-		account_key = f'account_{i + 1}'
-		try:
-			success, user_info = await check_in_account(account, i, app_config)
-			if success:
-				success_count += 1
-
-			should_notify_this_account = False
-
-			if not success:
-				should_notify_this_account = True
-				need_notify = True
-				account_name = account.get_display_name(i)
-				print(f'[NOTIFY] {account_name} failed, will send notification')
-
-			if user_info and user_info.get('success'):
-				current_quota = user_info['quota']
-				current_used = user_info['used_quota']
-				current_balances[account_key] = {'quota': current_quota, 'used': current_used}
-
-			if should_notify_this_account:
-				account_name = account.get_display_name(i)
-				status = '[SUCCESS]' if success else '[FAIL]'
-				account_result = f'{status} {account_name}'
-				if user_info and user_info.get('success'):
-					account_result += f'\n{user_info["display"]}'
-				elif user_info:
-					account_result += f'\n{user_info.get("error", "Unknown error")}'
-				notification_content.append(account_result)
-
-		except Exception as e:
-			account_name = account.get_display_name(i)
-			print(f'[FAILED] {account_name} processing exception: {e}')
-			need_notify = True  # 异常也需要通知
-			notification_content.append(f'[FAIL] {account_name} exception: {str(e)[:50]}...')
-
-	# 检查余额变化
-	current_balance_hash = generate_balance_hash(current_balances) if current_balances else None
-	if current_balance_hash:
-		if last_balance_hash is None:
+	账号来源与应用配置由父进程加载校验后传入（账号文件只传递路径，由各进程流式读取），不再重复加载。
+	"""
+	# 进程池可能复用同一个 worker 处理多个分片，回传的指标快照只能包含本分片的样本
+	registry.clear()
+	waf_cookie_manager.reset_stats()
+	sharded_accounts = ShardedAccounts(accounts, shard_index, shard_count)
+	check_in_ledger.load()
+	retry_budget.reset(budget)
+	run_report = RunReport()
+	records: list[AccountResult] = []
+
+	def collect_record(i: int, account: AccountConfig, result: dict):
+		records.append(account_result(i, account, result))
+
+	try:
+		await run_accounts(sharded_accounts, app_config, run_report, on_result=collect_record)
+	finally:
+		await close_shared_resources()
+	waf_cookie_manager.print_stats()
+
+	return {
+		'records': records,
+		'ledger_updates': check_in_ledger.updates,
+		'retries_used': retry_budget.used,
+		'metrics': registry.snapshot(),
+	}
+
+
+def process_worker(
+	accounts: Iterable[AccountConfig], app_config: AppConfig, shard_index: int, shard_count: int, budget: int
+) -> dict:
+	"""进程池 worker 入口：每个进程使用独立的事件循环、浏览器与连接池"""
+	setup_logging()
+	return asyncio.run(run_process_shard(accounts, app_config, shard_index, shard_count, budget))
+
+
+async def warm_waf_cookies(accounts: Iterable[AccountConfig], app_config: AppConfig):
+	"""在父进程中为每个需要 WAF cookies 的 provider 获取一次并写入磁盘缓存
+
+	各 worker 进程的 single-flight 只在进程内生效，预先获取后 worker 直接读取磁盘缓存，不再各自启动浏览器。
+	"""
+	providers = {}
+	for account in accounts:
+		provider_config = app_config.get_provider(account.provider)
+		if provider_config and provider_config.needs_waf_cookies():
+			providers.setdefault(provider_config.domain, provider_config)
+	if not providers:
+		return
+
+	await asyncio.gather(
+		*(
+			waf_cookie_manager.get(f'WAF warm-up ({provider_config.name})', provider_config)
+			for provider_config in providers.values()
+		)
+	)
+	# worker 运行期间父进程不再需要浏览器
+	await browser_manager.close()
+
+
+async def run_accounts_in_processes(
+	accounts: Iterable[AccountConfig], app_config: AppConfig, run_report: RunReport, summary: 'CycleSummary'
+) -> int:
+	"""将账号按分片分配到多个进程并行签到，结果回传父进程汇总，返回已使用的重试次数"""
+	process_count = app_config.processes
+	logger.info(f'Running check-in in {process_count} worker processes')
+
+	with run_report.run.phase('waf_warmup'):
+		await warm_waf_cookies(accounts, app_config)
+
+	# spawn 方式启动：不继承父进程的事件循环与浏览器状态，各平台行为一致
+	loop = asyncio.get_running_loop()
+	retries_used = 0
+	with ProcessPoolExecutor(max_workers=process_count, mp_context=multiprocessing.get_context('spawn')) as pool:
+
+		async def run_shard(shard_index: int, budget: int) -> tuple[int, dict | Exception]:
+			try:
+				return shard_index, await loop.run_in_executor(
+					pool, process_worker, accounts, app_config, shard_index, process_count, budget
+				)
+			except Exception as e:
+				return shard_index, e
+
+		futures = [
+			run_shard(shard_index, budget) for shard_index, budget in enumerate(retry_budget.split(process_count), 1)
+		]
+		for future in asyncio.as_completed(futures):
+			shard_index, result = await future
+			# 单个进程失败（如浏览器占用内存过多被系统终止）时记录错误，其余分片照常汇总
+			if isinstance(result, Exception):
+				logger.error(f'Process shard {shard_index}/{process_count} failed: {result}')
+				summary.errors.append(f'Process shard {shard_index}/{process_count} failed: {str(result)[:50]}')
+				continue
+			for record in result['records']:
+				summary.add(record)
+				timer = run_report.account(record.index, record.name)
+				for phase_name, seconds in record.timings.items():
+					timer.add(phase_name, seconds)
+			check_in_ledger.apply(result['ledger_updates'])
+			retries_used += result['retries_used']
+			registry.merge(result['metrics'])
+
+	return retries_used
+
+
+def account_result(index: int, account: AccountConfig, result: dict) -> AccountResult:
+	"""将单个账号的签到结果转换为结果对象，用于汇总、进程间传递与分片结果文件"""
+	exception, user_info = result['exception'], result['user_info'] or {}
+	record = AccountResult(
+		index=index,
+		name=account.get_display_name(index),
+		provider=account.provider,
+		api_user=account.api_user,
+		success=result['success'],
+		exception=str(exception) if exception is not None else None,
+		timings=result.get('timings') or {},
+	)
+	if user_info.get('success'):
+		record.quota, record.used_quota = user_info['quota'], user_info['used_quota']
+	elif user_info:
+		record.error = user_info.get('error', 'Unknown error')
+	return record
+
+
+def is_balance_changed(balance_key: tuple[str, str], quota: float, last_balances: dict) -> bool:
+	"""账号余额与上次记录不同（或没有历史记录）"""
+	return last_balances.get(balance_key, {}).get('quota') != quota
+
+
+class CycleSummary:
+	"""逐个账号汇总签到结果，只保留需要通知的账号结果与余额记录，不保留账号配置本身"""
+
+	def __init__(self, last_balances: dict):
+		self.last_balances = last_balances
+		self.total_count = 0
+		self.success_count = 0
+		self.errors: list[str] = []  # 与具体账号无关的错误（如缺失的分片）
+		self.failures: dict[int, AccountResult] = {}  # 账号序号 -> 失败账号
+		self.balances: dict[int, AccountResult] = {}  # 账号序号 -> 余额变化账号
+		self.balance_records: list[tuple[str, str, float, float]] = []  # 本次运行写入余额历史的记录
+
+	def add(self, record: AccountResult):
+		self.total_count += 1
+		if record.exception is not None:
+			logger.error(f'{record.name} processing exception: {record.exception}')
+			self.failures[record.index] = record
+			return
+
+		if record.success:
+			self.success_count += 1
+		else:
+			logger.info(f'{record.name} failed, will send notification', tag='NOTIFY')
+			self.failures[record.index] = record
+
+		if record.has_balance:
+			self.balance_records.append((*record.balance_key, record.quota, record.used_quota))
+			# 只将余额有变化且未失败的账号添加到余额通知
+			if is_balance_changed(record.balance_key, record.quota, self.last_balances) and record.success:
+				last_balance = self.last_balances.get(record.balance_key)
+				if last_balance:
+					record.change = round(record.quota - last_balance['quota'], 2)
+				self.balances[record.index] = record
+
+	def result(self) -> RunResult:
+		"""生成本次周期的结果对象，失败账号与余额变化账号各自按账号顺序排列"""
+		return RunResult(
+			execution_time=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+			total_count=self.total_count,
+			success_count=self.success_count,
+			errors=list(self.errors),
+			failures=[self.failures[i] for i in sorted(self.failures)],
+			balances=[self.balances[i] for i in sorted(self.balances)],
+		)
+
+
+async def report_cycle(summary: CycleSummary, balance_store: BalanceStore, run_report: RunReport) -> int:
+	"""检查余额变化、写入余额历史并按需发送通知，返回退出码"""
+	# 逐账号检查余额变化（与余额历史中该账号的最新记录比较）
+	if summary.balance_records:
+		if not summary.last_balances:
 			# 首次运行
-			balance_changed = True
-			need_notify = True
-			print('[NOTIFY] First run detected, will send notification with current balances')
-		elif current_balance_hash != last_balance_hash:
-			# 余额有变化
-			balance_changed = True
-			need_notify = True
-			print('[NOTIFY] Balance changes detected, will send notification')
+			logger.info('First run detected, will send notification with current balances', tag='NOTIFY')
+		elif summary.balances:
+			logger.info(
+				f'Balance changes detected for {len(summary.balances)} account(s), will send notification', tag='NOTIFY'
+			)
 		else:
-			print('[INFO] No balance changes detected')
-
-	# 为有余额变化的情况添加所有成功账号到通知内容
-	if balance_changed:
-		for i, account in enumerate(accounts):
-			account_key = f'account_{i + 1}'
-			if account_key in current_balances:
-				account_name = account.get_display_name(i)
-				# 只添加成功获取余额的账号，且避免重复添加
-				account_result = f'[BALANCE] {account_name}'
-				account_result += f'\n:money: Current balance: ${current_balances[account_key]["quota"]}, Used: ${current_balances[account_key]["used"]}'
-				# 检查是否已经在通知内容中（避免重复）
-				if not any(account_name in item for item in notification_content):
-					notification_content.append(account_result)
-
-	# 保存当前余额hash
-	if current_balance_hash:
-		save_balance_hash(current_balance_hash)
-
-	if need_notify and notification_content:
-		# 构建通知内容
-		summary = [
-			'[STATS] Check-in result statistics:',
-			f'[SUCCESS] Success: {success_count}/{total_count}',
-			f'[FAIL] Failed: {total_count - success_count}/{total_count}',
-		]
+			logger.info('No balance changes detected')
 
-		if success_count == total_count:
-			summary.append('[SUCCESS] All accounts check-in successful!')
-		elif success_count > 0:
-			summary.append('[WARN] Some accounts check-in successful')
+	# 在一个事务中写入本次运行的余额历史
+	try:
+		balance_store.append_run(summary.balance_records)
+	except Exception as e:
+		logger.warning(f'Failed to save balance history: {e}')
+	finally:
+		balance_store.close()
+
+	run_result = summary.result()
+	if run_result.has_notification:
+		logger.info(run_result.text, tag='')
+		with run_report.run.phase('notify'):
+			await notify.apush_message('AnyRouter Check-in Alert', run_result)
+		logger.info('Notification sent due to failures or balance changes', tag='NOTIFY')
+	else:
+		logger.info('All accounts successful and no balance changes detected, notification skipped')
+
+	run_report.save(load_run_report_file())
+
+	return 0 if summary.success_count > 0 else 1
+
+
+def reload_env():
+	"""重新加载 .env 与通知配置，使常驻模式下修改的账号与配置在下一个周期生效
+
+	从 .env 中删除的键同时从环境变量中移除。日志配置（LOG_*）与 /metrics 端口（METRICS_PORT）
+	只在启动时读取，修改后需要重启进程。
+	"""
+	values = {key: value for key, value in dotenv_values().items() if key not in PROCESS_ENV_KEYS and value is not None}
+	for key in DOTENV_KEYS - values.keys():
+		os.environ.pop(key, None)
+	os.environ.update(values)
+	DOTENV_KEYS.clear()
+	DOTENV_KEYS.update(values)
+
+	waf_cookie_cache.default_ttl = load_waf_cookie_ttl()
+	notify.load_from_env()
+
+
+async def run_cycle(shard: tuple[int, int] | None = None) -> int:
+	"""执行一次完整的签到周期，返回退出码；浏览器与连接池由调用方负责关闭
+
+	指定分片 (i, N) 时只处理属于该分片的账号，并将结果写入分片结果文件，余额比较与通知由合并步骤完成。
+	"""
+	logger.info(f'Execution time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', tag='TIME')
+
+	run_report = RunReport()
+	# 常驻模式下已从配置中移除的账号不再导出上一个周期的余额
+	account_quota.clear()
+	account_used_quota.clear()
+
+	with run_report.run.phase('config'):
+		app_config = AppConfig.load_from_env()
+		logger.info(f'Loaded {len(app_config.providers)} provider configuration(s)')
+
+		accounts = load_accounts_config()
+	if not accounts:
+		logger.error('Unable to load account configuration, program exits')
+		return 1
+
+	logger.info(f'Found {len(accounts)} account configurations')
+
+	if shard is not None:
+		accounts = ShardedAccounts(accounts, *shard)
+		logger.info(f'Shard {shard[0]}/{shard[1]}: {len(accounts)} account(s) assigned')
+
+	check_in_ledger.load()
+
+	# 重试预算默认每个账号一次（至少 10 次），可通过 CHECKIN_RETRY_BUDGET 覆盖
+	retry_budget.reset(app_config.retry_budget if app_config.retry_budget is not None else max(10, len(accounts)))
+
+	if shard is None:
+		balance_store = BalanceStore(BALANCE_HISTORY_FILE)
+		summary = CycleSummary(balance_store.latest())
+
+		def collect_result(i: int, account: AccountConfig, result: dict):
+			summary.add(account_result(i, account, result))
+
+		if app_config.processes > 1:
+			with run_report.run.phase('accounts'):
+				retries_used = await run_accounts_in_processes(accounts, app_config, run_report, summary)
+			check_in_ledger.save()
+			logger.info(f'Retries used: {retries_used}/{retry_budget.total}')
 		else:
-			summary.append('[ERROR] All accounts check-in failed')
+			with run_report.run.phase('accounts'):
+				await run_accounts(accounts, app_config, run_report, on_result=collect_result)
+			check_in_ledger.save()
 
-		time_info = f'[TIME] Execution time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'
-		execution_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+			waf_cookie_manager.print_stats()
+			logger.info(f'Retries used: {retry_budget.used}/{retry_budget.total}')
 
-		notify_content = '\n\n'.join([time_info, '\n'.join(notification_content), '\n'.join(summary)])
+		return await report_cycle(summary, balance_store, run_report)
+
+	writer = ShardResultWriter(load_shard_results_dir(), *shard, load_shard_run_id())
+	success_count = 0
+
+	def write_result(i: int, account: AccountConfig, result: dict):
+		nonlocal success_count
+		success_count += 1 if result['success'] else 0
+		writer.write(account_result(i, account, result).to_dict())
+
+	try:
+		with run_report.run.phase('accounts'):
+			await run_accounts(accounts, app_config, run_report, on_result=write_result)
+	finally:
+		writer.close()
+	check_in_ledger.save()
+
+	waf_cookie_manager.print_stats()
+	logger.info(f'Retries used: {retry_budget.used}/{retry_budget.total}')
+	logger.info(f'Shard {shard[0]}/{shard[1]} results saved to {writer.path}, run with --merge to send notification')
+	run_report.save(load_run_report_file())
+
+	return 0 if success_count > 0 or not len(accounts) else 1
 
-		print(notify_content)
-		notify.push_message('AnyRouter Check-in Alert', notify_content, msg_type='text', execution_time=execution_time)
-		print('[NOTIFY] Notification sent due to failures or balance changes')
-	else:
-		print('[INFO] All accounts successful and no balance changes detected, notification skipped')
+
+async def merge_shards() -> int:
+	"""合并所有分片结果文件：统一比较余额、写入余额历史并发送通知"""
+	logger.info(f'Execution time: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', tag='TIME')
+
+	run_report = RunReport()
+	results_dir, run_id = load_shard_results_dir(), load_shard_run_id()
+	shard_files, shard_count = find_shard_files(results_dir, run_id)
+	if not shard_count:
+		logger.error(f'No shard result files of run {run_id} found in {results_dir}')
+		return 1
+
+	balance_store = BalanceStore(BALANCE_HISTORY_FILE)
+	summary = CycleSummary(balance_store.latest())
+
+	with run_report.run.phase('merge'):
+		for shard_index in range(1, shard_count + 1):
+			path = shard_files.get(shard_index)
+			if path is None:
+				logger.error(f'Shard {shard_index}/{shard_count} results missing')
+				summary.errors.append(f'Shard {shard_index}/{shard_count} results missing')
+				continue
+
+			try:
+				for data in read_shard_records(path):
+					record = AccountResult.from_dict(data)
+					# 各分片运行的指标写在各自的 textfile 中，合并后的指标由合并步骤重新记录
+					record_account_metrics(record)
+					summary.add(record)
+			except Exception as e:
+				logger.error(f'Failed to read shard results {path}: {e}')
+				summary.errors.append(f'Shard {shard_index}/{shard_count} results unreadable: {str(e)[:50]}')
+
+	logger.info(f'Merged {summary.total_count} account result(s) from {len(shard_files)}/{shard_count} shard(s)')
+
+	exit_code = await report_cycle(summary, balance_store, run_report)
+	if summary.errors:
+		# 保留分片文件，补齐缺失的分片后可以重新合并
+		return 1
+
+	remove_shard_files(shard_files.values())
+	return exit_code
+
+
+def export_metrics(started_at: float):
+	"""记录周期完成时间与耗时，配置了 METRICS_TEXTFILE 时写出 node-exporter textfile"""
+	last_run_timestamp.set(time.time())
+	last_run_seconds.set(time.perf_counter() - started_at)
+	textfile = load_metrics_textfile()
+	if textfile:
+		registry.write_textfile(textfile)
+
+
+async def close_shared_resources():
+	"""关闭共享的 HTTP 连接池与浏览器"""
+	await http_client_pool.aclose()
+	await browser_manager.close()
+
+
+async def main(shard: tuple[int, int] | None = None):
+	"""主函数"""
+	logger.info('AnyRouter.top multi-account auto check-in script started (using Playwright)', tag='SYSTEM')
+
+	started_at = time.perf_counter()
+	try:
+		exit_code = await run_cycle(shard)
+	finally:
+		await close_shared_resources()
+		export_metrics(started_at)
 
 	# 设置退出码
-	sys.exit(0 if success_count > 0 else 1)
+	sys.exit(exit_code)
+
+
+async def run_daemon():
+	"""常驻模式：按 CHECKIN_SCHEDULE 计划循环执行签到，周期之间保持浏览器与连接池常驻"""
+	stop_signal = StopSignal()
+	stop_signal.install()
+	schedule = load_schedule()
+	logger.info(f'AnyRouter.top check-in daemon started, schedule: "{schedule.expression}"', tag='SYSTEM')
+	metrics_server = start_metrics_server()
+
+	try:
+		while not stop_signal.stopped:
+			next_run = schedule.next_after(datetime.now())
+			logger.info(f'Next check-in cycle at {next_run.strftime("%Y-%m-%d %H:%M:%S")}')
+			if not await stop_signal.wait_until(next_run):
+				break
+
+			reload_env()
+			started_at = time.perf_counter()
+			stop_signal.task = asyncio.create_task(run_cycle())
+			try:
+				await stop_signal.task
+			except asyncio.CancelledError:
+				logger.warning('Check-in cycle cancelled')
+				break
+			except Exception as e:
+				logger.error(f'Check-in cycle failed: {e}')
+			finally:
+				stop_signal.task = None
+				export_metrics(started_at)
+
+			# 配置中的计划可能已修改
+			schedule = load_schedule()
+	finally:
+		await close_shared_resources()
+		if metrics_server is not None:
+			metrics_server.stop()
+
+	logger.info('Daemon stopped', tag='SYSTEM')
+
+
+def shard_argument(value: str) -> tuple[int, int]:
+	try:
+		return parse_shard(value)
+	except ValueError as e:
+		raise argparse.ArgumentTypeError(str(e)) from e
 
 
 def run_main():
 	"""运行主函数的包装函数"""
+	parser = argparse.ArgumentParser(description='AnyRouter.top multi-account auto check-in')
+	mode = parser.add_mutually_exclusive_group()
+	mode.add_argument(
+		'--daemon',
+		action='store_true',
+		help='stay resident and run check-in cycles on the CHECKIN_SCHEDULE cron schedule',
+	)
+	mode.add_argument(
+		'--shard',
+		type=shard_argument,
+		metavar='i/N',
+		help='only check in accounts of shard i out of N and write results to SHARD_RESULTS_DIR (default shard_results/)',
+	)
+	mode.add_argument(
+		'--merge',
+		action='store_true',
+		help='merge shard results of SHARD_RUN_ID in SHARD_RESULTS_DIR, compare balances and send one notification',
+	)
+	args = parser.parse_args()
+	setup_logging()
+
+	if args.merge:
+		started_at = time.perf_counter()
+		exit_code = asyncio.run(merge_shards())
+		export_metrics(started_at)
+		sys.exit(exit_code)
+
 	try:
-		asyncio.run(main())
+		asyncio.run(run_daemon() if args.daemon else main(args.shard))
 	except KeyboardInterrupt:
-		print('\n[WARNING] Program interrupted by user')
+		logger.warning('Program interrupted by user')
 		sys.exit(1)
 	except Exception as e:
-		print(f'\n[FAILED] Error occurred during program execution: {e}')
+		logger.error(f'Error occurred during program execution: {e}')
 		sys.exit(1)
 
 
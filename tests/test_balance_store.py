@@ -0,0 +1,38 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.balance_store import BalanceStore
+
+
+def test_balance_store_latest_per_account(tmp_path):
+	"""每个账号返回最近一次运行的记录"""
+	path = str(tmp_path / 'balance_history.db')
+	store = BalanceStore(path)
+	assert store.latest() == {}
+
+	store.append_run([('anyrouter', '1', 25.0, 1.0), ('agentrouter', '1', 10.0, 0.0)], timestamp=100)
+	store.append_run([('anyrouter', '1', 24.5, 1.5)], timestamp=200)
+	store.close()
+
+	store = BalanceStore(path)
+	latest = store.latest()
+	assert latest[('anyrouter', '1')] == {'quota': 24.5, 'used_quota': 1.5, 'ts': 200}
+	assert latest[('agentrouter', '1')] == {'quota': 10.0, 'used_quota': 0.0, 'ts': 100}
+	assert [row['quota'] for row in store.history('anyrouter', '1')] == [24.5, 25.0]
+	store.close()
+
+	with sqlite3.connect(path) as conn:
+		assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_balance_store_empty_run_writes_nothing(tmp_path):
+	"""没有余额记录时不写入"""
+	store = BalanceStore(str(tmp_path / 'balance_history.db'))
+	store.append_run([])
+	assert store.latest() == {}
+	store.close()
@@ -0,0 +1,115 @@
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.browser import LoadBaseline, PageTrafficStats, describe_load, enable_lean_mode, wait_for_cookies
+
+
+def make_route(url: str, resource_type: str):
+	route = MagicMock()
+	route.request.url = url
+	route.request.resource_type = resource_type
+	route.abort = AsyncMock()
+	route.continue_ = AsyncMock()
+	return route
+
+
+def test_lean_mode_blocks_non_essential_resources():
+	"""精简模式只放行同站点的文档与脚本请求"""
+	page = MagicMock()
+	page.route = AsyncMock()
+	stats = PageTrafficStats()
+
+	routes = {
+		'document': make_route('https://anyrouter.top/login', 'document'),
+		'script': make_route('https://anyrouter.top/assets/index.js', 'script'),
+		'image': make_route('https://anyrouter.top/logo.png', 'image'),
+		'font': make_route('https://anyrouter.top/font.woff2', 'font'),
+		'third_party': make_route('https://www.googletagmanager.com/gtag/js', 'script'),
+	}
+
+	async def run():
+		await enable_lean_mode(page, 'https://anyrouter.top/login', stats)
+		handler = page.route.call_args.args[1]
+		for route in routes.values():
+			await handler(route)
+
+	asyncio.run(run())
+
+	assert routes['document'].continue_.called
+	assert routes['script'].continue_.called
+	assert all(routes[name].abort.called for name in ('image', 'font', 'third_party'))
+	assert stats.blocked == 3
+
+
+class FakePage:
+	"""按调用次数逐步返回 cookies 的假页面"""
+
+	def __init__(self, snapshots: list[list[dict]]):
+		self.snapshots = snapshots
+		self.listeners = {}
+		self.context = MagicMock()
+		self.context.cookies = AsyncMock(side_effect=self._cookies)
+
+	async def _cookies(self):
+		return self.snapshots.pop(0) if len(self.snapshots) > 1 else self.snapshots[0]
+
+	def on(self, event, callback):
+		self.listeners.setdefault(event, []).append(callback)
+
+	def remove_listener(self, event, callback):
+		self.listeners[event].remove(callback)
+
+
+def test_wait_for_cookies_returns_when_all_present():
+	"""所有 cookies 出现后立即返回，不等待超时"""
+	page = FakePage(
+		[
+			[{'name': 'acw_tc', 'value': 'tc', 'expires': -1}],
+			[{'name': 'acw_tc', 'value': 'tc', 'expires': -1}, {'name': 'acw_sc__v2', 'value': 'v2', 'expires': 10}],
+		]
+	)
+
+	async def run():
+		loop = asyncio.get_running_loop()
+		started = loop.time()
+		result = await wait_for_cookies(page, ['acw_tc', 'acw_sc__v2'], timeout=10)
+		return result, loop.time() - started
+
+	(cookies, missing), elapsed = asyncio.run(run())
+
+	assert missing == []
+	assert cookies['acw_sc__v2'] == {'value': 'v2', 'expires': 10}
+	assert elapsed < 1
+	assert all(not callbacks for callbacks in page.listeners.values())
+
+
+def test_wait_for_cookies_reports_missing_on_timeout():
+	page = FakePage([[{'name': 'acw_tc', 'value': 'tc', 'expires': -1}]])
+
+	cookies, missing = asyncio.run(wait_for_cookies(page, ['acw_tc', 'cdn_sec_tc'], timeout=0.3))
+
+	assert list(cookies) == ['acw_tc']
+	assert missing == ['cdn_sec_tc']
+
+
+def test_lean_mode_savings_are_measured_against_full_load_baseline(tmp_path):
+	"""精简模式的节省量与完整页面加载的基线对比，没有基线时不报告节省量"""
+	stats = PageTrafficStats()
+	stats.blocked = 12
+	baseline = LoadBaseline(str(tmp_path / 'waf_load_baseline.json'))
+
+	description, savings = describe_load(True, stats, 100 * 1024, 1.0, baseline.get('anyrouter.top'))
+	assert 'blocked 12 request(s)' in description and 'WAF_LEAN_MODE=false' in description
+	assert savings == {}
+
+	baseline.record('anyrouter.top', 900 * 1024, 3.5)
+	reloaded = LoadBaseline(str(tmp_path / 'waf_load_baseline.json'))
+	description, savings = describe_load(True, stats, 100 * 1024, 1.0, reloaded.get('anyrouter.top'))
+	assert 'saved 800.0 KB and 2.50s' in description
+	assert savings == {'saved_bytes': 800 * 1024, 'saved_seconds': 2.5}
@@ -0,0 +1,80 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.channel_limits import CHANNEL_LIMITS, ChannelLimits, TokenBucket, split_for_channel, split_message
+
+
+def account_lines(count: int) -> str:
+	return '\n'.join(
+		f'[BALANCE] Account {i}\n:money: Current balance: $12.34, Used: $5.67, Change: $+0.50' for i in range(count)
+	)
+
+
+def test_short_message_is_not_split():
+	limits = CHANNEL_LIMITS['Telegram']
+	assert split_for_channel(limits, 'AnyRouter Check-in Alert', 'short') == [('AnyRouter Check-in Alert', 'short')]
+
+
+def test_split_at_account_boundaries():
+	content = '[TIME] Execution time: 2026-01-01 00:00:00\n\n' + account_lines(300)
+	limits = CHANNEL_LIMITS['Telegram']
+	parts = split_for_channel(limits, 'Title', content)
+
+	assert len(parts) > 1
+	for i, (title, chunk) in enumerate(parts, 1):
+		assert title == f'Title ({i}/{len(parts)})'
+		assert len(title) + len(chunk) <= limits.max_size
+		# 每段都从完整的账号（或时间行）开始
+		assert chunk.startswith('[TIME]') or chunk.startswith('[BALANCE]')
+
+	# 拆分不丢失任何账号
+	joined = '\n'.join(chunk for _, chunk in parts)
+	assert all(f'Account {i}\n' in joined for i in range(300))
+
+
+def test_byte_limit_with_chinese_text():
+	content = '\n'.join(f'[FAIL] 账号{i} 签到失败：服务器返回错误' for i in range(200))
+	limits = ChannelLimits(max_size=2048, size_unit='bytes')
+	parts = split_for_channel(limits, '签到提醒', content)
+
+	assert len(parts) > 1
+	for title, chunk in parts:
+		assert len(title.encode('utf-8')) + len(chunk.encode('utf-8')) <= limits.max_size
+
+
+def test_oversized_single_line_is_cut():
+	content = '[FAIL] ' + '错' * 3000
+	chunks = split_message(content, 1000, lambda text: len(text.encode('utf-8')))
+
+	assert len(chunks) > 1
+	assert ''.join(chunks) == content
+	assert all(len(chunk.encode('utf-8')) <= 1000 for chunk in chunks)
+
+
+def test_token_bucket_paces_after_burst():
+	async def acquire_all():
+		bucket = TokenBucket(rate=20, capacity=2)
+		start = time.monotonic()
+		for _ in range(4):
+			await bucket.acquire()
+		return time.monotonic() - start
+
+	# 前 2 个令牌立即可用，其余 2 个每个需要等待 0.05 秒
+	elapsed = asyncio.run(acquire_all())
+	assert 0.08 <= elapsed < 0.5
+
+
+def test_parts_fit_after_channel_wrapper_and_suffix():
+	"""分段数达到三位数时，加上 Telegram 的标题格式与最长编号后缀仍不超过限制"""
+	content = '\n'.join(f'[FAIL] {i}' for i in range(60000))
+	limits = CHANNEL_LIMITS['Telegram']
+	parts = split_for_channel(limits, 'AnyRouter Check-in Alert', content)
+
+	assert len(parts) >= 100
+	assert all(limits.measure(limits.wrap(title, chunk)) <= limits.max_size for title, chunk in parts)
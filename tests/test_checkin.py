@@ -0,0 +1,457 @@
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import httpx
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import checkin
+from utils.config import AccountConfig, AppConfig, ProviderConfig
+from utils.http_client import HttpClientPool
+from utils.ledger import CheckInLedger
+
+
+def make_accounts(count: int) -> list[AccountConfig]:
+	return [AccountConfig(cookies={'session': f's{i}'}, api_user=str(i), name=f'Account {i + 1}') for i in range(count)]
+
+
+def test_run_accounts_keeps_account_order():
+	"""并发执行时结果顺序与完成顺序无关"""
+	accounts = make_accounts(5)
+	app_config = AppConfig(providers={}, concurrency=3)
+	in_flight = 0
+	max_in_flight = 0
+
+	async def fake_check_in(account, index, config):
+		nonlocal in_flight, max_in_flight
+		in_flight += 1
+		max_in_flight = max(max_in_flight, in_flight)
+		# 越靠前的账号完成得越晚
+		await asyncio.sleep(0.01 * (len(accounts) - index))
+		in_flight -= 1
+		if index == 2:
+			raise RuntimeError('boom')
+		return index % 2 == 0, {'success': True, 'quota': float(index), 'used_quota': 0.0}
+
+	with patch('checkin.check_in_account', side_effect=fake_check_in):
+		results = asyncio.run(checkin.run_accounts(accounts, app_config))
+
+	assert max_in_flight == 3
+	assert [r['success'] for r in results] == [True, False, False, False, True]
+	assert [r['user_info'] and r['user_info']['quota'] for r in results] == [0.0, 1.0, None, 3.0, 4.0]
+	assert isinstance(results[2]['exception'], RuntimeError)
+
+
+def test_request_account_isolates_cookies_on_shared_client():
+	"""共享连接池的账号之间 cookies 互不影响"""
+	seen = []
+
+	def handler(request: httpx.Request) -> httpx.Response:
+		seen.append((request.url.path, request.headers.get('cookie'), request.headers.get('new-api-user')))
+		return httpx.Response(
+			200,
+			json={'success': True, 'data': {'quota': 500000, 'used_quota': 0}},
+			headers={'set-cookie': 'session=leaked; Path=/'},
+		)
+
+	provider = ProviderConfig(name='custom', domain='https://custom.example.com')
+	pool = HttpClientPool(transport=httpx.MockTransport(handler))
+
+	async def run():
+		try:
+			return await asyncio.gather(
+				*(
+					checkin.request_account(account, f'Account {i + 1}', provider, {'session': f's{i}'})
+					for i, account in enumerate(make_accounts(2))
+				)
+			)
+		finally:
+			await pool.aclose()
+
+	with patch('checkin.http_client_pool', pool):
+		results = asyncio.run(run())
+
+	assert [success for success, _ in results] == [True, True]
+	assert sorted(seen) == [('/api/user/self', 'session=s0', '0'), ('/api/user/self', 'session=s1', '1')]
+
+
+def test_request_account_skips_check_in_recorded_in_ledger(tmp_path):
+	"""同一签到周期内已签到的账号只读取余额，不再发送签到请求"""
+	paths = []
+
+	def handler(request: httpx.Request) -> httpx.Response:
+		paths.append(request.url.path)
+		return httpx.Response(200, json={'success': True, 'data': {'quota': 500000, 'used_quota': 0}})
+
+	provider = ProviderConfig(
+		name='anyrouter',
+		domain='https://anyrouter.example.com',
+		bypass_method='waf_cookies',
+		waf_cookie_names=['acw_tc'],
+	)
+	account = make_accounts(1)[0]
+	ledger = CheckInLedger(str(tmp_path / 'checkin_ledger.json'))
+
+	async def prepare_cookies(account_name, provider_config, user_cookies):
+		return user_cookies
+
+	async def run():
+		try:
+			return await checkin.request_account(account, 'Account 1', provider, {'session': 's0'})
+		finally:
+			await checkin.http_client_pool.aclose()
+
+	with (
+		patch('checkin.http_client_pool', HttpClientPool(transport=httpx.MockTransport(handler))),
+		patch('checkin.check_in_ledger', ledger),
+		patch('checkin.prepare_cookies', side_effect=prepare_cookies),
+	):
+		assert asyncio.run(run())[0] is True
+		assert paths == ['/api/user/self', '/api/user/sign_in']
+		assert ledger.checked_in_at(account.key) is not None
+
+		paths.clear()
+		success, user_info = asyncio.run(run())
+
+	assert success is True and user_info['quota'] == 1.0
+	assert paths == ['/api/user/self']
+
+
+def test_check_in_retry_after_timeout_treats_already_checked_in_as_success(tmp_path):
+	"""首次签到在服务端成功但客户端超时，重试收到“已签到”回复时仍视为签到成功"""
+	sign_in_attempts = 0
+
+	def handler(request: httpx.Request) -> httpx.Response:
+		nonlocal sign_in_attempts
+		if request.url.path == '/api/user/sign_in':
+			sign_in_attempts += 1
+			if sign_in_attempts == 1:
+				raise httpx.ReadTimeout('timed out', request=request)
+			return httpx.Response(200, json={'success': False, 'message': '今天已经签到过了'})
+		return httpx.Response(200, json={'success': True, 'data': {'quota': 500000, 'used_quota': 0}})
+
+	provider = ProviderConfig(
+		name='anyrouter',
+		domain='https://anyrouter.example.com',
+		bypass_method='waf_cookies',
+		waf_cookie_names=['acw_tc'],
+	)
+	account = make_accounts(1)[0]
+	ledger = CheckInLedger(str(tmp_path / 'checkin_ledger.json'))
+
+	async def prepare_cookies(account_name, provider_config, user_cookies):
+		return user_cookies
+
+	async def run():
+		try:
+			return await checkin.request_account(account, 'Account 1', provider, {'session': 's0'})
+		finally:
+			await checkin.http_client_pool.aclose()
+
+	with (
+		patch('checkin.http_client_pool', HttpClientPool(transport=httpx.MockTransport(handler))),
+		patch('checkin.check_in_ledger', ledger),
+		patch('checkin.prepare_cookies', side_effect=prepare_cookies),
+		patch('checkin.retry_budget', checkin.RetryBudget(10)),
+		patch('utils.retry.asyncio.sleep'),
+	):
+		success, _ = asyncio.run(run())
+
+	assert success is True
+	assert sign_in_attempts == 2
+	assert ledger.checked_in_at(account.key) is not None
+
+
+def test_is_balance_changed_per_account():
+	"""余额变化或新增的账号视为有变化"""
+	last = {('anyrouter', '0'): {'quota': 10.0}, ('anyrouter', '1'): {'quota': 6.0}}
+
+	assert not checkin.is_balance_changed(('anyrouter', '0'), 10.0, last)
+	assert checkin.is_balance_changed(('anyrouter', '1'), 5.0, last)
+	assert checkin.is_balance_changed(('anyrouter', '2'), 1.0, last)
+
+
+def test_main_notifies_only_changed_accounts(tmp_path, monkeypatch):
+	"""余额变化时通知中只包含变化的账号"""
+	monkeypatch.chdir(tmp_path)
+	accounts = make_accounts(3)
+	quotas = [10.0, 5.0, 1.0]
+
+	async def fake_run_accounts(accounts, app_config, run_report=None, on_result=None):
+		for i, account in enumerate(accounts):
+			user_info = {'success': True, 'quota': quotas[i], 'used_quota': 0.0}
+			on_result(i, account, {'success': True, 'user_info': user_info, 'exception': None})
+
+	def run_main():
+		with (
+			patch('checkin.load_accounts_config', return_value=accounts),
+			patch('checkin.run_accounts', side_effect=fake_run_accounts),
+			patch('checkin.notify.apush_message') as push_message,
+		):
+			try:
+				asyncio.run(checkin.main())
+			except SystemExit:
+				pass
+		return push_message
+
+	# 首次运行：所有账号都加入通知
+	push_message = run_main()
+	content = push_message.call_args.args[1].text
+	assert all(f'[BALANCE] Account {i + 1}' in content for i in range(3))
+
+	# 没有变化：不发送通知
+	assert not run_main().called
+
+	# 只有第二个账号变化
+	quotas[1] = 4.5
+	content = run_main().call_args.args[1].text
+	assert '[BALANCE] Account 2' in content and 'Change: $-0.5' in content
+	assert 'Account 1' not in content and 'Account 3' not in content
+
+
+def test_cycle_clears_balances_of_removed_accounts(tmp_path, monkeypatch):
+	"""每个周期重新导出余额，已从配置中移除的账号不再保留上一个周期的余额"""
+	monkeypatch.chdir(tmp_path)
+	checkin.account_quota.set(1.0, provider='anyrouter', api_user='removed', account='Removed')
+
+	async def fake_check_in(account, index, config):
+		return True, {'success': True, 'quota': 2.0, 'used_quota': 0.0, 'display': ''}
+
+	with (
+		patch('checkin.load_accounts_config', return_value=make_accounts(1)),
+		patch('checkin.check_in_account', side_effect=fake_check_in),
+		patch('checkin.notify.apush_message'),
+	):
+		asyncio.run(checkin.run_cycle())
+
+	assert checkin.account_quota.snapshot() == {('anyrouter', '0', 'Account 1'): 2.0}
+
+
+def test_reload_env_unsets_keys_removed_from_dotenv(monkeypatch):
+	"""从 .env 中删除的键在重新加载后不再生效，进程启动时已有的环境变量不受影响"""
+	monkeypatch.setattr(checkin, 'DOTENV_KEYS', set())
+	monkeypatch.setattr(checkin, 'PROCESS_ENV_KEYS', frozenset({'PROCESS_ONLY'}))
+	monkeypatch.setenv('PROCESS_ONLY', 'process')
+	monkeypatch.delenv('DINGDING_WEBHOOK', raising=False)
+	monkeypatch.delenv('WAF_COOKIE_TTL', raising=False)
+
+	with patch('checkin.dotenv_values', return_value={'DINGDING_WEBHOOK': 'https://ding', 'PROCESS_ONLY': 'dotenv'}):
+		checkin.reload_env()
+	assert os.environ['DINGDING_WEBHOOK'] == 'https://ding'
+	assert os.environ['PROCESS_ONLY'] == 'process'
+
+	with patch('checkin.dotenv_values', return_value={'WAF_COOKIE_TTL': '60'}):
+		checkin.reload_env()
+	assert 'DINGDING_WEBHOOK' not in os.environ
+	assert checkin.notify.dingding_webhook is None
+	assert checkin.waf_cookie_cache.default_ttl == 60
+
+	monkeypatch.delenv('WAF_COOKIE_TTL')
+	with patch('checkin.dotenv_values', return_value={}):
+		checkin.reload_env()
+	assert checkin.waf_cookie_cache.default_ttl == checkin.load_waf_cookie_ttl()
+
+
+def test_daemon_runs_cycles_until_stopped():
+	"""常驻模式按计划执行周期，收到停止信号后关闭共享资源"""
+	cycles = []
+	stop_signals = []
+
+	class ImmediateSchedule:
+		expression = '* * * * *'
+
+		def next_after(self, dt):
+			return dt
+
+	async def fake_run_cycle():
+		cycles.append(len(cycles))
+		if len(cycles) == 2:
+			stop_signals[0].trigger()
+		return 0
+
+	original_init = checkin.StopSignal.__init__
+
+	def capture_init(self):
+		original_init(self)
+		stop_signals.append(self)
+
+	with (
+		patch('checkin.StopSignal.__init__', capture_init),
+		patch('checkin.StopSignal.install'),
+		patch('checkin.load_schedule', return_value=ImmediateSchedule()),
+		patch('checkin.reload_env') as reload_env,
+		patch('checkin.run_cycle', side_effect=fake_run_cycle),
+		patch('checkin.close_shared_resources') as close_shared_resources,
+	):
+		asyncio.run(checkin.run_daemon())
+
+	assert cycles == [0, 1]
+	assert reload_env.call_count == 2
+	close_shared_resources.assert_awaited_once()
+
+
+def test_shards_merge_into_one_notification(tmp_path, monkeypatch):
+	"""各分片只写结果文件，合并步骤统一比较余额并发送一次通知"""
+	monkeypatch.chdir(tmp_path)
+	accounts = make_accounts(6)
+
+	async def fake_check_in(account, index, config):
+		if index == 4:
+			return False, {'success': False, 'error': 'HTTP 500'}
+		return True, {'success': True, 'quota': float(index), 'used_quota': 0.0, 'display': ''}
+
+	with (
+		patch('checkin.load_accounts_config', return_value=accounts),
+		patch('checkin.check_in_account', side_effect=fake_check_in),
+		patch('checkin.notify.apush_message') as push_message,
+	):
+		for shard_index in (1, 2):
+			asyncio.run(checkin.run_cycle((shard_index, 2)))
+		assert not push_message.called
+
+		# 合并步骤在独立的进程中运行，不继承分片运行的指标
+		checkin.registry.clear()
+		assert asyncio.run(checkin.merge_shards()) == 0
+		assert checkin.checkins_total.snapshot() == {('anyrouter', 'success'): 5, ('anyrouter', 'failed'): 1}
+		assert len(checkin.account_quota.snapshot()) == 5
+		# 合并成功后删除分片文件，复用的结果目录中不会再次合并
+		assert asyncio.run(checkin.merge_shards()) == 1
+
+	assert push_message.call_count == 1
+	content = push_message.call_args.args[1].text
+	assert '[FAIL] Account 5' in content and 'HTTP 500' in content
+	assert [line.split()[1] for line in content.split('\n') if line.startswith('[BALANCE]')] == ['Account'] * 5
+	assert content.index('Account 1') < content.index('Account 2') < content.index('Account 6')
+	assert 'Success: 5/6' in content
+
+
+def test_merge_reports_missing_shards(tmp_path, monkeypatch):
+	"""缺失的分片会出现在通知中"""
+	monkeypatch.chdir(tmp_path)
+	writer = checkin.ShardResultWriter('shard_results', 2, 2, checkin.load_shard_run_id())
+	writer.close()
+	# 之前运行遗留的分片不会被当作本次运行的结果
+	checkin.ShardResultWriter('shard_results', 1, 2, 'previous-run').close()
+
+	with patch('checkin.notify.apush_message') as push_message:
+		assert asyncio.run(checkin.merge_shards()) == 1
+
+	assert '[FAIL] Shard 1/2 results missing' in push_message.call_args.args[1].text
+
+
+def test_warm_waf_cookies_acquires_once_per_provider():
+	"""进程池启动前每个需要 WAF cookies 的 provider 只获取一次"""
+	waf_provider = ProviderConfig(
+		name='waf', domain='https://waf.example.com', bypass_method='waf_cookies', waf_cookie_names=['acw_tc']
+	)
+	plain_provider = ProviderConfig(name='plain', domain='https://plain.example.com')
+	app_config = AppConfig(providers={'waf': waf_provider, 'plain': plain_provider})
+	accounts = [
+		AccountConfig(cookies={'session': f's{i}'}, api_user=str(i), provider='waf' if i % 2 else 'plain')
+		for i in range(6)
+	]
+
+	with (
+		patch.object(checkin.waf_cookie_manager, 'get', return_value={'acw_tc': 'x'}) as get,
+		patch.object(checkin.browser_manager, 'close') as close,
+	):
+		asyncio.run(checkin.warm_waf_cookies(accounts, app_config))
+
+	assert get.await_count == 1
+	assert get.call_args.args[1] is waf_provider
+	close.assert_awaited_once()
+
+
+def test_reused_worker_reports_only_its_own_shard_metrics(tmp_path, monkeypatch):
+	"""同一个 worker 进程先后处理两个分片时，每个分片回传的指标快照互不累加"""
+	monkeypatch.chdir(tmp_path)
+	accounts = make_accounts(20)
+	app_config = AppConfig(providers={}, concurrency=5)
+
+	async def fake_check_in(account, index, config):
+		return True, {'success': True, 'quota': 1.0, 'used_quota': 0.0}
+
+	with patch('checkin.check_in_account', side_effect=fake_check_in):
+		counts = [
+			asyncio.run(checkin.run_process_shard(accounts, app_config, shard_index, 2, 0))['metrics'][
+				'anyrouter_checkins_total'
+			][('anyrouter', 'success')]
+			for shard_index in (1, 2)
+		]
+
+	assert sum(counts) == 20
+	checkin.registry.clear()
+
+
+def test_process_pool_mode_survives_failed_worker(tmp_path, monkeypatch):
+	"""一个进程失败时记录错误，其余分片的结果照常汇总、保存账本并发送通知"""
+	from concurrent.futures import ThreadPoolExecutor
+	from concurrent.futures.process import BrokenProcessPool
+
+	monkeypatch.chdir(tmp_path)
+	monkeypatch.setenv('ANYROUTER_ACCOUNTS', json.dumps([{'cookies': {'session': 's0'}, 'api_user': '0'}]))
+	monkeypatch.setenv('CHECKIN_PROCESSES', '2')
+
+	class Pool(ThreadPoolExecutor):
+		def __init__(self, max_workers, mp_context):
+			super().__init__(max_workers)
+
+	def worker(accounts, app_config, shard_index, shard_count, budget):
+		if shard_index == 2:
+			raise BrokenProcessPool('A process in the process pool was terminated abruptly')
+		record = checkin.AccountResult(
+			index=0, name='Account 1', provider='anyrouter', api_user='0', success=True, quota=1.0, used_quota=0.0
+		)
+		return {'records': [record], 'ledger_updates': {'entry': {}}, 'retries_used': 0, 'metrics': {}}
+
+	with (
+		patch('checkin.ProcessPoolExecutor', Pool),
+		patch('checkin.process_worker', worker),
+		patch('checkin.warm_waf_cookies', new_callable=AsyncMock),
+		patch.object(checkin.check_in_ledger, 'save') as save_ledger,
+		patch('checkin.notify.apush_message') as push_message,
+	):
+		assert asyncio.run(checkin.run_cycle()) == 0
+
+	save_ledger.assert_called_once()
+	run_result = push_message.call_args.args[1]
+	assert run_result.success_count == 1
+	assert run_result.errors == ['Process shard 2/2 failed: A process in the process pool was terminated abrup']
+
+
+def test_process_pool_mode_aggregates_in_parent(tmp_path, monkeypatch):
+	"""进程池模式下各进程独立签到，结果回传父进程统一汇总"""
+	from benchmarks.fake_newapi import FakeNewApiServer, provider_config
+
+	server = FakeNewApiServer()
+	domain = server.start()
+	accounts = [
+		{'name': f'Account {i + 1}', 'provider': 'fake', 'cookies': {'session': f's{i}'}, 'api_user': str(i)}
+		for i in range(6)
+	]
+	monkeypatch.chdir(tmp_path)
+	monkeypatch.setenv('PROVIDERS', json.dumps({'fake': provider_config(domain, waf=False)}))
+	monkeypatch.setenv('ANYROUTER_ACCOUNTS', json.dumps(accounts))
+	monkeypatch.setenv('CHECKIN_PROCESSES', '2')
+	monkeypatch.setenv('PYTHONPATH', str(project_root))
+
+	try:
+		with patch('checkin.notify.apush_message') as push_message:
+			assert asyncio.run(checkin.run_cycle()) == 0
+	finally:
+		server.stop()
+
+	assert server.stats.requests['/api/user/self'] == 6
+	content = push_message.call_args.args[1].text
+	assert 'Success: 6/6' in content
+	assert [line for line in content.split('\n') if line.startswith('[BALANCE]')] == [
+		f'[BALANCE] Account {i + 1}' for i in range(6)
+	]
+	report = json.loads((tmp_path / 'run_report.json').read_text(encoding='utf-8'))
+	assert report['account_count'] == 6
@@ -0,0 +1,68 @@
+import gzip
+import json
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.config import AccountsFile, load_accounts_config
+
+
+def write_lines(path: Path, lines: list[str], compress: bool = False):
+	content = '\n'.join(lines) + '\n'
+	if compress:
+		with gzip.open(path, 'wt', encoding='utf-8') as f:
+			f.write(content)
+	else:
+		path.write_text(content, encoding='utf-8')
+
+
+def test_accounts_file_streams_gzip(tmp_path, monkeypatch):
+	"""gzip 压缩的 JSON Lines 账号文件按行流式解析，空行被忽略"""
+	path = tmp_path / 'accounts.jsonl.gz'
+	write_lines(
+		path,
+		[
+			json.dumps({'cookies': {'session': 'a'}, 'api_user': '1'}),
+			'',
+			json.dumps({'cookies': 'session=b', 'api_user': '2', 'provider': 'agentrouter', 'name': 'B'}),
+		],
+		compress=True,
+	)
+	monkeypatch.setenv('ANYROUTER_ACCOUNTS_FILE', str(path))
+
+	accounts = load_accounts_config()
+	assert isinstance(accounts, AccountsFile)
+	assert len(accounts) == 2
+
+	iterator = iter(accounts)
+	first = next(iterator)
+	assert (first.api_user, first.get_display_name(0)) == ('1', 'Account 1')
+	second = next(iterator)
+	assert (second.key, second.get_display_name(1)) == ('agentrouter:2', 'B')
+
+
+def test_accounts_file_reports_all_errors(tmp_path, monkeypatch, caplog):
+	"""校验时报告所有错误行的行号，而不是在第一个错误处停止"""
+	path = tmp_path / 'accounts.jsonl'
+	write_lines(
+		path,
+		[
+			json.dumps({'cookies': {'session': 'a'}, 'api_user': '1'}),
+			'{not json',
+			json.dumps({'cookies': {'session': 'c'}}),
+			json.dumps(['not', 'an', 'object']),
+			json.dumps({'cookies': {'session': 'e'}, 'api_user': '5', 'name': ''}),
+		],
+	)
+	monkeypatch.setenv('ANYROUTER_ACCOUNTS_FILE', str(path))
+
+	assert load_accounts_config() is None
+	output = caplog.text
+	assert 'has 4 invalid line(s)' in output
+	assert 'line 2: invalid JSON' in output
+	assert 'line 3: Account 2 missing required fields' in output
+	assert 'line 4: Account 3 configuration format is incorrect' in output
+	assert 'line 5: Account 4 name field cannot be empty' in output
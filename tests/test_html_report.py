@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.html_report import CompiledTemplate, compiled_templates, format_run_html
+from utils.result import AccountResult, RunResult
+
+
+def make_run(count: int, changed: int = 2, failed: int = 1) -> RunResult:
+	accounts = [
+		AccountResult(i, f'Account {i + 1}', 'anyrouter', str(i), True, quota=10.0, used_quota=1.0)
+		for i in range(count)
+	]
+	for account in accounts[:changed]:
+		account.change = 0.5
+	failures = [
+		AccountResult(count + i, f'Broken <{i}>', 'anyrouter', 'x', False, error='HTTP 500') for i in range(failed)
+	]
+	return RunResult('2026-01-01 08:00:00', count + failed, count, failures=failures, balances=accounts)
+
+
+def test_compiled_template_fills_slots():
+	template = CompiledTemplate('<p>{{a}} and {{b}}</p>')
+	assert template.render({'a': '1', 'b': '2'}) == '<p>1 and 2</p>'
+	# 静态外壳只编译一次
+	assert compiled_templates(True) is compiled_templates(True)
+
+
+def test_full_mode_renders_every_card():
+	html = format_run_html('Title', make_run(5), mode='full', max_bytes=0)
+	assert html.count('class="account-card"') == 6
+	assert 'Broken &lt;0&gt;' in html
+	assert '<table' not in html
+
+
+def test_compact_mode_collapses_unchanged_accounts():
+	html = format_run_html('Title', make_run(50), mode='compact', max_bytes=0)
+	# 失败账号与余额变化账号显示卡片，其余账号折叠到表格
+	assert html.count('class="account-card"') == 3
+	assert '其余 48 个账号' in html
+	assert html.count('<tr><td>') == 48
+	assert html.count('\n') == 0
+
+
+def test_size_cap_truncates_and_reports_omitted_accounts():
+	html = format_run_html('Title', make_run(5000), mode='full', max_bytes=20_000)
+	assert len(html.encode('utf-8')) <= 20_000
+	assert '其余 4998 个账号' in html
+	assert '个账号因邮件大小限制未显示' in html
+	assert '<div class="stat-value">5001</div>' in html
+
+
+def test_small_report_stays_in_full_mode_under_cap():
+	html = format_run_html('Title', make_run(3), mode='full', max_bytes=100_000)
+	assert html.count('class="account-card"') == 4
+	assert '因邮件大小限制' not in html
@@ -0,0 +1,52 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from datetime import time as dtime
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.ledger import CheckInLedger, load_reset_at, next_reset_after
+
+BEIJING = timezone(timedelta(hours=8))
+
+
+def test_next_reset_after_uses_configured_offset():
+	"""重置时间按配置的 UTC 偏移计算"""
+	reset_at = dtime.fromisoformat('00:00+08:00')
+	checked_in = datetime(2025, 1, 1, 23, 30, tzinfo=BEIJING).timestamp()
+	assert next_reset_after(checked_in, reset_at) == datetime(2025, 1, 2, 0, 0, tzinfo=BEIJING).timestamp()
+
+	# 恰好在重置时刻签到，下一次重置在第二天
+	checked_in = datetime(2025, 1, 2, 0, 0, tzinfo=BEIJING).timestamp()
+	assert next_reset_after(checked_in, reset_at) == datetime(2025, 1, 3, 0, 0, tzinfo=BEIJING).timestamp()
+
+
+def test_ledger_skips_until_reset(tmp_path, monkeypatch):
+	"""重置前视为已签到，重置后需要重新签到，且账本可跨运行持久化"""
+	monkeypatch.setenv('CHECKIN_RESET_AT', '08:00+00:00')
+	path = str(tmp_path / 'checkin_ledger.json')
+	checked_in = datetime(2025, 1, 1, 2, 0, tzinfo=timezone.utc).timestamp()
+	reset = datetime(2025, 1, 1, 8, 0, tzinfo=timezone.utc).timestamp()
+
+	ledger = CheckInLedger(path)
+	ledger.load()
+	assert ledger.checked_in_at('anyrouter:1', now=checked_in) is None
+	ledger.record('anyrouter:1', now=checked_in)
+	ledger.save()
+
+	ledger = CheckInLedger(path)
+	ledger.load()
+	assert ledger.checked_in_at('anyrouter:1', now=reset - 1) == checked_in
+	assert ledger.checked_in_at('anyrouter:1', now=reset) is None
+	assert ledger.checked_in_at('anyrouter:2', now=reset - 1) is None
+
+	monkeypatch.setenv('CHECKIN_LEDGER_MODE', 'off')
+	ledger.load()
+	assert ledger.checked_in_at('anyrouter:1', now=reset - 1) is None
+
+
+def test_load_reset_at_falls_back_on_invalid(monkeypatch):
+	monkeypatch.setenv('CHECKIN_RESET_AT', 'midnight')
+	assert load_reset_at() == dtime.fromisoformat('00:00+08:00')
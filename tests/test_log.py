@@ -0,0 +1,54 @@
+import json
+import logging
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.log import ConsoleFormatter, get_logger, log_context, setup_logging, shutdown_logging
+
+
+def make_record(level: int, message: str, **extra) -> logging.LogRecord:
+	record = logging.LogRecord('test', level, __file__, 1, message, None, None)
+	for key, value in extra.items():
+		setattr(record, key, value)
+	return record
+
+
+def test_console_formatter_keeps_tag_format():
+	formatter = ConsoleFormatter()
+	assert formatter.format(make_record(logging.INFO, 'Found 3 accounts')) == '[INFO] Found 3 accounts'
+	assert formatter.format(make_record(logging.ERROR, 'Account 1: failed')) == '[FAILED] Account 1: failed'
+	assert formatter.format(make_record(logging.INFO, 'ok', tag='SUCCESS')) == '[SUCCESS] ok'
+	# 空标签原样输出（多行通知内容）
+	assert formatter.format(make_record(logging.INFO, '[TIME] 2026', tag='')) == '[TIME] 2026'
+
+
+def test_json_log_file_carries_account_context(tmp_path, monkeypatch):
+	log_file = tmp_path / 'run.jsonl'
+	monkeypatch.setenv('LOG_FILE', str(log_file))
+	monkeypatch.setenv('LOG_LEVEL', 'DEBUG')
+	logger = get_logger('utils.test')
+
+	root = logging.getLogger()
+	original_level, original_handlers = root.level, list(root.handlers)
+	setup_logging()
+	try:
+		token = log_context.set({'account': 'Account 1', 'provider': 'anyrouter'})
+		try:
+			logger.info('Account 1: Check-in successful!', tag='SUCCESS', phase='sign_in', duration=0.25)
+		finally:
+			log_context.reset(token)
+		logger.warning('outside any account')
+	finally:
+		shutdown_logging()
+		root.handlers[:] = original_handlers
+		root.setLevel(original_level)
+
+	records = [json.loads(line) for line in log_file.read_text(encoding='utf-8').splitlines()]
+	assert records[0]['tag'] == 'SUCCESS' and records[0]['level'] == 'info'
+	assert records[0]['account'] == 'Account 1' and records[0]['provider'] == 'anyrouter'
+	assert records[0]['phase'] == 'sign_in' and records[0]['duration'] == 0.25
+	assert records[1]['tag'] == 'WARNING' and 'account' not in records[1]
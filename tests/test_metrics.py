@@ -0,0 +1,114 @@
+import asyncio
+import sys
+import urllib.request
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.config import ProviderConfig
+from utils.metrics import Counter, Gauge, Histogram, MetricsServer, Registry, registry
+from utils.waf import WafCookieManager
+
+
+def make_registry():
+	test_registry = Registry()
+	counter = test_registry.register(Counter('test_total', 'Test counter.', ('provider', 'outcome')))
+	gauge = test_registry.register(Gauge('test_quota', 'Test gauge.', ('account',)))
+	histogram = test_registry.register(Histogram('test_seconds', 'Test histogram.', ('endpoint',), buckets=(0.1, 1.0)))
+	return test_registry, counter, gauge, histogram
+
+
+def test_render_text_exposition_format():
+	test_registry, counter, gauge, histogram = make_registry()
+	counter.inc(provider='anyrouter', outcome='success')
+	counter.inc(2, provider='anyrouter', outcome='success')
+	gauge.set(12.5, account='Account "1"')
+	histogram.observe(0.05, endpoint='/api/user/self')
+	histogram.observe(0.5, endpoint='/api/user/self')
+	histogram.observe(3, endpoint='/api/user/self')
+
+	lines = test_registry.render().splitlines()
+	assert '# HELP test_total Test counter.' in lines
+	assert '# TYPE test_total counter' in lines
+	assert 'test_total{provider="anyrouter",outcome="success"} 3' in lines
+	assert 'test_quota{account="Account \\"1\\""} 12.5' in lines
+	# 分桶计数是累积的
+	assert 'test_seconds_bucket{endpoint="/api/user/self",le="0.1"} 1' in lines
+	assert 'test_seconds_bucket{endpoint="/api/user/self",le="1"} 2' in lines
+	assert 'test_seconds_bucket{endpoint="/api/user/self",le="+Inf"} 3' in lines
+	assert 'test_seconds_sum{endpoint="/api/user/self"} 3.55' in lines
+	assert 'test_seconds_count{endpoint="/api/user/self"} 3' in lines
+
+
+def test_labels_must_match_declared_names():
+	_, counter, _, _ = make_registry()
+	try:
+		counter.inc(provider='anyrouter')
+	except ValueError as e:
+		assert 'test_total' in str(e)
+	else:
+		raise AssertionError('missing label should raise ValueError')
+
+
+def test_merge_snapshot_from_worker_process():
+	parent, counter, gauge, histogram = make_registry()
+	counter.inc(provider='anyrouter', outcome='success')
+	histogram.observe(0.5, endpoint='/sign_in')
+
+	worker, worker_counter, worker_gauge, worker_histogram = make_registry()
+	worker_counter.inc(provider='anyrouter', outcome='success')
+	worker_gauge.set(3, account='a')
+	worker_histogram.observe(2, endpoint='/sign_in')
+
+	parent.merge(worker.snapshot())
+	lines = parent.render().splitlines()
+	assert 'test_total{provider="anyrouter",outcome="success"} 2' in lines
+	assert 'test_quota{account="a"} 3' in lines
+	assert 'test_seconds_count{endpoint="/sign_in"} 2' in lines
+	assert 'test_seconds_bucket{endpoint="/sign_in",le="1"} 1' in lines
+
+
+def test_write_textfile_is_atomic(tmp_path):
+	test_registry, counter, _, _ = make_registry()
+	counter.inc(provider='anyrouter', outcome='failed')
+	path = tmp_path / 'anyrouter.prom'
+
+	test_registry.write_textfile(str(path))
+
+	assert 'test_total{provider="anyrouter",outcome="failed"} 1' in path.read_text(encoding='utf-8')
+	assert list(tmp_path.iterdir()) == [path]
+
+
+def test_metrics_endpoint_serves_registry():
+	server = MetricsServer(0)
+	server.start()
+	try:
+		with urllib.request.urlopen(f'http://127.0.0.1:{server.port}/metrics', timeout=5) as response:
+			body = response.read().decode('utf-8')
+			assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+	finally:
+		server.stop()
+
+	assert '# TYPE anyrouter_checkins_total counter' in body
+
+
+def test_waf_acquisition_metrics():
+	registry.clear()
+	provider = ProviderConfig(name='test', domain='https://metrics.example.com', waf_cookie_names=['acw_tc'])
+	acquire = AsyncMock(return_value={'acw_tc': {'value': 'v', 'expires': -1}})
+	manager = WafCookieManager(acquire)
+
+	async def run():
+		await manager.get('Account 1', provider)
+		await manager.get('Account 2', provider)
+
+	asyncio.run(run())
+
+	lines = registry.render().splitlines()
+	assert 'anyrouter_waf_acquisitions_total{domain="https://metrics.example.com",outcome="success"} 1' in lines
+	assert 'anyrouter_waf_acquisition_duration_seconds_count{domain="https://metrics.example.com"} 1' in lines
+	assert 'anyrouter_waf_cookie_lookups_total{result="miss"} 1' in lines
+	assert 'anyrouter_waf_cookie_lookups_total{result="shared"} 1' in lines
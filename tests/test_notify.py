@@ -1,9 +1,13 @@
+import asyncio
+import logging
 import os
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 from dotenv import load_dotenv
 
@@ -13,7 +17,9 @@ sys.path.insert(0, str(project_root))
 
 load_dotenv(project_root / '.env')
 
+from utils.channel_limits import ChannelLimits
 from utils.notify import NotificationKit
+from utils.smtp_transport import SmtpTransportCache
 
 
 @pytest.fixture
@@ -33,7 +39,7 @@ def test_real_notification():
 
 @patch('smtplib.SMTP_SSL')
 @patch('smtplib.SMTP')
-def test_send_email(mock_smtp, mock_smtp_ssl):
+def test_send_email(mock_smtp, mock_smtp_ssl, tmp_path):
 	# 设置环境变量以通过验证
 	os.environ['EMAIL_USER'] = 'test@example.com'
 	os.environ['EMAIL_PASS'] = 'password'
@@ -43,6 +49,7 @@ def test_send_email(mock_smtp, mock_smtp_ssl):
 	mock_smtp_ssl.return_value = mock_server
 
 	kit = NotificationKit()
+	kit.smtp_transports = SmtpTransportCache(str(tmp_path / 'smtp_transport.json'))
 	kit.send_email('测试标题', '测试内容')
 
 	# 验证 SMTP_SSL 被调用
@@ -53,6 +60,38 @@ def test_send_email(mock_smtp, mock_smtp_ssl):
 	assert mock_server.quit.called
 
 
+@patch('smtplib.SMTP_SSL')
+@patch('smtplib.SMTP')
+def test_send_email_remembers_transport_and_sends_once(mock_smtp, mock_smtp_ssl, tmp_path):
+	"""SMTP_SSL 失败后回退到 STARTTLS 并记住，多个收件人只登录一次"""
+	os.environ['EMAIL_USER'] = 'test@example.com'
+	os.environ['EMAIL_PASS'] = 'password'
+	os.environ['EMAIL_TO'] = 'a@example.com, b@example.com;a@example.com'
+
+	mock_smtp_ssl.side_effect = TimeoutError('timed out')
+	mock_server = MagicMock()
+	mock_server.send_message.return_value = {}
+	mock_smtp.return_value = mock_server
+
+	cache_path = str(tmp_path / 'smtp_transport.json')
+	kit = NotificationKit()
+	kit.smtp_transports = SmtpTransportCache(cache_path)
+	details = kit.send_email('测试标题', '测试内容')
+	os.environ['EMAIL_TO'] = 'to@example.com'
+
+	assert details.startswith('STARTTLS, connect ')
+	assert details.endswith('2/2 recipients')
+	mock_server.login.assert_called_once()
+	_, kwargs = mock_server.send_message.call_args
+	assert kwargs['to_addrs'] == ['a@example.com', 'b@example.com']
+
+	# 下一次运行（新的缓存实例）直接使用 STARTTLS，不再尝试 465
+	mock_smtp_ssl.reset_mock()
+	kit.smtp_transports = SmtpTransportCache(cache_path)
+	kit.send_email('测试标题', '测试内容')
+	assert not mock_smtp_ssl.called
+
+
 @patch('httpx.Client')
 def test_send_pushplus(mock_client_class):
 	os.environ['PUSHPLUS_TOKEN'] = 'test_token'
@@ -147,16 +186,18 @@ def test_missing_config():
 		kit.send_pushplus('测试', '测试')
 
 
+@patch('httpx.AsyncClient.post', new_callable=AsyncMock)
 @patch('utils.notify.NotificationKit.send_email')
-@patch('utils.notify.NotificationKit.send_dingtalk')
-@patch('utils.notify.NotificationKit.send_wecom')
-@patch('utils.notify.NotificationKit.send_pushplus')
-@patch('utils.notify.NotificationKit.send_feishu')
-@patch('utils.notify.NotificationKit.send_gotify')
-def test_push_message(mock_gotify, mock_feishu, mock_pushplus, mock_wecom, mock_dingtalk, mock_email):
+@patch('utils.notify.NotificationKit.dingtalk_request', return_value=('https://dingtalk.example.com', {}))
+@patch('utils.notify.NotificationKit.wecom_request', return_value=('https://wecom.example.com', {}))
+@patch('utils.notify.NotificationKit.pushplus_request', return_value=('https://pushplus.example.com', {}))
+@patch('utils.notify.NotificationKit.feishu_request', return_value=('https://feishu.example.com', {}))
+@patch('utils.notify.NotificationKit.gotify_request', return_value=('https://gotify.example.com', {}))
+def test_push_message(mock_gotify, mock_feishu, mock_pushplus, mock_wecom, mock_dingtalk, mock_email, mock_post):
 	os.environ['EMAIL_USER'] = 'test@example.com'
 	os.environ['EMAIL_PASS'] = 'password'
 	os.environ['EMAIL_TO'] = 'to@example.com'
+	mock_post.return_value = MagicMock()
 
 	kit = NotificationKit()
 	kit.push_message('测试标题', '测试内容')
@@ -167,6 +208,145 @@ def test_push_message(mock_gotify, mock_feishu, mock_pushplus, mock_wecom, mock_
 	assert mock_pushplus.called
 	assert mock_feishu.called
 	assert mock_gotify.called
+	# 所有已配置的 HTTP 渠道通过同一个异步客户端发送
+	assert mock_post.await_count >= 5
+
+
+def test_push_message_channels_run_concurrently(caplog):
+	"""渠道并发发送，慢渠道超时不影响其他渠道，输出按渠道顺序"""
+	caplog.set_level(logging.INFO)
+	os.environ['NOTIFY_CHANNEL_TIMEOUT'] = '0.2'
+	kit = NotificationKit()
+	os.environ.pop('NOTIFY_CHANNEL_TIMEOUT')
+
+	async def slow_post(self, url, json=None):
+		await asyncio.sleep(0.15 if 'fast' in url else 5)
+		return httpx.Response(200, request=httpx.Request('POST', url))
+
+	def email(title, content, msg_type):
+		time.sleep(0.15)
+
+	with (
+		patch('httpx.AsyncClient.post', slow_post),
+		patch.object(kit, 'send_email', email),
+		patch.object(kit, 'pushplus_request', return_value=('https://fast.example.com', {})),
+		patch.object(kit, 'dingtalk_request', return_value=('https://slow.example.com', {})),
+		patch.object(kit, 'feishu_request', return_value=('https://fast.example.com', {})),
+	):
+		started_at = time.perf_counter()
+		kit.push_message('测试标题', '测试内容')
+		elapsed = time.perf_counter() - started_at
+
+	assert elapsed < 1.0
+	lines = [record.getMessage() for record in caplog.records if record.name == 'utils.notify']
+	assert lines[:5] == [
+		'Email: Message push successful!',
+		'PushPlus: Message push successful!',
+		lines[2],
+		'DingTalk: Message push failed! Reason: Timed out after 0.2s',
+		'Feishu: Message push successful!',
+	]
+	assert lines[2].startswith('Server Push: Message push failed!')
+
+
+def test_push_message_splits_long_content(caplog):
+	"""超过渠道大小限制的内容按账号拆分为编号消息依次发送"""
+	caplog.set_level(logging.INFO)
+	kit = NotificationKit()
+	content = '\n'.join(f'[BALANCE] Account {i}\n:money: Current balance: $10.00, Used: $1.00' for i in range(20))
+	sent = []
+
+	async def post(self, url, json=None):
+		sent.append(json['text'])
+		return httpx.Response(200, request=httpx.Request('POST', url))
+
+	with (
+		patch('httpx.AsyncClient.post', post),
+		patch.dict('utils.notify.CHANNEL_LIMITS', {'Telegram': ChannelLimits(max_size=300, rate=1000, burst=1)}),
+		patch.object(kit, 'send_email', side_effect=ValueError('Email not configured')),
+		patch.object(
+			kit, 'telegram_request', side_effect=lambda title, text: ('https://t.example.com', {'text': title + text})
+		),
+	):
+		kit.push_message('Title', content)
+
+	assert len(sent) > 1
+	assert sent[0].startswith(f'Title (1/{len(sent)})[BALANCE] Account 0')
+	assert all(f'Account {i}\n' in ''.join(sent) for i in range(20))
+	assert f'Telegram: Message push successful! ({len(sent)} parts)' in caplog.text
+
+
+def test_push_message_paced_parts_are_not_cut_by_deadline(caplog):
+	"""分段数超过令牌桶容量时按速率发送，整体截止时间按分段数延长，不丢失任何分段"""
+	caplog.set_level(logging.INFO)
+	os.environ['NOTIFY_DEADLINE'] = '0.1'
+	kit = NotificationKit()
+	os.environ.pop('NOTIFY_DEADLINE')
+	content = '\n'.join(f'[BALANCE] Account {i}\n:money: Current balance: $10.00, Used: $1.00' for i in range(20))
+	sent = []
+
+	async def post(self, url, json=None):
+		sent.append(json['text'])
+		return httpx.Response(200, request=httpx.Request('POST', url))
+
+	with (
+		patch('httpx.AsyncClient.post', post),
+		patch.dict('utils.notify.CHANNEL_LIMITS', {'Telegram': ChannelLimits(max_size=300, rate=10, burst=2)}),
+		patch.object(kit, 'send_email', side_effect=ValueError('Email not configured')),
+		patch.object(
+			kit, 'telegram_request', side_effect=lambda title, text: ('https://t.example.com', {'text': title + text})
+		),
+	):
+		kit.push_message('Title', content)
+
+	# 超出容量的分段每个需要等待 0.1 秒，总耗时超过原始截止时间
+	assert len(sent) > 4
+	assert all(f'Account {i}\n' in ''.join(sent) for i in range(20))
+	assert f'Telegram: Message push successful! ({len(sent)} parts)' in caplog.text
+
+
+def test_push_message_reports_errcode_as_failure(caplog):
+	"""钉钉与企业微信出错时返回 HTTP 200 与非零 errcode，应记为推送失败"""
+	caplog.set_level(logging.INFO)
+	kit = NotificationKit()
+
+	async def post(self, url, json=None):
+		return httpx.Response(
+			200, json={'errcode': 45009, 'errmsg': 'api freq out of limit'}, request=httpx.Request('POST', url)
+		)
+
+	with (
+		patch('httpx.AsyncClient.post', post),
+		patch.object(kit, 'send_email', side_effect=ValueError('Email not configured')),
+		patch.object(kit, 'wecom_request', return_value=('https://wecom.example.com', {})),
+	):
+		kit.push_message('Title', 'content')
+
+	assert 'WeChat Work: Message push failed! Reason: errcode 45009: api freq out of limit' in caplog.text
+
+
+def test_push_message_reports_feishu_code_as_failure(caplog):
+	"""飞书机器人被拒绝或限流时返回 HTTP 200 与非零 code，应记为推送失败；PushPlus 成功时 code 为 200"""
+	caplog.set_level(logging.INFO)
+	kit = NotificationKit()
+
+	async def post(self, url, json=None):
+		if 'feishu' in url:
+			payload = {'code': 11232, 'msg': 'frequency limited', 'data': {}}
+		else:
+			payload = {'code': 200, 'msg': '请求成功', 'data': 'ok'}
+		return httpx.Response(200, json=payload, request=httpx.Request('POST', url))
+
+	with (
+		patch('httpx.AsyncClient.post', post),
+		patch.object(kit, 'send_email', side_effect=ValueError('Email not configured')),
+		patch.object(kit, 'feishu_request', return_value=('https://feishu.example.com', {})),
+		patch.object(kit, 'pushplus_request', return_value=('https://pushplus.example.com', {})),
+	):
+		kit.push_message('Title', 'content')
+
+	assert 'Feishu: Message push failed! Reason: code 11232: frequency limited' in caplog.text
+	assert 'PushPlus: Message push successful!' in caplog.text
 
 
 @patch('utils.notify.format_html_email')
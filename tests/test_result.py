@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.channel_limits import UNIT_START
+from utils.notify import NotificationKit, format_run_html
+from utils.result import AccountResult, RunResult
+
+
+def make_run() -> RunResult:
+	def account(index: int, **kwargs) -> AccountResult:
+		return AccountResult(index, f'Account {index + 1}', 'anyrouter', str(index), **kwargs)
+
+	return RunResult(
+		execution_time='2026-01-01 08:00:00',
+		total_count=4,
+		success_count=2,
+		errors=['Shard 2/2 results missing'],
+		failures=[
+			account(0, success=False, error='HTTP 500'),
+			account(1, success=False, exception='connection reset'),
+		],
+		balances=[account(2, success=True, quota=12.5, used_quota=3.0, change=-0.5, timings={'total': 1.2})],
+	)
+
+
+def test_render_text_matches_report_format():
+	assert make_run().text == (
+		'[TIME] Execution time: 2026-01-01 08:00:00\n\n'
+		'[FAIL] Shard 2/2 results missing\n'
+		'[FAIL] Account 1\nHTTP 500\n'
+		'[FAIL] Account 2 exception: connection reset...\n'
+		'[BALANCE] Account 3\n:money: Current balance: $12.5, Used: $3.0, Change: $-0.5\n\n'
+		'[STATS] Check-in result statistics:\n'
+		'[SUCCESS] Success: 2/4\n'
+		'[FAIL] Failed: 2/4\n'
+		'[WARN] Some accounts check-in successful'
+	)
+
+
+def test_render_markdown_keeps_account_boundaries():
+	markdown = make_run().markdown
+	assert '[BALANCE] **Account 3**  \n💰 Current balance: $12.5' in markdown
+	# 每个账号仍以 [TAG] 开头，长消息可以按账号拆分
+	assert len(UNIT_START.findall(markdown)) == 7
+
+
+def test_account_result_round_trip():
+	record = make_run().balances[0]
+	assert AccountResult.from_dict(record.to_dict()) == record
+
+
+def test_format_run_html_uses_structured_result():
+	html = format_run_html('Title', make_run())
+	assert 'Account 3' in html and 'Current balance: $12.5, Used: $3.0, Change: $-0.5' in html
+	assert 'HTTP 500' in html and '2026-01-01 08:00:00' in html
+	assert '<div class="stat-value">4</div>' in html
+
+
+def test_push_renders_each_format_once():
+	"""所有渠道共用同一份渲染结果"""
+	run = make_run()
+	kit = NotificationKit()
+	with (
+		patch('utils.notify.format_run_html', wraps=format_run_html) as render_html,
+		patch('utils.result.render_text', return_value='text') as render_text,
+		patch('utils.result.render_markdown', return_value='markdown') as render_markdown,
+		patch.object(kit, 'send_email') as send_email,
+		patch.object(kit, 'pushplus_request', side_effect=ValueError('not configured')),
+		patch.object(kit, 'serverPush_request', side_effect=ValueError('not configured')),
+		patch.object(kit, 'dingtalk_request', side_effect=ValueError('not configured')),
+		patch.object(kit, 'feishu_request', side_effect=ValueError('not configured')),
+	):
+		kit.push_message('Title', run)
+		assert run.text == 'text'
+
+	assert render_html.call_count == 1
+	assert render_text.call_count == 1
+	assert render_markdown.call_count == 1
+	send_email.assert_called_once()
+	assert send_email.call_args.args[2] == 'html'
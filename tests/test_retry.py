@@ -0,0 +1,110 @@
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.retry import (
+	CheckInError,
+	RetryBudget,
+	classify_exception,
+	classify_response,
+	is_already_checked_in,
+	with_retry,
+)
+
+
+def make_response(status_code: int, **kwargs) -> httpx.Response:
+	return httpx.Response(status_code, request=httpx.Request('GET', 'https://anyrouter.top/api/user/self'), **kwargs)
+
+
+def test_classify_failures():
+	assert classify_response(make_response(502)) == 'http_5xx'
+	assert classify_response(make_response(401)) == 'session_expired'
+	assert classify_response(make_response(429)) == 'rate_limited'
+	assert classify_response(make_response(200, html="<script>var arg1='ABC';</script>")) == 'waf_challenge'
+	assert classify_response(make_response(200, json={'success': True})) is None
+	assert classify_exception(httpx.ReadTimeout('timeout')) == 'network_timeout'
+	assert classify_exception(ValueError('other')) is None
+	assert is_already_checked_in('今天已经签到过了')
+	assert is_already_checked_in('Already checked in today')
+	assert not is_already_checked_in('签到失败')
+
+
+@patch('utils.retry.asyncio.sleep', new_callable=AsyncMock)
+def test_with_retry_retries_transient_failures(mock_sleep):
+	"""5xx 与超时按退避策略重试，成功后返回结果"""
+	request = AsyncMock(side_effect=[CheckInError('http_5xx', 'HTTP 502'), httpx.ConnectTimeout('timeout'), 'ok'])
+	budget = RetryBudget(10)
+
+	result = asyncio.run(with_retry('Account 1', 'Check-in request', request, budget))
+
+	assert result == 'ok'
+	assert request.call_count == 3
+	assert budget.used == 2
+	assert mock_sleep.call_count == 2
+
+
+@patch('utils.retry.asyncio.sleep', new_callable=AsyncMock)
+def test_with_retry_does_not_retry_permanent_failures(mock_sleep):
+	"""session 过期与业务错误不消耗额外请求"""
+	for failure in ('session_expired', 'business_error'):
+		request = AsyncMock(side_effect=CheckInError(failure, 'failed'))
+		budget = RetryBudget(10)
+
+		with pytest.raises(CheckInError) as exc_info:
+			asyncio.run(with_retry('Account 1', 'Check-in request', request, budget))
+
+		assert exc_info.value.failure == failure
+		assert request.call_count == 1
+		assert budget.used == 0
+
+
+@patch('utils.retry.asyncio.sleep', new_callable=AsyncMock)
+def test_with_retry_respects_budget_and_waf_refresh(mock_sleep):
+	"""预算耗尽后停止重试；WAF 挑战先刷新 cookies 再重试"""
+	request = AsyncMock(side_effect=CheckInError('http_5xx', 'HTTP 503'))
+	with pytest.raises(CheckInError):
+		asyncio.run(with_retry('Account 1', 'Check-in request', request, RetryBudget(1)))
+	assert request.call_count == 2
+
+	refresh = AsyncMock()
+	request = AsyncMock(side_effect=[CheckInError('waf_challenge', 'blocked'), 'ok'])
+	result = asyncio.run(with_retry('Account 1', 'Check-in request', request, RetryBudget(1), refresh))
+	assert result == 'ok'
+	assert refresh.call_count == 1
+
+
+@patch('utils.retry.asyncio.sleep', new_callable=AsyncMock)
+def test_with_retry_counts_attempts_per_failure_class(mock_sleep):
+	"""不同失败类别的重试次数分别计算"""
+	refresh = AsyncMock()
+	request = AsyncMock(side_effect=[httpx.ReadTimeout('timeout'), CheckInError('waf_challenge', 'blocked'), 'ok'])
+	result = asyncio.run(with_retry('Account 1', 'Check-in request', request, RetryBudget(10), refresh))
+	assert result == 'ok'
+	assert refresh.call_count == 1
+
+	failures = [CheckInError('http_5xx', 'HTTP 502')] * 3 + [CheckInError('rate_limited', 'HTTP 429')] * 2
+	request = AsyncMock(side_effect=[*failures, 'ok'])
+	result = asyncio.run(with_retry('Account 1', 'Check-in request', request, RetryBudget(10)))
+	assert result == 'ok'
+	assert request.call_count == 6
+
+	request = AsyncMock(side_effect=[httpx.ReadTimeout('timeout'), *[CheckInError('waf_challenge', 'blocked')] * 2])
+	with pytest.raises(CheckInError) as exc_info:
+		asyncio.run(with_retry('Account 1', 'Check-in request', request, RetryBudget(10), refresh))
+	assert exc_info.value.failure == 'waf_challenge'
+	assert request.call_count == 3
+
+
+def test_retry_budget_split_is_exact():
+	"""按进程拆分的预算之和等于总预算，预算小于进程数时部分进程没有重试额度"""
+	assert RetryBudget(0).split(4) == [0, 0, 0, 0]
+	assert RetryBudget(2).split(4) == [1, 1, 0, 0]
+	assert RetryBudget(10).split(4) == [3, 3, 2, 2]
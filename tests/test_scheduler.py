@@ -0,0 +1,62 @@
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.scheduler import CronSchedule, StopSignal, load_schedule
+
+
+def test_cron_schedule_every_six_hours():
+	"""默认计划在 0/6/12/18 点整触发"""
+	schedule = CronSchedule('0 */6 * * *')
+	assert schedule.next_after(datetime(2025, 1, 1, 0, 0, 0)) == datetime(2025, 1, 1, 6, 0)
+	assert schedule.next_after(datetime(2025, 1, 1, 5, 59, 59)) == datetime(2025, 1, 1, 6, 0)
+	assert schedule.next_after(datetime(2025, 1, 31, 23, 0)) == datetime(2025, 2, 1, 0, 0)
+
+
+def test_cron_schedule_fields():
+	"""区间、列表、星期与日的组合"""
+	# 工作日 9:30
+	schedule = CronSchedule('30 9 * * 1-5')
+	assert schedule.next_after(datetime(2025, 1, 3, 10, 0)) == datetime(2025, 1, 6, 9, 30)  # 周五之后是周一
+
+	# 日与星期同时限定时满足其一即可：每月 1 日或周日（7）
+	schedule = CronSchedule('0 0 1 * 7')
+	assert schedule.next_after(datetime(2025, 1, 1, 0, 0)) == datetime(2025, 1, 5, 0, 0)
+
+	schedule = CronSchedule('15,45 */12 29 2 *')
+	assert schedule.next_after(datetime(2025, 3, 1)) == datetime(2028, 2, 29, 0, 15)
+
+
+@pytest.mark.parametrize('expression', ['0 */6 * *', '60 * * * *', '0 0 0 * *', '*/0 * * * *', 'a * * * *'])
+def test_cron_schedule_invalid(expression):
+	with pytest.raises(ValueError):
+		CronSchedule(expression)
+
+
+def test_load_schedule_falls_back_on_invalid(monkeypatch):
+	monkeypatch.setenv('CHECKIN_SCHEDULE', 'every day')
+	assert load_schedule().expression == '0 */6 * * *'
+	monkeypatch.setenv('CHECKIN_SCHEDULE', '0 8 * * *')
+	assert load_schedule().expression == '0 8 * * *'
+
+
+def test_stop_signal_interrupts_wait():
+	"""等待期间收到停止信号立即返回"""
+
+	async def run():
+		stop_signal = StopSignal()
+		asyncio.get_running_loop().call_later(0.01, stop_signal.trigger)
+		started_at = datetime.now()
+		completed = await stop_signal.wait_until(datetime.now() + timedelta(hours=1))
+		return completed, datetime.now() - started_at
+
+	completed, elapsed = asyncio.run(run())
+	assert not completed
+	assert elapsed < timedelta(seconds=5)
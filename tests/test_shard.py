@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.config import AccountConfig
+from utils.shard import (
+	ShardedAccounts,
+	ShardResultWriter,
+	find_shard_files,
+	load_shard_results_dir,
+	parse_shard,
+	read_shard_records,
+	shard_of,
+)
+
+
+def make_accounts(count: int) -> list[AccountConfig]:
+	return [AccountConfig(cookies={'session': f's{i}'}, api_user=str(i), name=f'Account {i + 1}') for i in range(count)]
+
+
+def test_parse_shard():
+	assert parse_shard('1/4') == (1, 4)
+	assert parse_shard(' 4 / 4 ') == (4, 4)
+	for value in ['0/4', '5/4', '1/0', '1', 'a/b']:
+		with pytest.raises(ValueError):
+			parse_shard(value)
+
+
+def test_sharded_accounts_partition_is_stable():
+	"""所有分片恰好覆盖全部账号，且增加账号不改变已有账号的分配"""
+	accounts = make_accounts(200)
+	shards = [list(ShardedAccounts(accounts, i, 4).indexed()) for i in range(1, 5)]
+
+	assert sorted(i for shard in shards for i, _ in shard) == list(range(200))
+	assert all(shards)
+	# 分片视图保留账号在完整列表中的序号
+	assert all(accounts[i] is account for shard in shards for i, account in shard)
+	assert len(ShardedAccounts(accounts, 2, 4)) == len(shards[1])
+
+	before = {account.key: shard_of(account.key, 4) for account in accounts}
+	more_accounts = make_accounts(300)
+	assert all(shard_of(account.key, 4) == before[account.key] for account in more_accounts[:200])
+
+
+def test_shard_results_round_trip(tmp_path):
+	"""只有写完的分片结果文件会被合并步骤发现"""
+	results_dir = str(tmp_path / 'shard_results')
+	writer = ShardResultWriter(results_dir, 1, 2, '2026-01-02')
+	writer.write({'index': 0, 'name': 'Account 1'})
+	assert find_shard_files(results_dir, '2026-01-02') == ({}, None)
+	writer.close()
+
+	shard_files, shard_count = find_shard_files(results_dir, '2026-01-02')
+	assert shard_count == 2 and list(shard_files) == [1]
+	assert list(read_shard_records(shard_files[1])) == [{'index': 0, 'name': 'Account 1'}]
+
+	# 运行标识不同的分片文件不参与合并
+	ShardResultWriter(results_dir, 2, 2, '2026-01-01').close()
+	assert find_shard_files(results_dir, '2026-01-02') == (shard_files, 2)
+	assert find_shard_files(results_dir, '2026-01-03') == ({}, None)
+
+
+def test_shard_results_dir_is_read_lazily(monkeypatch):
+	"""结果目录在使用时读取，导入模块之后加载的 .env 同样生效"""
+	monkeypatch.delenv('SHARD_RESULTS_DIR', raising=False)
+	assert load_shard_results_dir() == 'shard_results'
+	monkeypatch.setenv('SHARD_RESULTS_DIR', '/tmp/results')
+	assert load_shard_results_dir() == '/tmp/results'
@@ -0,0 +1,65 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.log import log_context
+from utils.timing import PhaseTimer, RunReport, current_timer, percentile, phase
+
+
+def test_percentile_nearest_rank():
+	values = [float(v) for v in range(1, 101)]
+
+	assert percentile(values, 50) == 50.0
+	assert percentile(values, 95) == 95.0
+	assert percentile([3.0], 95) == 3.0
+	assert percentile([], 50) == 0.0
+
+
+def test_run_report_aggregates_account_phases():
+	"""各账号的阶段耗时记录到各自的计时器，报告按阶段汇总并列出最慢账号"""
+	report = RunReport()
+
+	async def account(index: int, delay: float):
+		current_timer.set(report.account(index, f'Account {index + 1}'))
+		with phase('total'):
+			with phase('user_info'):
+				await asyncio.sleep(delay)
+
+	async def run():
+		await asyncio.gather(account(0, 0.01), account(1, 0.05), account(2, 0.02))
+
+	asyncio.run(run())
+	data = report.to_dict()
+
+	assert data['account_count'] == 3
+	assert data['account_phases']['user_info']['count'] == 3
+	assert data['account_phases']['total']['p95'] >= 0.05
+	assert [a['name'] for a in data['slowest_accounts']] == ['Account 2', 'Account 3', 'Account 1']
+
+
+def test_phase_without_timer_is_noop():
+	with phase('user_info'):
+		pass
+
+	assert current_timer.get() is None
+
+
+def test_phase_is_carried_in_log_context():
+	"""阶段内记录的所有日志都带有当前（最内层）阶段，离开阶段后恢复"""
+	timer = PhaseTimer('Account 1')
+	token = current_timer.set(timer)
+	try:
+		with phase('total'):
+			assert log_context.get()['phase'] == 'total'
+			with phase('user_info'):
+				assert log_context.get()['phase'] == 'user_info'
+			assert log_context.get()['phase'] == 'total'
+	finally:
+		current_timer.reset(token)
+
+	assert 'phase' not in log_context.get()
+	assert set(timer.phases) == {'total', 'user_info'}
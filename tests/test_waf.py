@@ -0,0 +1,102 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到 PATH
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.config import ProviderConfig
+from utils.waf import WafCookieCache, WafCookieManager
+
+
+def make_provider() -> ProviderConfig:
+	return ProviderConfig(
+		name='anyrouter',
+		domain='https://anyrouter.top',
+		bypass_method='waf_cookies',
+		waf_cookie_names=['acw_tc'],
+	)
+
+
+def test_waf_cookie_manager_single_flight():
+	"""并发账号共享同一次 WAF cookies 获取"""
+	calls = []
+
+	async def acquire(account_name, login_url, required_cookies):
+		calls.append(account_name)
+		await asyncio.sleep(0.01)
+		return {'acw_tc': {'value': f'value{len(calls)}', 'expires': -1}}
+
+	async def run():
+		manager = WafCookieManager(acquire)
+		provider = make_provider()
+		results = await asyncio.gather(*(manager.get(f'Account {i}', provider) for i in range(5)))
+		later = await manager.get('Account 6', provider)
+		return results, later
+
+	results, later = asyncio.run(run())
+
+	assert calls == ['Account 0']
+	assert all(r == {'acw_tc': 'value1'} for r in results)
+	assert later == {'acw_tc': 'value1'}
+
+
+def test_waf_cookie_manager_invalidate_reacquires_once():
+	"""挑战页触发作废后重新获取，过期的 cookies 不会重复作废新结果"""
+	calls = []
+
+	async def acquire(account_name, login_url, required_cookies):
+		calls.append(account_name)
+		return {'acw_tc': {'value': f'value{len(calls)}', 'expires': -1}}
+
+	async def run():
+		manager = WafCookieManager(acquire)
+		provider = make_provider()
+		stale = await manager.get('Account 1', provider)
+		manager.invalidate(provider, {**stale, 'session': 'x'})
+		fresh = await manager.get('Account 2', provider)
+		manager.invalidate(provider, stale)
+		again = await manager.get('Account 3', provider)
+		return fresh, again
+
+	fresh, again = asyncio.run(run())
+
+	assert calls == ['Account 1', 'Account 2']
+	assert fresh == again == {'acw_tc': 'value2'}
+
+
+def test_waf_cookie_cache_persists_across_runs(tmp_path):
+	"""磁盘缓存有效时跳过浏览器，作废后重新获取"""
+	cache_file = str(tmp_path / 'waf_cookie_cache.json')
+	calls = []
+
+	async def acquire(account_name, login_url, required_cookies):
+		calls.append(account_name)
+		return {'acw_tc': {'value': f'value{len(calls)}', 'expires': time.time() + 3600}}
+
+	async def run(account_name):
+		manager = WafCookieManager(acquire, WafCookieCache(cache_file))
+		cookies = await manager.get(account_name, make_provider())
+		return manager, cookies
+
+	first, cookies = asyncio.run(run('Account 1'))
+	assert (first.hits, first.misses) == (0, 1)
+
+	second, cached = asyncio.run(run('Account 2'))
+	assert calls == ['Account 1']
+	assert cached == cookies
+	assert (second.hits, second.misses) == (1, 0)
+
+	second.invalidate(make_provider(), cached)
+	_, fresh = asyncio.run(run('Account 3'))
+	assert calls == ['Account 1', 'Account 3']
+	assert fresh == {'acw_tc': 'value2'}
+
+
+def test_waf_cookie_cache_skips_expired_entries(tmp_path):
+	cache = WafCookieCache(str(tmp_path / 'waf_cookie_cache.json'))
+	cache.put('https://anyrouter.top', {'acw_tc': {'value': 'old', 'expires': time.time() + 30}})
+
+	assert cache.get('https://anyrouter.top', ['acw_tc']) is None
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+余额历史存储模块
+
+使用 SQLite（WAL 模式）仅追加地记录每次运行获取到的余额，
+作为余额变化检测的数据来源。
+"""
+
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS balance_history (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	ts INTEGER NOT NULL,
+	account TEXT NOT NULL,
+	provider TEXT NOT NULL,
+	quota REAL NOT NULL,
+	used_quota REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_balance_history_account ON balance_history (provider, account, id);
+"""
+
+
+class BalanceStore:
+	"""仅追加的余额时间序列存储，按 (provider, account) 索引最新值"""
+
+	def __init__(self, path: str):
+		self.path = path
+		self._conn = sqlite3.connect(path)
+		self._conn.execute('PRAGMA journal_mode=WAL')
+		self._conn.execute('PRAGMA synchronous=NORMAL')
+		self._conn.executescript(SCHEMA)
+
+	def latest(self) -> dict[tuple[str, str], dict]:
+		"""获取每个账号最近一次记录的余额"""
+		rows = self._conn.execute(
+			"""
+			SELECT h.provider, h.account, h.quota, h.used_quota, h.ts
+			FROM balance_history h
+			JOIN (
+				SELECT MAX(id) AS id FROM balance_history GROUP BY provider, account
+			) latest ON h.id = latest.id
+			"""
+		).fetchall()
+		return {
+			(provider, account): {'quota': quota, 'used_quota': used_quota, 'ts': ts}
+			for provider, account, quota, used_quota, ts in rows
+		}
+
+	def history(self, provider: str, account: str, limit: int = 30) -> list[dict]:
+		"""获取单个账号最近的余额记录（由新到旧）"""
+		rows = self._conn.execute(
+			"""
+			SELECT ts, quota, used_quota FROM balance_history
+			WHERE provider = ? AND account = ?
+			ORDER BY id DESC LIMIT ?
+			""",
+			(provider, account, limit),
+		).fetchall()
+		return [{'ts': ts, 'quota': quota, 'used_quota': used_quota} for ts, quota, used_quota in rows]
+
+	def append_run(self, records: list[tuple[str, str, float, float]], timestamp: int | None = None):
+		"""在一个事务中批量写入本次运行的余额记录：(provider, account, quota, used_quota)"""
+		if not records:
+			return
+
+		ts = int(timestamp if timestamp is not None else time.time())
+		with self._conn:
+			self._conn.executemany(
+				'INSERT INTO balance_history (ts, provider, account, quota, used_quota) VALUES (?, ?, ?, ?, ?)',
+				[(ts, provider, account, quota, used_quota) for provider, account, quota, used_quota in records],
+			)
+
+	def close(self):
+		self._conn.close()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Playwright 浏览器管理模块
+
+Playwright 仅在第一次真正需要浏览器时才导入并启动驱动，
+不需要 WAF cookies 的运行完全不会加载 Playwright。
+"""
+
+import asyncio
+import json
+import os
+from urllib.parse import urlparse
+
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+USER_AGENT = (
+	'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36'
+)
+
+BROWSER_ARGS = [
+	'--disable-blink-features=AutomationControlled',
+	'--disable-dev-shm-usage',
+	'--disable-web-security',
+	'--disable-features=VizDisplayCompositor',
+	'--no-sandbox',
+]
+
+
+# 精简模式下拦截的资源类型，WAF 挑战只依赖文档与脚本
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'stylesheet', 'media', 'texttrack', 'manifest', 'eventsource', 'websocket'}
+
+
+# 等待 WAF cookies 的默认最长时间（秒）
+DEFAULT_COOKIE_TIMEOUT = 15.0
+
+# 没有页面事件时检查 cookie jar 的间隔（秒）
+COOKIE_POLL_INTERVAL = 0.25
+
+
+def load_lean_mode() -> bool:
+	"""从环境变量加载是否启用精简加载模式，默认启用"""
+	return os.getenv('WAF_LEAN_MODE', 'true').strip().lower() not in ('false', '0', 'no', 'off')
+
+
+def is_same_site(url: str, host: str) -> bool:
+	"""判断请求是否属于登录页所在站点（含子域名）"""
+	request_host = urlparse(url).hostname or ''
+	return request_host == host or request_host.endswith(f'.{host}')
+
+
+class PageTrafficStats:
+	"""统计一次 WAF cookies 获取过程中的传输字节数与被拦截的请求数"""
+
+	def __init__(self):
+		self.blocked = 0
+		self.requests = 0
+		self._bytes = 0
+		self._pending: list[asyncio.Future] = []
+
+	def on_request_finished(self, request):
+		self.requests += 1
+		self._pending.append(asyncio.ensure_future(self._add_sizes(request)))
+
+	async def _add_sizes(self, request):
+		sizes = await request.sizes()
+		self._bytes += (
+			sizes['requestHeadersSize']
+			+ sizes['requestBodySize']
+			+ sizes['responseHeadersSize']
+			+ sizes['responseBodySize']
+		)
+
+	async def total_bytes(self) -> int:
+		"""等待所有已完成请求的大小统计后返回总字节数"""
+		await asyncio.gather(*self._pending, return_exceptions=True)
+		self._pending.clear()
+		return self._bytes
+
+
+class LoadBaseline:
+	"""按域名持久化最近一次完整页面加载的传输字节数与耗时，作为精简模式节省量的对比基线"""
+
+	def __init__(self, path: str):
+		self.path = path
+		self._entries: dict[str, dict] | None = None
+
+	def _load(self) -> dict[str, dict]:
+		if self._entries is None:
+			self._entries = {}
+			try:
+				if os.path.exists(self.path):
+					with open(self.path, 'r', encoding='utf-8') as f:
+						data = json.load(f)
+					if isinstance(data, dict):
+						self._entries = data
+			except Exception as e:
+				logger.warning(f'Failed to load WAF page load baseline: {e}')
+		return self._entries
+
+	def get(self, domain: str) -> dict | None:
+		"""获取完整页面加载的基线 {'bytes': 字节数, 'seconds': 耗时}，没有记录时返回 None"""
+		entry = self._load().get(domain)
+		return entry if isinstance(entry, dict) and 'bytes' in entry and 'seconds' in entry else None
+
+	def record(self, domain: str, transferred_bytes: int, seconds: float):
+		"""记录一次成功的完整页面加载"""
+		self._load()[domain] = {'bytes': transferred_bytes, 'seconds': round(seconds, 4)}
+		try:
+			temp_path = f'{self.path}.{os.getpid()}.tmp'
+			with open(temp_path, 'w', encoding='utf-8') as f:
+				json.dump(self._entries, f)
+			os.replace(temp_path, self.path)
+		except Exception as e:
+			logger.warning(f'Failed to save WAF page load baseline: {e}')
+
+
+def describe_load(
+	lean_mode: bool, stats: PageTrafficStats, transferred_bytes: int, seconds: float, baseline: dict | None
+) -> tuple[str, dict]:
+	"""生成获取方式的说明与结构化字段：精简模式与完整页面加载的基线对比节省的字节数与时间"""
+	if not lean_mode:
+		return 'full page load, recorded as baseline', {}
+
+	description = f'lean mode, blocked {stats.blocked} request(s)'
+	if baseline is None:
+		return (
+			f'{description}; no full page load baseline yet, run once with WAF_LEAN_MODE=false to measure savings',
+			{},
+		)
+
+	saved_bytes = baseline['bytes'] - transferred_bytes
+	saved_seconds = baseline['seconds'] - seconds
+	description += (
+		f'; full page load baseline {baseline["bytes"] / 1024:.1f} KB in {baseline["seconds"]:.2f}s, '
+		f'saved {saved_bytes / 1024:.1f} KB and {saved_seconds:.2f}s'
+	)
+	return description, {'saved_bytes': saved_bytes, 'saved_seconds': round(saved_seconds, 4)}
+
+
+async def enable_lean_mode(page, login_url: str, stats: PageTrafficStats):
+	"""拦截图片、字体、样式等非必要资源以及第三方域名的请求，只加载 WAF 挑战需要的内容"""
+	host = urlparse(login_url).hostname or ''
+
+	async def handle_route(route):
+		request = route.request
+		if request.resource_type in BLOCKED_RESOURCE_TYPES or not is_same_site(request.url, host):
+			stats.blocked += 1
+			await route.abort()
+		else:
+			await route.continue_()
+
+	await page.route('**/*', handle_route)
+
+
+def load_cookie_timeout() -> float:
+	"""从环境变量加载等待 WAF cookies 的最长时间（秒）"""
+	timeout_str = os.getenv('WAF_COOKIE_TIMEOUT', '').strip()
+	if not timeout_str:
+		return DEFAULT_COOKIE_TIMEOUT
+
+	try:
+		return max(1.0, float(timeout_str))
+	except ValueError:
+		logger.warning(f'Invalid WAF_COOKIE_TIMEOUT value "{timeout_str}", using default {DEFAULT_COOKIE_TIMEOUT}s')
+		return DEFAULT_COOKIE_TIMEOUT
+
+
+async def wait_for_cookies(page, required_cookies: list[str], timeout: float) -> tuple[dict[str, dict], list[str]]:
+	"""所需 cookies 全部出现后立即返回，超时返回已获取的 cookies 与缺失的 cookie 名称
+
+	页面收到响应（可能带 Set-Cookie）或发生导航（挑战脚本写入 cookie 后会刷新页面）时立即检查 cookie jar，
+	脚本直接写入 document.cookie 的情况由短间隔轮询兜底。
+	"""
+	loop = asyncio.get_running_loop()
+	deadline = loop.time() + timeout
+	changed = asyncio.Event()
+
+	def on_change(*_):
+		changed.set()
+
+	events = ('response', 'framenavigated', 'load')
+	for event in events:
+		page.on(event, on_change)
+
+	try:
+		while True:
+			changed.clear()
+			waf_cookies = {}
+			for cookie in await page.context.cookies():
+				cookie_name = cookie.get('name')
+				cookie_value = cookie.get('value')
+				if cookie_name in required_cookies and cookie_value is not None:
+					waf_cookies[cookie_name] = {'value': cookie_value, 'expires': cookie.get('expires', -1)}
+
+			missing_cookies = [c for c in required_cookies if c not in waf_cookies]
+			remaining = deadline - loop.time()
+			if not missing_cookies or remaining <= 0:
+				return waf_cookies, missing_cookies
+
+			try:
+				await asyncio.wait_for(changed.wait(), timeout=min(remaining, COOKIE_POLL_INTERVAL))
+			except asyncio.TimeoutError:
+				pass
+	finally:
+		for event in events:
+			page.remove_listener(event, on_change)
+
+
+class BrowserManager:
+	"""延迟启动的 Chromium，运行期间复用同一个浏览器进程，每次获取使用独立的隐私上下文"""
+
+	def __init__(self):
+		self._playwright = None
+		self._browser = None
+		self._lock = asyncio.Lock()
+
+	@property
+	def started(self) -> bool:
+		return self._browser is not None
+
+	async def _ensure_browser(self):
+		async with self._lock:
+			if self._browser is not None and self._browser.is_connected():
+				return self._browser
+
+			# 延迟导入：Playwright 的导入与驱动启动只在首次需要浏览器时发生
+			from playwright.async_api import async_playwright
+
+			logger.info('Starting Playwright driver and Chromium...', tag='PROCESSING')
+			if self._playwright is None:
+				self._playwright = await async_playwright().start()
+			self._browser = await self._playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+			return self._browser
+
+	async def new_context(self):
+		"""创建独立的浏览器上下文（隐私模式，不与其他上下文共享 cookies）"""
+		browser = await self._ensure_browser()
+		return await browser.new_context(user_agent=USER_AGENT, viewport={'width': 1920, 'height': 1080})
+
+	async def close(self):
+		"""关闭浏览器与 Playwright 驱动"""
+		async with self._lock:
+			if self._browser is not None:
+				try:
+					await self._browser.close()
+				except Exception as e:
+					logger.warning(f'Failed to close browser: {e}')
+				self._browser = None
+			if self._playwright is not None:
+				try:
+					await self._playwright.stop()
+				except Exception as e:
+					logger.warning(f'Failed to stop Playwright driver: {e}')
+				self._playwright = None
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+通知渠道的消息大小限制与发送速率限制
+
+超过单条消息大小限制的通知按账号边界拆分为多条编号消息，
+每个渠道使用令牌桶控制发送速率，避免触发平台限流而丢失消息。
+"""
+
+import asyncio
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Literal
+
+# 每个账号（及时间、统计等信息行）以 [TAG] 开头，拆分只发生在这些行之前
+UNIT_START = re.compile(r'^\[[A-Z]+\]', re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class ChannelLimits:
+	"""渠道限制：单条消息最大长度（字符或 UTF-8 字节）与令牌桶速率"""
+
+	max_size: int | None = None
+	size_unit: Literal['chars', 'bytes'] = 'chars'
+	rate: float | None = None  # 每秒补充的令牌数，None 表示不限速
+	burst: int = 1  # 令牌桶容量
+	template: str = '{title}{content}'  # 渠道将标题与内容组合为一条消息的格式，用于计算大小
+
+	def measure(self, text: str) -> int:
+		return len(text.encode('utf-8')) if self.size_unit == 'bytes' else len(text)
+
+	def wrap(self, title: str, content: str) -> str:
+		return self.template.format(title=title, content=content)
+
+	def pacing_time(self, parts: int) -> float:
+		"""按速率发送 parts 条消息最多需要等待的时间（令牌桶在多次推送间共享，按令牌已耗尽估算）"""
+		return parts / self.rate if self.rate else 0.0
+
+
+CHANNEL_LIMITS = {
+	'PushPlus': ChannelLimits(max_size=20000),
+	'Server Push': ChannelLimits(max_size=32000, size_unit='bytes'),
+	# 钉钉与企业微信机器人：每分钟最多 20 条
+	'DingTalk': ChannelLimits(max_size=20000, size_unit='bytes', rate=20 / 60, burst=20, template='{title}\n{content}'),
+	'WeChat Work': ChannelLimits(
+		max_size=2048, size_unit='bytes', rate=20 / 60, burst=20, template='{title}\n{content}'
+	),
+	# 飞书机器人：请求体最大 30KB，每秒 5 条
+	'Feishu': ChannelLimits(max_size=28000, size_unit='bytes', rate=5, burst=5),
+	# Telegram：单条消息 4096 字符，同一会话每秒约 1 条
+	'Telegram': ChannelLimits(max_size=4096, rate=1, burst=1, template='<b>{title}</b>\n\n{content}'),
+	'Gotify': ChannelLimits(),
+}
+
+
+class TokenBucket:
+	"""异步令牌桶，令牌不足时等待补充（每个渠道的分段按顺序发送，同一时间只有一个等待者）"""
+
+	def __init__(self, rate: float, capacity: int):
+		self.rate = rate
+		self.capacity = capacity
+		self._tokens = float(capacity)
+		self._updated_at = time.monotonic()
+
+	def _refill(self):
+		now = time.monotonic()
+		self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+		self._updated_at = now
+
+	async def acquire(self):
+		self._refill()
+		while self._tokens < 1:
+			await asyncio.sleep((1 - self._tokens) / self.rate)
+			self._refill()
+		self._tokens -= 1
+
+
+def _split_oversized(unit: str, max_size: int, measure: Callable[[str], int]) -> list[str]:
+	"""单个账号的内容超过限制时按行拆分，单行仍然超过限制时按长度截断"""
+	if measure(unit) <= max_size:
+		return [unit]
+
+	pieces = []
+	for line in unit.splitlines(keepends=True):
+		while measure(line) > max_size:
+			cut = max_size
+			while measure(line[:cut]) > max_size:
+				cut -= max(1, (measure(line[:cut]) - max_size) // 4)
+			pieces.append(line[:cut])
+			line = line[cut:]
+		if line:
+			pieces.append(line)
+	return pieces
+
+
+def split_message(content: str, max_size: int, measure: Callable[[str], int] = len) -> list[str]:
+	"""按账号边界将内容拆分为不超过 max_size 的多段"""
+	if measure(content) <= max_size:
+		return [content]
+
+	starts = [match.start() for match in UNIT_START.finditer(content)]
+	if not starts or starts[0] != 0:
+		starts.insert(0, 0)
+	units = [content[start:end] for start, end in zip(starts, starts[1:] + [len(content)], strict=True)]
+
+	chunks = []
+	current = ''
+	for unit in units:
+		for piece in _split_oversized(unit, max_size, measure):
+			if current and measure(current + piece) > max_size:
+				chunks.append(current.rstrip('\n'))
+				current = ''
+			current += piece
+	if current.strip():
+		chunks.append(current.rstrip('\n'))
+	return chunks
+
+
+def split_for_channel(limits: ChannelLimits, title: str, content: str) -> list[tuple[str, str]]:
+	"""按渠道限制拆分消息，返回 [(标题, 内容)]；拆分后的标题带有 (i/n) 编号
+
+	每段的预算扣除渠道组合标题与内容的格式以及最长的编号后缀；拆分后段数的位数超过预估时加长后缀重新拆分。
+	"""
+	if limits.max_size is None or limits.measure(limits.wrap(title, content)) <= limits.max_size:
+		return [(title, content)]
+
+	digits = 1
+	while True:
+		longest_suffix = f' ({"9" * digits}/{"9" * digits})'
+		budget = max(1, limits.max_size - limits.measure(limits.wrap(title + longest_suffix, '')))
+		chunks = split_message(content, budget, limits.measure)
+		if len(str(len(chunks))) <= digits:
+			break
+		digits += 1
+
+	return [(f'{title} ({i}/{len(chunks)})', chunk) for i, chunk in enumerate(chunks, 1)]
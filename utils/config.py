@@ -3,11 +3,17 @@
 配置管理模块
 """
 
+import gzip
 import json
 import os
+from collections.abc import Iterator
 from dataclasses import dataclass
 from typing import Dict, List, Literal
 
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
 
 @dataclass
 class ProviderConfig:
@@ -28,7 +34,7 @@ class ProviderConfig:
 			for item in self.waf_cookie_names:
 				name = '' if not item or not isinstance(item, str) else item.strip()
 				if not name:
-					print(f'[WARNING] Found invalid WAF cookie name: {item}')
+					logger.warning(f'Found invalid WAF cookie name: {item}')
 					continue
 
 				required_waf_cookies.add(name)
@@ -71,10 +77,17 @@ class AppConfig:
 	"""应用配置"""
 
 	providers: Dict[str, ProviderConfig]
+	concurrency: int = 1
+	retry_budget: int | None = None
+	processes: int = 1
 
 	@classmethod
 	def load_from_env(cls) -> 'AppConfig':
 		"""从环境变量加载配置"""
+		concurrency = load_concurrency()
+		retry_budget = load_retry_budget()
+		processes = load_processes()
+
 		providers = {
 			'anyrouter': ProviderConfig(
 				name='anyrouter',
@@ -105,32 +118,92 @@ class AppConfig:
 				providers_data = json.loads(providers_str)
 
 				if not isinstance(providers_data, dict):
-					print('[WARNING] PROVIDERS must be a JSON object, ignoring custom providers')
-					return cls(providers=providers)
+					logger.warning('PROVIDERS must be a JSON object, ignoring custom providers')
+					return cls(
+						providers=providers, concurrency=concurrency, retry_budget=retry_budget, processes=processes
+					)
 
 				# 解析自定义 providers,会覆盖默认配置
 				for name, provider_data in providers_data.items():
 					try:
 						providers[name] = ProviderConfig.from_dict(name, provider_data)
 					except Exception as e:
-						print(f'[WARNING] Failed to parse provider "{name}": {e}, skipping')
+						logger.warning(f'Failed to parse provider "{name}": {e}, skipping')
 						continue
 
-				print(f'[INFO] Loaded {len(providers_data)} custom provider(s) from PROVIDERS environment variable')
+				logger.info(f'Loaded {len(providers_data)} custom provider(s) from PROVIDERS environment variable')
 			except json.JSONDecodeError as e:
-				print(
-					f'[WARNING] Failed to parse PROVIDERS environment variable: {e}, using default configuration only'
-				)
+				logger.warning(f'Failed to parse PROVIDERS environment variable: {e}, using default configuration only')
 			except Exception as e:
-				print(f'[WARNING] Error loading PROVIDERS: {e}, using default configuration only')
+				logger.warning(f'Error loading PROVIDERS: {e}, using default configuration only')
 
-		return cls(providers=providers)
+		return cls(providers=providers, concurrency=concurrency, retry_budget=retry_budget, processes=processes)
 
 	def get_provider(self, name: str) -> ProviderConfig | None:
 		"""获取指定 provider 配置"""
 		return self.providers.get(name)
 
 
+def load_concurrency() -> int:
+	"""从环境变量加载最大并发账号数，默认 1（顺序执行）"""
+	concurrency_str = os.getenv('CHECKIN_CONCURRENCY', '').strip()
+	if not concurrency_str:
+		return 1
+
+	try:
+		concurrency = int(concurrency_str)
+	except ValueError:
+		logger.warning(f'Invalid CHECKIN_CONCURRENCY value "{concurrency_str}", using sequential mode')
+		return 1
+
+	if concurrency < 1:
+		logger.warning(f'CHECKIN_CONCURRENCY must be >= 1, got {concurrency}, using sequential mode')
+		return 1
+
+	return concurrency
+
+
+def load_processes() -> int:
+	"""从环境变量加载签到进程数，默认 1（单进程）；auto 表示使用全部 CPU 核心"""
+	processes_str = os.getenv('CHECKIN_PROCESSES', '').strip().lower()
+	if not processes_str:
+		return 1
+
+	if processes_str == 'auto':
+		return os.cpu_count() or 1
+
+	try:
+		processes = int(processes_str)
+	except ValueError:
+		logger.warning(f'Invalid CHECKIN_PROCESSES value "{processes_str}", using a single process')
+		return 1
+
+	if processes < 1:
+		logger.warning(f'CHECKIN_PROCESSES must be >= 1, got {processes}, using a single process')
+		return 1
+
+	return processes
+
+
+def load_retry_budget() -> int | None:
+	"""从环境变量加载每次运行的重试总预算，未设置时返回 None（按账号数自动计算）"""
+	budget_str = os.getenv('CHECKIN_RETRY_BUDGET', '').strip()
+	if not budget_str:
+		return None
+
+	try:
+		budget = int(budget_str)
+	except ValueError:
+		logger.warning(f'Invalid CHECKIN_RETRY_BUDGET value "{budget_str}", using default budget')
+		return None
+
+	if budget < 0:
+		logger.warning(f'CHECKIN_RETRY_BUDGET must be >= 0, got {budget}, using default budget')
+		return None
+
+	return budget
+
+
 @dataclass
 class AccountConfig:
 	"""账号配置"""
@@ -148,42 +221,132 @@ class AccountConfig:
 
 		return cls(cookies=data['cookies'], api_user=data['api_user'], provider=provider, name=name if name else None)
 
+	@property
+	def key(self) -> str:
+		"""跨运行稳定的账号标识"""
+		return f'{self.provider}:{self.api_user}'
+
 	def get_display_name(self, index: int) -> str:
 		"""获取显示名称"""
 		return self.name if self.name else f'Account {index + 1}'
 
 
-def load_accounts_config() -> list[AccountConfig] | None:
-	"""从环境变量加载账号配置"""
+# gzip 文件头
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def validate_account_data(data, index: int) -> str | None:
+	"""校验单个账号配置，返回错误信息（校验通过时返回 None）"""
+	if not isinstance(data, dict):
+		return f'Account {index + 1} configuration format is incorrect'
+
+	if 'cookies' not in data or 'api_user' not in data:
+		return f'Account {index + 1} missing required fields (cookies, api_user)'
+
+	if 'name' in data and not data['name']:
+		return f'Account {index + 1} name field cannot be empty'
+
+	return None
+
+
+class AccountsFile:
+	"""JSON Lines 格式（可 gzip 压缩）的账号文件，每行一个账号，迭代时流式解析而不一次性载入内存"""
+
+	def __init__(self, path: str):
+		self.path = path
+		self.count = 0
+
+	def __len__(self) -> int:
+		return self.count
+
+	def _open(self):
+		with open(self.path, 'rb') as f:
+			compressed = f.read(2) == GZIP_MAGIC
+		if compressed:
+			return gzip.open(self.path, 'rt', encoding='utf-8')
+		return open(self.path, 'r', encoding='utf-8')
+
+	def _iter_lines(self) -> Iterator[tuple[int, str]]:
+		"""逐行读取非空行，返回 (行号, 内容)"""
+		with self._open() as f:
+			for line_number, line in enumerate(f, 1):
+				line = line.strip()
+				if line:
+					yield line_number, line
+
+	def validate(self) -> list[str]:
+		"""流式校验整个文件并统计账号数，返回所有错误（带行号）"""
+		errors = []
+		self.count = 0
+		for line_number, line in self._iter_lines():
+			try:
+				data = json.loads(line)
+			except json.JSONDecodeError as e:
+				errors.append(f'line {line_number}: invalid JSON ({e.msg})')
+				continue
+
+			error = validate_account_data(data, self.count)
+			if error:
+				errors.append(f'line {line_number}: {error}')
+			self.count += 1
+		return errors
+
+	def __iter__(self) -> Iterator['AccountConfig']:
+		for index, (_, line) in enumerate(self._iter_lines()):
+			yield AccountConfig.from_dict(json.loads(line), index)
+
+
+def load_accounts_file(path: str) -> AccountsFile | None:
+	"""校验账号文件，存在错误时一次性输出所有错误"""
+	accounts_file = AccountsFile(path)
+	try:
+		errors = accounts_file.validate()
+	except Exception as e:
+		logger.error(f'Failed to read accounts file {path}: {e}', tag='ERROR')
+		return None
+
+	if errors:
+		logger.error(
+			f'Accounts file {path} has {len(errors)} invalid line(s):\n' + '\n'.join(f'  {error}' for error in errors),
+			tag='ERROR',
+		)
+		return None
+
+	if not accounts_file.count:
+		logger.error(f'Accounts file {path} contains no accounts', tag='ERROR')
+		return None
+
+	return accounts_file
+
+
+def load_accounts_config() -> list[AccountConfig] | AccountsFile | None:
+	"""加载账号配置：设置了 ANYROUTER_ACCOUNTS_FILE 时使用账号文件，否则从环境变量加载"""
+	accounts_path = os.getenv('ANYROUTER_ACCOUNTS_FILE', '').strip()
+	if accounts_path:
+		return load_accounts_file(accounts_path)
+
 	accounts_str = os.getenv('ANYROUTER_ACCOUNTS')
 	if not accounts_str:
-		print('ERROR: ANYROUTER_ACCOUNTS environment variable not found')
+		logger.error('ANYROUTER_ACCOUNTS environment variable not found', tag='ERROR')
 		return None
 
 	try:
 		accounts_data = json.loads(accounts_str)
 
 		if not isinstance(accounts_data, list):
-			print('ERROR: Account configuration must use array format [{}]')
+			logger.error('Account configuration must use array format [{}]', tag='ERROR')
 			return None
 
 		accounts = []
 		for i, account_dict in enumerate(accounts_data):
-			if not isinstance(account_dict, dict):
-				print(f'ERROR: Account {i + 1} configuration format is incorrect')
-				return None
-
-			if 'cookies' not in account_dict or 'api_user' not in account_dict:
-				print(f'ERROR: Account {i + 1} missing required fields (cookies, api_user)')
-				return None
-
-			if 'name' in account_dict and not account_dict['name']:
-				print(f'ERROR: Account {i + 1} name field cannot be empty')
+			error = validate_account_data(account_dict, i)
+			if error:
+				logger.error(f'{error}', tag='ERROR')
 				return None
 
 			accounts.append(AccountConfig.from_dict(account_dict, i))
 
 		return accounts
 	except Exception as e:
-		print(f'ERROR: Account configuration format is incorrect: {e}')
+		logger.error(f'Account configuration format is incorrect: {e}', tag='ERROR')
 		return None
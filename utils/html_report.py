@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+HTML 邮件报告渲染
+
+模板在首次使用时按 {{slot}} 拆分为静态片段并缓存，渲染时只向列表追加片段并在最后一次性拼接。
+账号较多时可使用精简模式（失败与余额变化账号显示完整卡片，其余账号折叠为表格），
+并限制邮件大小，避免邮件服务商截断或拒收。
+"""
+
+import os
+import re
+from functools import lru_cache
+from html import escape
+from typing import Literal
+
+from utils.log import get_logger
+from utils.result import RunResult, balance_line
+
+logger = get_logger(__name__)
+
+HtmlMode = Literal['full', 'compact']
+HTML_MODES = ('full', 'compact')
+
+# 默认邮件大小上限（字节），Gmail 会截断超过约 102KB 的邮件
+DEFAULT_EMAIL_MAX_BYTES = 100_000
+
+# 为截断提示预留的字节数
+TRUNCATION_NOTE_RESERVE = 256
+
+SLOT = re.compile(r'\{\{(\w+)\}\}')
+
+EMAIL_STYLE = """
+		* { margin: 0; padding: 0; box-sizing: border-box; }
+		body {
+			font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
+			background-color: #f5f7fa;
+			padding: 20px;
+			line-height: 1.6;
+		}
+		.email-container {
+			max-width: 600px;
+			margin: 0 auto;
+			background-color: #ffffff;
+			border-radius: 12px;
+			overflow: hidden;
+			box-shadow: 0 2px 8px rgba(0, 0, 0, 0.08);
+		}
+		.email-header {
+			background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+			color: white;
+			padding: 30px;
+			text-align: center;
+		}
+		.email-header h1 {
+			font-size: 24px;
+			font-weight: 600;
+			margin-bottom: 8px;
+		}
+		.email-header p {
+			font-size: 14px;
+			opacity: 0.9;
+		}
+		.email-content {
+			padding: 24px;
+		}
+		.account-card {
+			background-color: #fafafa;
+			border: 1px solid #e5e7eb;
+			border-radius: 8px;
+			padding: 16px;
+			margin-bottom: 12px;
+			transition: box-shadow 0.2s;
+		}
+		.account-card:hover {
+			box-shadow: 0 2px 4px rgba(0, 0, 0, 0.05);
+		}
+		.account-header {
+			display: flex;
+			justify-content: space-between;
+			align-items: center;
+			margin-bottom: 8px;
+		}
+		.account-name {
+			font-size: 16px;
+			font-weight: 600;
+			color: #1f2937;
+		}
+		.status-badge {
+			display: inline-block;
+			padding: 4px 12px;
+			border-radius: 20px;
+			font-size: 12px;
+			font-weight: 600;
+		}
+		.balance-info {
+			font-size: 14px;
+			color: #6b7280;
+			margin-top: 4px;
+		}
+		.stats-section {
+			background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
+			border-radius: 8px;
+			padding: 20px;
+			margin-top: 20px;
+			color: white;
+		}
+		.stats-grid {
+			display: grid;
+			grid-template-columns: repeat(3, 1fr);
+			gap: 16px;
+			text-align: center;
+		}
+		.stat-item {
+			background-color: rgba(255, 255, 255, 0.2);
+			border-radius: 8px;
+			padding: 12px;
+		}
+		.stat-label {
+			font-size: 12px;
+			opacity: 0.9;
+			margin-bottom: 4px;
+		}
+		.stat-value {
+			font-size: 24px;
+			font-weight: 700;
+		}
+		.email-footer {
+			background-color: #f9fafb;
+			padding: 20px;
+			text-align: center;
+			font-size: 12px;
+			color: #9ca3af;
+			border-top: 1px solid #e5e7eb;
+		}
+		.summary-table {
+			width: 100%;
+			border-collapse: collapse;
+			font-size: 13px;
+			color: #374151;
+			margin-top: 8px;
+		}
+		.summary-table th, .summary-table td {
+			text-align: left;
+			padding: 4px 8px;
+			border-bottom: 1px solid #e5e7eb;
+		}
+		.summary-section summary {
+			cursor: pointer;
+			font-size: 14px;
+			font-weight: 600;
+			color: #1f2937;
+			margin: 8px 0;
+		}
+		.truncated {
+			text-align: center;
+			font-size: 13px;
+			color: #9ca3af;
+			padding: 12px;
+		}
+"""
+
+PAGE_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+	<meta charset="UTF-8">
+	<meta name="viewport" content="width=device-width, initial-scale=1.0">
+	<style>{{style}}</style>
+</head>
+<body>
+	<div class="email-container">
+		<div class="email-header">
+			<h1>{{title}}</h1>
+			<p>{{time}}</p>
+		</div>
+
+		<div class="email-content">
+			{{content}}
+
+			<div class="stats-section">
+				<div class="stats-grid">
+					<div class="stat-item">
+						<div class="stat-label">总计</div>
+						<div class="stat-value">{{total}}</div>
+					</div>
+					<div class="stat-item">
+						<div class="stat-label">成功</div>
+						<div class="stat-value">{{success}}</div>
+					</div>
+					<div class="stat-item">
+						<div class="stat-label">失败</div>
+						<div class="stat-value">{{failed}}</div>
+					</div>
+				</div>
+			</div>
+		</div>
+
+		<div class="email-footer">
+			<p>此邮件由 AnyRouter 自动签到系统发送</p>
+			<p style="margin-top: 4px;">Powered by Claude Code & GitHub Actions</p>
+		</div>
+	</div>
+</body>
+</html>"""
+
+CARD_TEMPLATE = """
+		<div class="account-card">
+			<div class="account-header">
+				<span class="account-name">{{name}}</span>
+				<span class="status-badge" style="background-color: {{background}}; color: {{color}};">
+					{{icon}} {{status}}
+				</span>
+			</div>
+			{{details}}
+		</div>"""
+
+EMPTY_CONTENT = '<p style="text-align: center; color: #9ca3af; padding: 20px;">暂无账号信息</p>'
+
+# 状态 -> (文字颜色, 背景色, 图标, 文字)
+STATUS_STYLES = {
+	'success': ('#10b981', '#d1fae5', '✓', '签到成功'),
+	'error': ('#ef4444', '#fee2e2', '✗', '签到失败'),
+}
+DEFAULT_STATUS_STYLE = ('#6b7280', '#f3f4f6', '✗', '签到失败')
+
+
+class CompiledTemplate:
+	"""按 {{slot}} 预先拆分的模板，渲染时交替追加静态片段与取值"""
+
+	def __init__(self, source: str):
+		pieces = SLOT.split(source)
+		self.static = pieces[0::2]
+		self.slots = pieces[1::2]
+
+	def render_into(self, parts: list[str], values: dict[str, str]):
+		for static, slot in zip(self.static, self.slots, strict=False):
+			parts.append(static)
+			parts.append(values[slot])
+		parts.append(self.static[-1])
+
+	def render(self, values: dict[str, str]) -> str:
+		parts: list[str] = []
+		self.render_into(parts, values)
+		return ''.join(parts)
+
+
+def minify(source: str) -> str:
+	"""去除行首缩进与换行（精简模式）"""
+	return ''.join(line.strip() for line in source.splitlines())
+
+
+@lru_cache(maxsize=2)
+def compiled_templates(compact: bool) -> tuple[CompiledTemplate, CompiledTemplate, CompiledTemplate]:
+	"""编译并缓存页面外壳（head、header 与统计之间以 content 为界拆成两段）与账号卡片模板"""
+	page = PAGE_TEMPLATE.replace('{{style}}', EMAIL_STYLE)
+	card = CARD_TEMPLATE
+	if compact:
+		page, card = minify(page), minify(card)
+	head, tail = page.split('{{content}}')
+	return CompiledTemplate(head), CompiledTemplate(tail), CompiledTemplate(card)
+
+
+def load_html_mode() -> HtmlMode:
+	"""从环境变量加载 HTML 邮件模式：full（完整卡片，超过大小上限时自动精简）或 compact"""
+	mode = os.getenv('EMAIL_HTML_MODE', '').strip().lower() or 'full'
+	if mode not in HTML_MODES:
+		logger.warning(f'Invalid EMAIL_HTML_MODE value "{mode}", using "full"')
+		return 'full'
+	return mode
+
+
+def load_max_bytes() -> int:
+	"""从环境变量加载 HTML 邮件大小上限（字节），0 表示不限制"""
+	value_str = os.getenv('EMAIL_MAX_BYTES', '').strip()
+	if not value_str:
+		return DEFAULT_EMAIL_MAX_BYTES
+	try:
+		return max(0, int(value_str))
+	except ValueError:
+		logger.warning(f'Invalid EMAIL_MAX_BYTES value "{value_str}", using default {DEFAULT_EMAIL_MAX_BYTES}')
+		return DEFAULT_EMAIL_MAX_BYTES
+
+
+def account_details(account: dict) -> str:
+	details = []
+	if account.get('balance'):
+		details.append(f'<div class="balance-info">💰 {escape(account["balance"])}</div>')
+	if account.get('detail'):
+		details.append(f'<div class="balance-info">{escape(account["detail"])}</div>')
+	return ''.join(details)
+
+
+def card_values(account: dict) -> dict[str, str]:
+	color, background, icon, status = STATUS_STYLES.get(account['status'], DEFAULT_STATUS_STYLE)
+	return {
+		'name': escape(account['name']),
+		'background': background,
+		'color': color,
+		'icon': icon,
+		'status': status,
+		'details': account_details(account),
+	}
+
+
+def table_row(account: dict) -> str:
+	return f'<tr><td>{escape(account["name"])}</td><td>{escape(account.get("balance", ""))}</td></tr>'
+
+
+def render_page(
+	title: str,
+	time_str: str,
+	accounts: list[dict],
+	counts: tuple[int, int, int],
+	compact: bool,
+	max_bytes: int,
+) -> tuple[str, bool]:
+	"""渲染一次页面，返回 (HTML, 是否因大小上限省略了账号)"""
+	head, tail, card = compiled_templates(compact)
+	total_count, success_count, fail_count = counts
+	page_values = {
+		'title': escape(title),
+		'time': escape(time_str),
+		'total': str(total_count),
+		'success': str(success_count),
+		'failed': str(fail_count),
+	}
+
+	parts: list[str] = []
+	head.render_into(parts, page_values)
+	tail_html = tail.render(page_values)
+	budget = max_bytes - TRUNCATION_NOTE_RESERVE if max_bytes else None
+	size = sum(len(part.encode('utf-8')) for part in parts) + len(tail_html.encode('utf-8'))
+
+	def fits(fragment: str) -> bool:
+		nonlocal size
+		fragment_size = len(fragment.encode('utf-8'))
+		if budget is not None and size + fragment_size > budget:
+			return False
+		size += fragment_size
+		return True
+
+	# 精简模式下可折叠的账号（没有余额变化的正常账号）放入表格，其余账号显示完整卡片
+	cards = [account for account in accounts if not (compact and account.get('collapsible'))]
+	rows = [account for account in accounts if compact and account.get('collapsible')]
+	shown = 0
+	for account in cards:
+		fragment = card.render(card_values(account))
+		if not fits(fragment):
+			break
+		parts.append(fragment)
+		shown += 1
+
+	table_head = (
+		f'<details class="summary-section"><summary>其余 {len(rows)} 个账号</summary>'
+		'<table class="summary-table"><tr><th>账号</th><th>余额</th></tr>'
+	)
+	table_tail = '</table></details>'
+	if rows and shown == len(cards) and fits(table_head + table_tail):
+		parts.append(table_head)
+		for account in rows:
+			row = table_row(account)
+			if not fits(row):
+				break
+			parts.append(row)
+			shown += 1
+		parts.append(table_tail)
+
+	omitted = len(accounts) - shown
+	if omitted:
+		parts.append(f'<p class="truncated">还有 {omitted} 个账号因邮件大小限制未显示，完整结果见运行日志</p>')
+	elif not accounts:
+		parts.append(EMPTY_CONTENT)
+
+	parts.append(tail_html)
+	return ''.join(parts), omitted > 0
+
+
+def render_email_html(
+	title: str,
+	time_str: str,
+	accounts: list[dict],
+	total_count: int,
+	success_count: int,
+	fail_count: int,
+	mode: HtmlMode | None = None,
+	max_bytes: int | None = None,
+) -> str:
+	"""生成 HTML 邮件，accounts 中每项包含 name、status（success/error），可选 balance、detail 与 collapsible
+
+	完整模式超过大小上限时自动改用精简模式，精简模式仍然超过上限时省略末尾的账号并注明数量。
+	"""
+	mode = load_html_mode() if mode is None else mode
+	max_bytes = load_max_bytes() if max_bytes is None else max_bytes
+	counts = (total_count, success_count, fail_count)
+
+	if mode == 'full':
+		html, truncated = render_page(title, time_str, accounts, counts, False, max_bytes)
+		if not truncated:
+			return html
+	return render_page(title, time_str, accounts, counts, True, max_bytes)[0]
+
+
+def format_run_html(title: str, run: RunResult, mode: HtmlMode | None = None, max_bytes: int | None = None) -> str:
+	"""直接从签到结果渲染 HTML 邮件"""
+	accounts = [{'name': error, 'status': 'error'} for error in run.errors]
+	for account in run.failures:
+		balance = f'Current balance: ${account.quota}, Used: ${account.used_quota}' if account.has_balance else ''
+		accounts.append(
+			{'name': account.name, 'status': 'error', 'balance': balance, 'detail': account.exception or account.error}
+		)
+	for account in run.balances:
+		# 首次记录余额的账号（没有变化量）在精简模式下折叠
+		accounts.append(
+			{
+				'name': account.name,
+				'status': 'success',
+				'balance': balance_line(account),
+				'collapsible': account.change is None,
+			}
+		)
+	return render_email_html(
+		title, run.execution_time, accounts, run.total_count, run.success_count, run.failed_count, mode, max_bytes
+	)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+HTTP 连接池模块
+"""
+
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+
+import httpx
+
+
+def build_cookie_header(cookies: dict) -> str:
+	"""将 cookies 字典转换为 Cookie 请求头"""
+	return '; '.join(f'{name}={value}' for name, value in cookies.items())
+
+
+class HttpClientPool:
+	"""按 provider 域名复用的 httpx.AsyncClient，多个账号通过少量 HTTP/2 连接多路复用
+
+	客户端的 cookie jar 拒绝保存任何 cookie，账号 cookies 通过每个请求的 Cookie 头传递，
+	避免不同账号之间共享服务端下发的 cookie。
+	"""
+
+	def __init__(self, **client_kwargs):
+		self._client_kwargs = {
+			'http2': True,
+			'timeout': 30.0,
+			'limits': httpx.Limits(max_connections=10, max_keepalive_connections=10),
+			**client_kwargs,
+		}
+		self._clients: dict[str, httpx.AsyncClient] = {}
+
+	def get(self, domain: str) -> httpx.AsyncClient:
+		"""获取指定域名的共享客户端，首次使用时创建"""
+		client = self._clients.get(domain)
+		if client is None:
+			isolated_jar = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+			client = httpx.AsyncClient(cookies=isolated_jar, **self._client_kwargs)
+			self._clients[domain] = client
+		return client
+
+	async def aclose(self):
+		"""关闭所有客户端"""
+		clients = list(self._clients.values())
+		self._clients.clear()
+		for client in clients:
+			await client.aclose()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+签到账本模块
+
+记录每个账号最近一次成功签到的时间及服务端的下一次重置时间，
+同一签到周期内的后续运行可以跳过签到请求。
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from datetime import time as dtime
+from typing import Literal
+
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# 服务端每日签到重置时间，默认北京时间零点
+DEFAULT_RESET_AT = '00:00+08:00'
+
+LedgerMode = Literal['balance', 'skip', 'off']
+LEDGER_MODES = ('balance', 'skip', 'off')
+
+
+def load_reset_at() -> dtime:
+	"""从环境变量加载每日重置时间（HH:MM，可带 UTC 偏移，如 00:00+08:00；不带偏移时按本机时区）"""
+	reset_at_str = os.getenv('CHECKIN_RESET_AT', '').strip() or DEFAULT_RESET_AT
+	try:
+		return dtime.fromisoformat(reset_at_str)
+	except ValueError:
+		logger.warning(f'Invalid CHECKIN_RESET_AT value "{reset_at_str}", using {DEFAULT_RESET_AT}')
+		return dtime.fromisoformat(DEFAULT_RESET_AT)
+
+
+def load_ledger_mode() -> LedgerMode:
+	"""从环境变量加载已签到账号的处理方式：balance（只读取余额）、skip（完全跳过）、off（不使用账本）"""
+	mode = os.getenv('CHECKIN_LEDGER_MODE', '').strip().lower() or 'balance'
+	if mode not in LEDGER_MODES:
+		logger.warning(f'Invalid CHECKIN_LEDGER_MODE value "{mode}", using "balance"')
+		return 'balance'
+	return mode
+
+
+def next_reset_after(timestamp: float, reset_at: dtime) -> float:
+	"""计算指定时间之后的下一次每日重置时间"""
+	moment = datetime.fromtimestamp(timestamp).astimezone(reset_at.tzinfo)
+	boundary = moment.replace(hour=reset_at.hour, minute=reset_at.minute, second=0, microsecond=0)
+	if boundary <= moment:
+		boundary += timedelta(days=1)
+	return boundary.timestamp()
+
+
+class CheckInLedger:
+	"""按账号记录最近一次成功签到时间与下一次重置时间的 JSON 账本"""
+
+	def __init__(self, path: str):
+		self.path = path
+		self.reset_at = load_reset_at()
+		self.mode = load_ledger_mode()
+		self._entries: dict[str, dict] = {}
+		self.updates: dict[str, dict] = {}  # 本次运行新记录的条目
+		self._dirty = False
+
+	def load(self):
+		"""从磁盘重新加载账本及其配置"""
+		self.reset_at = load_reset_at()
+		self.mode = load_ledger_mode()
+		self._entries = {}
+		self.updates = {}
+		self._dirty = False
+		try:
+			if os.path.exists(self.path):
+				with open(self.path, 'r', encoding='utf-8') as f:
+					data = json.load(f)
+				if isinstance(data, dict):
+					self._entries = data
+		except Exception as e:
+			logger.warning(f'Failed to load check-in ledger: {e}')
+
+	def save(self):
+		"""有变更时原子写入账本"""
+		if not self._dirty:
+			return
+		try:
+			temp_path = f'{self.path}.tmp'
+			with open(temp_path, 'w', encoding='utf-8') as f:
+				json.dump(self._entries, f, indent=2)
+			os.replace(temp_path, self.path)
+			self._dirty = False
+		except Exception as e:
+			logger.warning(f'Failed to save check-in ledger: {e}')
+
+	def checked_in_at(self, account_key: str, now: float | None = None) -> float | None:
+		"""账号在当前签到周期内已成功签到时返回签到时间，否则（或账本已关闭时）返回 None"""
+		if self.mode == 'off':
+			return None
+
+		entry = self._entries.get(account_key)
+		if not isinstance(entry, dict):
+			return None
+
+		now = time.time() if now is None else now
+		if now >= entry.get('next_reset_at', 0):
+			return None
+		return entry.get('checked_in_at')
+
+	def record(self, account_key: str, now: float | None = None):
+		"""记录一次成功签到"""
+		now = time.time() if now is None else now
+		self.apply({account_key: {'checked_in_at': now, 'next_reset_at': next_reset_after(now, self.reset_at)}})
+
+	def apply(self, updates: dict[str, dict]):
+		"""写入其他进程记录的条目（进程池模式下由父进程统一保存）"""
+		if updates:
+			self._entries.update(updates)
+			self.updates.update(updates)
+			self._dirty = True
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+日志模块
+
+所有日志经 QueueHandler 放入队列，由后台 QueueListener 线程写出，记录日志不会阻塞事件循环。
+控制台默认输出 [TAG] message 的可读格式；LOG_FORMAT=json 时输出 JSON Lines，
+LOG_FILE 可额外写入一份 JSON Lines 日志文件。每条记录自动带上当前账号与 provider。
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Literal
+
+LogFormat = Literal['console', 'json']
+LOG_FORMATS = ('console', 'json')
+
+# 各级别默认的控制台标签（与原有输出保持一致）
+DEFAULT_TAGS = {
+	logging.DEBUG: 'DEBUG',
+	logging.INFO: 'INFO',
+	logging.WARNING: 'WARNING',
+	logging.ERROR: 'FAILED',
+	logging.CRITICAL: 'FAILED',
+}
+
+# 第三方库的请求级日志过于详细，只保留警告及以上
+QUIET_LOGGERS = ('httpx', 'httpcore', 'asyncio')
+
+# 当前协程所处理账号的日志上下文（account、provider），asyncio 任务创建时会复制上下文
+log_context: ContextVar[dict[str, Any]] = ContextVar('log_context', default={})
+
+_listener: QueueListener | None = None
+
+
+class TaggedLogger(logging.LoggerAdapter):
+	"""支持 tag 与任意结构化字段的日志接口：logger.info('message', tag='SUCCESS', quota=1.5)"""
+
+	def process(self, msg, kwargs):
+		extra = kwargs.pop('extra', None) or {}
+		tag = kwargs.pop('tag', None)
+		fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in ('exc_info', 'stack_info', 'stacklevel')}
+		kwargs['extra'] = {**extra, 'tag': tag, 'fields': fields}
+		return msg, kwargs
+
+
+def get_logger(name: str) -> TaggedLogger:
+	return TaggedLogger(logging.getLogger(name), {})
+
+
+class ContextFilter(logging.Filter):
+	"""在记录日志的线程中合并账号上下文字段（队列另一端的线程无法读取 ContextVar）"""
+
+	def filter(self, record: logging.LogRecord) -> bool:
+		fields = getattr(record, 'fields', None) or {}
+		context = log_context.get()
+		record.fields = {**context, **fields} if context else fields
+		return True
+
+
+class ConsoleFormatter(logging.Formatter):
+	"""[TAG] message 的可读格式；tag 为空字符串时原样输出消息（如多行通知内容）"""
+
+	def format(self, record: logging.LogRecord) -> str:
+		message = record.getMessage()
+		tag = getattr(record, 'tag', None)
+		if tag is None:
+			tag = DEFAULT_TAGS.get(record.levelno, record.levelname)
+		line = f'[{tag}] {message}' if tag else message
+		if record.exc_info and not record.exc_text:
+			record.exc_text = self.formatException(record.exc_info)
+		return f'{line}\n{record.exc_text}' if record.exc_text else line
+
+
+class JsonFormatter(logging.Formatter):
+	"""每条记录一行 JSON：时间、级别、logger、tag、消息与结构化字段"""
+
+	def format(self, record: logging.LogRecord) -> str:
+		data = {
+			'ts': datetime.fromtimestamp(record.created).astimezone().isoformat(timespec='milliseconds'),
+			'level': record.levelname.lower(),
+			'logger': record.name,
+			'tag': getattr(record, 'tag', None) or DEFAULT_TAGS.get(record.levelno, record.levelname),
+			'message': record.getMessage(),
+		}
+		data.update(getattr(record, 'fields', None) or {})
+		if record.exc_info and not record.exc_text:
+			record.exc_text = self.formatException(record.exc_info)
+		if record.exc_text:
+			data['exception'] = record.exc_text
+		return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class BufferedQueueHandler(QueueHandler):
+	"""只在调用线程中合并消息参数与异常文本，格式化交给监听线程中的各个 handler"""
+
+	def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+		record.msg = record.getMessage()
+		record.args = None
+		if record.exc_info:
+			record.exc_text = logging.Formatter().formatException(record.exc_info)
+			record.exc_info = None
+		return record
+
+
+def load_log_format() -> LogFormat:
+	"""从环境变量加载控制台日志格式：console（默认）或 json"""
+	log_format = os.getenv('LOG_FORMAT', '').strip().lower() or 'console'
+	if log_format not in LOG_FORMATS:
+		print(f'[WARNING] Invalid LOG_FORMAT value "{log_format}", using "console"', file=sys.stderr)
+		return 'console'
+	return log_format
+
+
+def load_log_level() -> int:
+	"""从环境变量加载日志级别，默认 INFO"""
+	level_name = os.getenv('LOG_LEVEL', '').strip().upper() or 'INFO'
+	level = logging.getLevelName(level_name)
+	if not isinstance(level, int):
+		print(f'[WARNING] Invalid LOG_LEVEL value "{level_name}", using "INFO"', file=sys.stderr)
+		return logging.INFO
+	return level
+
+
+def setup_logging():
+	"""配置根 logger：队列 handler + 后台监听线程写出到控制台（及 LOG_FILE），重复调用时先停止旧的监听线程"""
+	global _listener
+	shutdown_logging()
+
+	console = logging.StreamHandler(sys.stdout)
+	console.setFormatter(JsonFormatter() if load_log_format() == 'json' else ConsoleFormatter())
+	handlers: list[logging.Handler] = [console]
+
+	log_file = os.getenv('LOG_FILE', '').strip()
+	if log_file:
+		file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
+		file_handler.setFormatter(JsonFormatter())
+		handlers.append(file_handler)
+
+	log_queue: queue.SimpleQueue = queue.SimpleQueue()
+	queue_handler = BufferedQueueHandler(log_queue)
+	queue_handler.addFilter(ContextFilter())
+
+	root = logging.getLogger()
+	for handler in list(root.handlers):
+		if isinstance(handler, BufferedQueueHandler):
+			root.removeHandler(handler)
+	root.addHandler(queue_handler)
+	root.setLevel(load_log_level())
+	for name in QUIET_LOGGERS:
+		logging.getLogger(name).setLevel(logging.WARNING)
+
+	_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+	_listener.start()
+
+
+def shutdown_logging():
+	"""停止监听线程并写出队列中剩余的日志"""
+	global _listener
+	if _listener is not None:
+		_listener.stop()
+		for handler in _listener.handlers:
+			handler.close()
+		_listener = None
+
+
+atexit.register(shutdown_logging)
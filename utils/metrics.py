@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Prometheus 指标模块
+
+不依赖 prometheus_client 的最小实现：计数器、仪表与直方图，按 Prometheus 文本格式输出。
+单次运行结束后写入 node-exporter textfile（METRICS_TEXTFILE），
+常驻模式下可通过本地 HTTP 端点 /metrics 暴露（METRICS_PORT）。
+"""
+
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# 默认直方图分桶（秒）
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+INF_BUCKET = 'le="+Inf"'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def escape_label_value(value: str) -> str:
+	return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value: float) -> str:
+	if math.isinf(value):
+		return '+Inf' if value > 0 else '-Inf'
+	return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def format_labels(labelnames: tuple[str, ...], labelvalues: tuple[str, ...], extra: str = '') -> str:
+	pairs = [f'{name}="{escape_label_value(value)}"' for name, value in zip(labelnames, labelvalues, strict=True)]
+	if extra:
+		pairs.append(extra)
+	return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric(ABC):
+	"""指标基类：按标签取值保存样本，更新与读取之间用锁保护（/metrics 在另一个线程中读取）"""
+
+	type_name = ''
+
+	def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+		self.name = name
+		self.documentation = documentation
+		self.labelnames = tuple(labelnames)
+		self._values: dict[tuple[str, ...], object] = {}
+		self._lock = threading.Lock()
+
+	def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+		if set(labels) != set(self.labelnames):
+			raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+		return tuple(str(labels[name]) for name in self.labelnames)
+
+	@abstractmethod
+	def samples(self) -> Iterator[str]:
+		"""按 Prometheus 文本格式逐行输出样本"""
+
+	def render(self) -> Iterator[str]:
+		yield f'# HELP {self.name} {self.documentation}'
+		yield f'# TYPE {self.name} {self.type_name}'
+		yield from self.samples()
+
+	def snapshot(self) -> dict[tuple[str, ...], object]:
+		with self._lock:
+			return {key: list(value) if isinstance(value, list) else value for key, value in self._values.items()}
+
+	def clear(self):
+		with self._lock:
+			self._values.clear()
+
+
+class Counter(Metric):
+	type_name = 'counter'
+
+	def inc(self, amount: float = 1.0, **labels: str):
+		key = self._key(labels)
+		with self._lock:
+			self._values[key] = self._values.get(key, 0.0) + amount
+
+	def samples(self) -> Iterator[str]:
+		for key, value in sorted(self.snapshot().items()):
+			yield f'{self.name}{format_labels(self.labelnames, key)} {format_value(value)}'
+
+	def merge(self, values: dict):
+		with self._lock:
+			for key, value in values.items():
+				self._values[key] = self._values.get(key, 0.0) + value
+
+
+class Gauge(Metric):
+	type_name = 'gauge'
+
+	def set(self, value: float, **labels: str):
+		key = self._key(labels)
+		with self._lock:
+			self._values[key] = float(value)
+
+	def samples(self) -> Iterator[str]:
+		for key, value in sorted(self.snapshot().items()):
+			yield f'{self.name}{format_labels(self.labelnames, key)} {format_value(value)}'
+
+	def merge(self, values: dict):
+		with self._lock:
+			self._values.update(values)
+
+
+class Histogram(Metric):
+	"""直方图：每组标签保存 [各分桶计数..., 总和, 总数]"""
+
+	type_name = 'histogram'
+
+	def __init__(
+		self,
+		name: str,
+		documentation: str,
+		labelnames: tuple[str, ...] = (),
+		buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+	):
+		super().__init__(name, documentation, labelnames)
+		self.buckets = tuple(sorted(buckets))
+
+	def observe(self, value: float, **labels: str):
+		key = self._key(labels)
+		with self._lock:
+			state = self._values.get(key)
+			if state is None:
+				state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+			for i, bound in enumerate(self.buckets):
+				if value <= bound:
+					state[i] += 1
+			state[-2] += value
+			state[-1] += 1
+
+	@contextmanager
+	def time(self, **labels: str):
+		"""记录代码块的耗时（包括抛出异常的情况）"""
+		started_at = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.observe(time.perf_counter() - started_at, **labels)
+
+	def samples(self) -> Iterator[str]:
+		for key, state in sorted(self.snapshot().items()):
+			for bound, count in zip(self.buckets, state, strict=False):
+				labels = format_labels(self.labelnames, key, f'le="{format_value(bound)}"')
+				yield f'{self.name}_bucket{labels} {count}'
+			yield f'{self.name}_bucket{format_labels(self.labelnames, key, INF_BUCKET)} {state[-1]}'
+			yield f'{self.name}_sum{format_labels(self.labelnames, key)} {format_value(state[-2])}'
+			yield f'{self.name}_count{format_labels(self.labelnames, key)} {state[-1]}'
+
+	def merge(self, values: dict):
+		with self._lock:
+			for key, other in values.items():
+				state = self._values.get(key)
+				if state is None:
+					self._values[key] = list(other)
+				else:
+					self._values[key] = [a + b for a, b in zip(state, other, strict=True)]
+
+
+class Registry:
+	"""指标注册表：按注册顺序输出，支持在进程之间传递快照并合并"""
+
+	def __init__(self):
+		self._metrics: dict[str, Metric] = {}
+
+	def register(self, metric: Metric) -> Metric:
+		self._metrics[metric.name] = metric
+		return metric
+
+	def render(self) -> str:
+		lines = [line for metric in self._metrics.values() for line in metric.render()]
+		return '\n'.join(lines) + '\n'
+
+	def snapshot(self) -> dict[str, dict]:
+		"""可 pickle 的样本快照，用于从进程池 worker 回传父进程"""
+		return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+	def merge(self, snapshot: dict[str, dict]):
+		"""合并其他进程的快照：计数器与直方图累加，仪表取快照中的值"""
+		for name, values in snapshot.items():
+			metric = self._metrics.get(name)
+			if metric is not None:
+				metric.merge(values)
+
+	def clear(self):
+		for metric in self._metrics.values():
+			metric.clear()
+
+	def write_textfile(self, path: str):
+		"""原子写入 node-exporter textfile，避免采集到写了一半的文件"""
+		try:
+			# 进程池模式与分片运行可能同时写入，临时文件按进程区分
+			temp_path = f'{path}.{os.getpid()}.tmp'
+			with open(temp_path, 'w', encoding='utf-8') as f:
+				f.write(self.render())
+			os.replace(temp_path, path)
+			logger.info(f'Metrics written to {path}')
+		except Exception as e:
+			logger.warning(f'Failed to write metrics textfile: {e}')
+
+
+registry = Registry()
+
+checkins_total = registry.register(
+	Counter('anyrouter_checkins_total', 'Account check-ins by provider and outcome.', ('provider', 'outcome'))
+)
+waf_acquisitions_total = registry.register(
+	Counter('anyrouter_waf_acquisitions_total', 'WAF cookie acquisitions by domain and outcome.', ('domain', 'outcome'))
+)
+waf_acquisition_seconds = registry.register(
+	Histogram(
+		'anyrouter_waf_acquisition_duration_seconds',
+		'Time spent acquiring WAF cookies.',
+		('domain',),
+		buckets=(0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0),
+	)
+)
+waf_cookie_lookups_total = registry.register(
+	Counter(
+		'anyrouter_waf_cookie_lookups_total',
+		'WAF cookie lookups by source (shared, disk_cache, inflight, miss).',
+		('result',),
+	)
+)
+http_requests_total = registry.register(
+	Counter(
+		'anyrouter_http_requests_total',
+		'HTTP requests by provider, endpoint and status.',
+		('provider', 'endpoint', 'status'),
+	)
+)
+http_request_seconds = registry.register(
+	Histogram(
+		'anyrouter_http_request_duration_seconds',
+		'HTTP request latency by provider and endpoint.',
+		('provider', 'endpoint'),
+	)
+)
+notifications_total = registry.register(
+	Counter('anyrouter_notifications_total', 'Notification pushes by channel and outcome.', ('channel', 'outcome'))
+)
+account_quota = registry.register(
+	Gauge('anyrouter_account_quota_dollars', 'Current account balance.', ('provider', 'api_user', 'account'))
+)
+account_used_quota = registry.register(
+	Gauge('anyrouter_account_used_quota_dollars', 'Account quota used so far.', ('provider', 'api_user', 'account'))
+)
+last_run_timestamp = registry.register(
+	Gauge('anyrouter_last_run_timestamp_seconds', 'Unix time at which the last check-in cycle finished.')
+)
+last_run_seconds = registry.register(
+	Gauge('anyrouter_last_run_duration_seconds', 'Duration of the last check-in cycle.')
+)
+
+
+def load_metrics_textfile() -> str | None:
+	"""从环境变量加载 textfile 路径（node-exporter 要求 .prom 后缀），未设置时不写出"""
+	return os.getenv('METRICS_TEXTFILE', '').strip() or None
+
+
+def load_metrics_port() -> int | None:
+	"""从环境变量加载 /metrics 端点端口，未设置或无效时不启动"""
+	port_str = os.getenv('METRICS_PORT', '').strip()
+	if not port_str:
+		return None
+	try:
+		port = int(port_str)
+	except ValueError:
+		logger.warning(f'Invalid METRICS_PORT value "{port_str}", metrics endpoint disabled')
+		return None
+	if not 0 < port < 65536:
+		logger.warning(f'METRICS_PORT must be between 1 and 65535, got {port}, metrics endpoint disabled')
+		return None
+	return port
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+	registry = registry
+
+	def do_GET(self):
+		if self.path.split('?', 1)[0] != '/metrics':
+			self.send_error(404)
+			return
+		body = self.registry.render().encode('utf-8')
+		self.send_response(200)
+		self.send_header('Content-Type', CONTENT_TYPE)
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+
+class MetricsServer:
+	"""在后台线程中提供 /metrics 端点（默认只监听本机）"""
+
+	def __init__(self, port: int, host: str = '127.0.0.1'):
+		self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+		self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+	@property
+	def port(self) -> int:
+		return self._server.server_address[1]
+
+	def start(self):
+		self._thread.start()
+		logger.info(f'Serving metrics on http://127.0.0.1:{self.port}/metrics')
+
+	def stop(self):
+		self._server.shutdown()
+		self._server.server_close()
+
+
+def start_metrics_server() -> MetricsServer | None:
+	"""配置了 METRICS_PORT 时启动 /metrics 端点，端口被占用等错误只记录警告"""
+	port = load_metrics_port()
+	if port is None:
+		return None
+	try:
+		server = MetricsServer(port)
+	except OSError as e:
+		logger.warning(f'Failed to start metrics endpoint on port {port}: {e}')
+		return None
+	server.start()
+	return server
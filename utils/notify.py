@@ -1,10 +1,23 @@
+import asyncio
+import functools
 import os
 import smtplib
+from collections.abc import Awaitable, Callable
 from email.mime.text import MIMEText
 from typing import Literal
 
 import httpx
 
+from utils.channel_limits import CHANNEL_LIMITS, ChannelLimits, TokenBucket, split_for_channel
+from utils.html_report import format_run_html, render_email_html
+from utils.log import get_logger
+from utils.metrics import notifications_total
+from utils.result import RunResult
+from utils.smtp_transport import SMTP_TRANSPORTS, SmtpTransportCache, parse_recipients
+from utils.timing import PhaseTimer
+
+logger = get_logger(__name__)
+
 
 def format_html_email(title: str, content: str, execution_time: str) -> str:
 	"""将纯文本内容格式化为现代化的HTML邮件"""
@@ -60,41 +73,6 @@ def format_html_email(title: str, content: str, execution_time: str) -> str:
 			if current_section:
 				current_section['balance'] = balance_info
 
-	# 生成状态颜色和图标
-	def get_status_color(status: str) -> str:
-		if status == 'success':
-			return '#10b981'
-		elif status == 'error':
-			return '#ef4444'
-		return '#6b7280'
-
-	def get_status_bg(status: str) -> str:
-		if status == 'success':
-			return '#d1fae5'
-		elif status == 'error':
-			return '#fee2e2'
-		return '#f3f4f6'
-
-	# 构建账号卡片
-	account_cards = ''
-	for acc in accounts:
-		status_color = get_status_color(acc['status'])
-		status_bg = get_status_bg(acc['status'])
-		status_icon = '✓' if acc['status'] == 'success' else '✗'
-		status_text = '签到成功' if acc['status'] == 'success' else '签到失败'
-
-		card = f"""
-		<div class="account-card">
-			<div class="account-header">
-				<span class="account-name">{acc['name']}</span>
-				<span class="status-badge" style="background-color: {status_bg}; color: {status_color};">
-					{status_icon} {status_text}
-				</span>
-			</div>
-			{'<div class="balance-info">💰 ' + acc['balance'] + '</div>' if acc.get('balance') else ''}
-		</div>"""
-		account_cards += card
-
 	# 解析统计信息
 	success_count = 0
 	fail_count = 0
@@ -109,158 +87,65 @@ def format_html_email(title: str, content: str, execution_time: str) -> str:
 			parts = stat.split('Failed:')[1].strip().split('/')
 			fail_count = int(parts[0])
 
-	# 构建HTML
-	html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-	<meta charset="UTF-8">
-	<meta name="viewport" content="width=device-width, initial-scale=1.0">
-	<style>
-		* {{ margin: 0; padding: 0; box-sizing: border-box; }}
-		body {{
-			font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-			background-color: #f5f7fa;
-			padding: 20px;
-			line-height: 1.6;
-		}}
-		.email-container {{
-			max-width: 600px;
-			margin: 0 auto;
-			background-color: #ffffff;
-			border-radius: 12px;
-			overflow: hidden;
-			box-shadow: 0 2px 8px rgba(0, 0, 0, 0.08);
-		}}
-		.email-header {{
-			background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-			color: white;
-			padding: 30px;
-			text-align: center;
-		}}
-		.email-header h1 {{
-			font-size: 24px;
-			font-weight: 600;
-			margin-bottom: 8px;
-		}}
-		.email-header p {{
-			font-size: 14px;
-			opacity: 0.9;
-		}}
-		.email-content {{
-			padding: 24px;
-		}}
-		.account-card {{
-			background-color: #fafafa;
-			border: 1px solid #e5e7eb;
-			border-radius: 8px;
-			padding: 16px;
-			margin-bottom: 12px;
-			transition: box-shadow 0.2s;
-		}}
-		.account-card:hover {{
-			box-shadow: 0 2px 4px rgba(0, 0, 0, 0.05);
-		}}
-		.account-header {{
-			display: flex;
-			justify-content: space-between;
-			align-items: center;
-			margin-bottom: 8px;
-		}}
-		.account-name {{
-			font-size: 16px;
-			font-weight: 600;
-			color: #1f2937;
-		}}
-		.status-badge {{
-			display: inline-block;
-			padding: 4px 12px;
-			border-radius: 20px;
-			font-size: 12px;
-			font-weight: 600;
-		}}
-		.balance-info {{
-			font-size: 14px;
-			color: #6b7280;
-			margin-top: 4px;
-		}}
-		.stats-section {{
-			background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-			border-radius: 8px;
-			padding: 20px;
-			margin-top: 20px;
-			color: white;
-		}}
-		.stats-grid {{
-			display: grid;
-			grid-template-columns: repeat(3, 1fr);
-			gap: 16px;
-			text-align: center;
-		}}
-		.stat-item {{
-			background-color: rgba(255, 255, 255, 0.2);
-			border-radius: 8px;
-			padding: 12px;
-		}}
-		.stat-label {{
-			font-size: 12px;
-			opacity: 0.9;
-			margin-bottom: 4px;
-		}}
-		.stat-value {{
-			font-size: 24px;
-			font-weight: 700;
-		}}
-		.email-footer {{
-			background-color: #f9fafb;
-			padding: 20px;
-			text-align: center;
-			font-size: 12px;
-			color: #9ca3af;
-			border-top: 1px solid #e5e7eb;
-		}}
-	</style>
-</head>
-<body>
-	<div class="email-container">
-		<div class="email-header">
-			<h1>{title}</h1>
-			<p>{time_str}</p>
-		</div>
-
-		<div class="email-content">
-			{account_cards if account_cards else '<p style="text-align: center; color: #9ca3af; padding: 20px;">暂无账号信息</p>'}
-
-			<div class="stats-section">
-				<div class="stats-grid">
-					<div class="stat-item">
-						<div class="stat-label">总计</div>
-						<div class="stat-value">{total_count}</div>
-					</div>
-					<div class="stat-item">
-						<div class="stat-label">成功</div>
-						<div class="stat-value">{success_count}</div>
-					</div>
-					<div class="stat-item">
-						<div class="stat-label">失败</div>
-						<div class="stat-value">{fail_count}</div>
-					</div>
-				</div>
-			</div>
-		</div>
-
-		<div class="email-footer">
-			<p>此邮件由 AnyRouter 自动签到系统发送</p>
-			<p style="margin-top: 4px;">Powered by Claude Code & GitHub Actions</p>
-		</div>
-	</div>
-</body>
-</html>"""
-	return html
+	return render_email_html(title, time_str, accounts, total_count, success_count, fail_count)
+
+
+# 单个通知渠道的超时与整个推送的截止时间（秒）
+DEFAULT_CHANNEL_TIMEOUT = 30.0
+DEFAULT_PUSH_DEADLINE = 60.0
+
+SMTP_TRANSPORT_FILE = 'smtp_transport.json'
+
+
+def load_seconds(name: str, default: float) -> float:
+	"""从环境变量加载秒数配置，无效时使用默认值"""
+	value_str = os.getenv(name, '').strip()
+	if not value_str:
+		return default
+
+	try:
+		value = float(value_str)
+	except ValueError:
+		logger.warning(f'Invalid {name} value "{value_str}", using default {default}s')
+		return default
+
+	if value <= 0:
+		logger.warning(f'{name} must be > 0, got {value}, using default {default}s')
+		return default
+
+	return value
+
+
+# 出错时仍返回 HTTP 200 的渠道：错误码与错误信息字段（PushPlus 成功时 code 为 200，不在此列）
+ERROR_CODE_FIELDS = {
+	'DingTalk': ('errcode', 'errmsg'),
+	'WeChat Work': ('errcode', 'errmsg'),
+	'Feishu': ('code', 'msg'),
+}
+
+
+def raise_for_response(name: str, response: httpx.Response):
+	"""检查推送响应：钉钉、企业微信与飞书机器人出错（如关键词不匹配、限流）时仍返回 HTTP 200，错误通过非零的错误码返回"""
+	response.raise_for_status()
+	if name not in ERROR_CODE_FIELDS:
+		return
+	try:
+		payload = response.json()
+	except ValueError:
+		return
+	code_field, message_field = ERROR_CODE_FIELDS[name]
+	if isinstance(payload, dict) and payload.get(code_field) not in (None, 0):
+		raise RuntimeError(f'{code_field} {payload[code_field]}: {payload.get(message_field, "")}')
 
 
 class NotificationKit:
 	def __init__(self):
+		self._buckets: dict[str, TokenBucket] = {}
+		self.smtp_transports = SmtpTransportCache(SMTP_TRANSPORT_FILE)
+		self.load_from_env()
+
+	def load_from_env(self):
+		"""从环境变量加载通知渠道配置，常驻模式下每个周期重新加载"""
 		self.email_user: str = os.getenv('EMAIL_USER', '')
 		self.email_pass: str = os.getenv('EMAIL_PASS', '')
 		self.email_to: str = os.getenv('EMAIL_TO', '')
@@ -277,9 +162,13 @@ class NotificationKit:
 		self.gotify_priority = int(gotify_priority_env) if gotify_priority_env.strip() else 9
 		self.telegram_bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
 		self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
+		self.channel_timeout = load_seconds('NOTIFY_CHANNEL_TIMEOUT', DEFAULT_CHANNEL_TIMEOUT)
+		self.push_deadline = load_seconds('NOTIFY_DEADLINE', DEFAULT_PUSH_DEADLINE)
 
-	def send_email(self, title: str, content: str, msg_type: Literal['text', 'html'] = 'text'):
-		if not self.email_user or not self.email_pass or not self.email_to:
+	def send_email(self, title: str, content: str, msg_type: Literal['text', 'html'] = 'text') -> str:
+		"""通过一次登录会话发送给所有收件人，返回连接方式与耗时说明"""
+		recipients = parse_recipients(self.email_to)
+		if not self.email_user or not self.email_pass or not recipients:
 			raise ValueError('Email configuration not set')
 
 		# 如果未设置 EMAIL_SENDER，使用 EMAIL_USER 作为默认值
@@ -289,57 +178,64 @@ class NotificationKit:
 		mime_subtype = 'plain' if msg_type == 'text' else 'html'
 		msg = MIMEText(content, mime_subtype, 'utf-8')
 		msg['From'] = f'AnyRouter Assistant <{sender}>'
-		msg['To'] = self.email_to
+		msg['To'] = ', '.join(recipients)
 		msg['Subject'] = title
 
 		smtp_server = self.smtp_server if self.smtp_server else f'smtp.{self.email_user.split("@")[1]}'
 
-		# 尝试多种连接方式
+		# 优先使用上次成功的连接方式，失败时再尝试其他方式
 		last_error = None
-		for method, port, use_ssl in [('SMTP_SSL', 465, True), ('STARTTLS', 587, False)]:
+		for method, port, use_ssl in self.smtp_transports.transports(smtp_server):
+			timer = PhaseTimer(method)
 			try:
-				if use_ssl:
-					server = smtplib.SMTP_SSL(smtp_server, port, timeout=30)
-				else:
-					server = smtplib.SMTP(smtp_server, port, timeout=30)
-					server.starttls()
-
-				server.login(self.email_user, self.email_pass)
-				server.send_message(msg)
+				with timer.phase('connect'):
+					if use_ssl:
+						server = smtplib.SMTP_SSL(smtp_server, port, timeout=self.channel_timeout)
+					else:
+						server = smtplib.SMTP(smtp_server, port, timeout=self.channel_timeout)
+						server.starttls()
+
+				with timer.phase('login'):
+					server.login(self.email_user, self.email_pass)
+				refused = server.send_message(msg, to_addrs=recipients)
 				server.quit()
-				return  # 发送成功，直接返回
 			except Exception as e:
 				last_error = e
 				continue
 
+			self.smtp_transports.remember(smtp_server, method)
+			details = [method] + [f'{phase} {seconds:.2f}s' for phase, seconds in timer.phases.items()]
+			if len(recipients) > 1:
+				details.append(f'{len(recipients) - len(refused or {})}/{len(recipients)} recipients')
+			if refused:
+				details.append(f'refused: {", ".join(refused)}')
+			return ', '.join(details)
+
 		# 如果所有方法都失败，抛出最后一个错误
 		raise last_error
 
-	def send_pushplus(self, title: str, content: str):
+	def pushplus_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.pushplus_token:
 			raise ValueError('PushPlus Token not configured')
 
 		data = {'token': self.pushplus_token, 'title': title, 'content': content, 'template': 'html'}
-		with httpx.Client(timeout=30.0) as client:
-			client.post('http://www.pushplus.plus/send', json=data)
+		return 'http://www.pushplus.plus/send', data
 
-	def send_serverPush(self, title: str, content: str):
+	def serverPush_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.server_push_key:
 			raise ValueError('Server Push key not configured')
 
 		data = {'title': title, 'desp': content}
-		with httpx.Client(timeout=30.0) as client:
-			client.post(f'https://sctapi.ftqq.com/{self.server_push_key}.send', json=data)
+		return f'https://sctapi.ftqq.com/{self.server_push_key}.send', data
 
-	def send_dingtalk(self, title: str, content: str):
+	def dingtalk_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.dingding_webhook:
 			raise ValueError('DingTalk Webhook not configured')
 
-		data = {'msgtype': 'text', 'text': {'content': f'{title}\n{content}'}}
-		with httpx.Client(timeout=30.0) as client:
-			client.post(self.dingding_webhook, json=data)
+		data = {'msgtype': 'text', 'text': {'content': CHANNEL_LIMITS['DingTalk'].wrap(title, content)}}
+		return self.dingding_webhook, data
 
-	def send_feishu(self, title: str, content: str):
+	def feishu_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.feishu_webhook:
 			raise ValueError('Feishu Webhook not configured')
 
@@ -350,18 +246,16 @@ class NotificationKit:
 				'header': {'template': 'blue', 'title': {'content': title, 'tag': 'plain_text'}},
 			},
 		}
-		with httpx.Client(timeout=30.0) as client:
-			client.post(self.feishu_webhook, json=data)
+		return self.feishu_webhook, data
 
-	def send_wecom(self, title: str, content: str):
+	def wecom_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.weixin_webhook:
 			raise ValueError('WeChat Work Webhook not configured')
 
-		data = {'msgtype': 'text', 'text': {'content': f'{title}\n{content}'}}
-		with httpx.Client(timeout=30.0) as client:
-			client.post(self.weixin_webhook, json=data)
+		data = {'msgtype': 'text', 'text': {'content': CHANNEL_LIMITS['WeChat Work'].wrap(title, content)}}
+		return self.weixin_webhook, data
 
-	def send_gotify(self, title: str, content: str):
+	def gotify_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.gotify_url or not self.gotify_token:
 			raise ValueError('Gotify URL or Token not configured')
 
@@ -372,52 +266,169 @@ class NotificationKit:
 		priority = max(1, min(10, priority))
 
 		data = {'title': title, 'message': content, 'priority': priority}
+		return f'{self.gotify_url}?token={self.gotify_token}', data
 
-		url = f'{self.gotify_url}?token={self.gotify_token}'
-		with httpx.Client(timeout=30.0) as client:
-			client.post(url, json=data)
-
-	def send_telegram(self, title: str, content: str):
+	def telegram_request(self, title: str, content: str) -> tuple[str, dict]:
 		if not self.telegram_bot_token or not self.telegram_chat_id:
 			raise ValueError('Telegram Bot Token or Chat ID not configured')
 
-		message = f'<b>{title}</b>\n\n{content}'
+		message = CHANNEL_LIMITS['Telegram'].wrap(title, content)
 		data = {'chat_id': self.telegram_chat_id, 'text': message, 'parse_mode': 'HTML'}
-		url = f'https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage'
-		with httpx.Client(timeout=30.0) as client:
-			client.post(url, json=data)
+		return f'https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage', data
 
-	def push_message(
-		self, title: str, content: str, msg_type: Literal['text', 'html'] = 'text', execution_time: str = ''
-	):
-		notifications = []
+	def _post(self, name: str, request: tuple[str, dict]):
+		url, data = request
+		with httpx.Client(timeout=self.channel_timeout) as client:
+			raise_for_response(name, client.post(url, json=data))
+
+	def send_pushplus(self, title: str, content: str):
+		self._post('PushPlus', self.pushplus_request(title, content))
+
+	def send_serverPush(self, title: str, content: str):
+		self._post('Server Push', self.serverPush_request(title, content))
+
+	def send_dingtalk(self, title: str, content: str):
+		self._post('DingTalk', self.dingtalk_request(title, content))
+
+	def send_feishu(self, title: str, content: str):
+		self._post('Feishu', self.feishu_request(title, content))
+
+	def send_wecom(self, title: str, content: str):
+		self._post('WeChat Work', self.wecom_request(title, content))
 
-		# 邮件使用 HTML 格式
-		if execution_time:
-			html_content = format_html_email(title, content, execution_time)
-			notifications.append(('Email', lambda: self.send_email(title, html_content, 'html')))
+	def send_gotify(self, title: str, content: str):
+		self._post('Gotify', self.gotify_request(title, content))
+
+	def send_telegram(self, title: str, content: str):
+		self._post('Telegram', self.telegram_request(title, content))
+
+	def _bucket(self, name: str, limits: ChannelLimits) -> TokenBucket | None:
+		"""渠道的令牌桶在多次推送之间共享（常驻模式下跨周期生效）"""
+		if limits.rate is None:
+			return None
+		if name not in self._buckets:
+			self._buckets[name] = TokenBucket(limits.rate, limits.burst)
+		return self._buckets[name]
+
+	async def _send_channel(self, name: str, send: Callable[[], Awaitable[str]]) -> tuple[str, str | None]:
+		"""发送单个渠道并记录推送指标，返回 (附加说明, 失败原因)，成功时失败原因为 None
+
+		未配置的渠道在构造请求时抛出 ValueError，单独计为 unconfigured，不与推送失败混在一起。
+		"""
+		try:
+			details = await send()
+		except asyncio.TimeoutError:
+			notifications_total.inc(channel=name, outcome='timeout')
+			return '', f'Timed out after {self.channel_timeout:g}s'
+		except ValueError as e:
+			notifications_total.inc(channel=name, outcome='unconfigured')
+			return '', str(e)
+		except Exception as e:
+			notifications_total.inc(channel=name, outcome='failed')
+			return '', str(e)
+		notifications_total.inc(channel=name, outcome='success')
+		return details, None
+
+	async def apush_message(
+		self,
+		title: str,
+		content: str | RunResult,
+		msg_type: Literal['text', 'html'] = 'text',
+		execution_time: str = '',
+	):
+		"""并发推送到所有渠道：HTTP 渠道共享一个异步客户端，SMTP 在线程中发送；每条消息单独超时，整体有截止时间
+
+		content 为签到结果对象时，纯文本、Markdown 与 HTML 邮件各渲染一次，由各渠道按支持的格式选用。
+		超过渠道大小限制的内容按账号边界拆分为多条编号消息，并按渠道的速率限制依次发送。
+		"""
+		if isinstance(content, RunResult):
+			email_content, email_type = format_run_html(title, content), 'html'
+			text, markdown = content.text, content.markdown
 		else:
-			notifications.append(('Email', lambda: self.send_email(title, content, msg_type)))
-
-		# 其他通知平台使用纯文本
-		notifications.extend(
-			[
-				('PushPlus', lambda: self.send_pushplus(title, content)),
-				('Server Push', lambda: self.send_serverPush(title, content)),
-				('DingTalk', lambda: self.send_dingtalk(title, content)),
-				('Feishu', lambda: self.send_feishu(title, content)),
-				('WeChat Work', lambda: self.send_wecom(title, content)),
-				('Gotify', lambda: self.send_gotify(title, content)),
-				('Telegram', lambda: self.send_telegram(title, content)),
+			# 邮件使用 HTML 格式
+			if execution_time:
+				email_content, email_type = format_html_email(title, content, execution_time), 'html'
+			else:
+				email_content, email_type = content, msg_type
+			text = markdown = content
+
+		async with httpx.AsyncClient(timeout=self.channel_timeout) as client:
+
+			async def send_email() -> str:
+				# 每种连接方式各自有一次超时时间，第一种方式超时后仍有机会回退到下一种
+				return await asyncio.wait_for(
+					asyncio.to_thread(self.send_email, title, email_content, email_type),
+					timeout=self.channel_timeout * len(SMTP_TRANSPORTS),
+				)
+
+			async def post(name: str, request_builder, limits: ChannelLimits, parts: list[tuple[str, str]]) -> str:
+				bucket = self._bucket(name, limits)
+				for i, (part_title, part_content) in enumerate(parts, 1):
+					url, data = request_builder(part_title, part_content)
+					if bucket is not None:
+						await bucket.acquire()
+					try:
+						response = await asyncio.wait_for(client.post(url, json=data), timeout=self.channel_timeout)
+						raise_for_response(name, response)
+					except Exception as e:
+						if len(parts) == 1:
+							raise
+						reason = (
+							f'Timed out after {self.channel_timeout:g}s' if isinstance(e, asyncio.TimeoutError) else e
+						)
+						raise RuntimeError(f'Part {i}/{len(parts)}: {reason}') from e
+				return f'{len(parts)} parts' if len(parts) > 1 else ''
+
+			# Server 酱与飞书卡片支持 Markdown，其他通知平台使用纯文本
+			http_channels = [
+				('PushPlus', self.pushplus_request, text),
+				('Server Push', self.serverPush_request, markdown),
+				('DingTalk', self.dingtalk_request, text),
+				('Feishu', self.feishu_request, markdown),
+				('WeChat Work', self.wecom_request, text),
+				('Gotify', self.gotify_request, text),
+				('Telegram', self.telegram_request, text),
 			]
-		)
+			channels = [('Email', send_email)]
+			# 按速率依次发送的多段消息不能被整体截止时间截断：截止时间加上最慢渠道按速率发送所有分段所需的时间
+			pacing_time = 0.0
+			for name, request_builder, body in http_channels:
+				limits = CHANNEL_LIMITS.get(name, ChannelLimits())
+				parts = split_for_channel(limits, title, body)
+				pacing_time = max(pacing_time, limits.pacing_time(len(parts)))
+				channels.append((name, functools.partial(post, name, request_builder, limits, parts)))
+
+			deadline = self.push_deadline + pacing_time
+			tasks = [asyncio.create_task(self._send_channel(name, send)) for name, send in channels]
+			done, pending = await asyncio.wait(tasks, timeout=deadline)
+			for task in pending:
+				task.cancel()
+
+		# 按渠道顺序输出结果，与并发完成顺序无关
+		for (name, _), task in zip(channels, tasks, strict=True):
+			if task in done:
+				details, error = task.result()
+			else:
+				details, error = '', f'Push deadline of {deadline:g}s exceeded'
+				notifications_total.inc(channel=name, outcome='deadline')
+			if error is None:
+				logger.info(
+					f'{name}: Message push successful!' + (f' ({details})' if details else ''),
+					tag='NOTIFY',
+					channel=name,
+				)
+			else:
+				logger.warning(f'{name}: Message push failed! Reason: {error}', tag='NOTIFY', channel=name)
 
-		for name, func in notifications:
-			try:
-				func()
-				print(f'[{name}]: Message push successful!')
-			except Exception as e:
-				print(f'[{name}]: Message push failed! Reason: {str(e)}')
+	def push_message(
+		self,
+		title: str,
+		content: str | RunResult,
+		msg_type: Literal['text', 'html'] = 'text',
+		execution_time: str = '',
+	):
+		"""同步接口：在新的事件循环中并发推送"""
+		asyncio.run(self.apush_message(title, content, msg_type, execution_time))
 
 
 notify = NotificationKit()
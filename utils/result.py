@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+签到运行结果模型
+
+签到引擎为每个账号生成一个 AccountResult，并在周期结束时汇总为 RunResult；
+各通知渠道直接从结果对象渲染纯文本、Markdown 或 HTML，不再反向解析文本报告。
+"""
+
+from dataclasses import asdict, dataclass, field
+from functools import cached_property
+from typing import Literal
+
+RunStatus = Literal['success', 'partial', 'error']
+
+
+@dataclass
+class AccountResult:
+	"""单个账号的签到结果（可序列化，用于分片结果文件与进程间传递）"""
+
+	index: int
+	name: str
+	provider: str
+	api_user: str
+	success: bool
+	quota: float | None = None
+	used_quota: float | None = None
+	error: str | None = None  # 获取用户信息失败的原因
+	exception: str | None = None  # 签到过程中未处理的异常
+	timings: dict[str, float] = field(default_factory=dict)  # 各阶段耗时（秒）
+	change: float | None = None  # 与上次记录相比的余额变化，由汇总时填写
+
+	@property
+	def balance_key(self) -> tuple[str, str]:
+		return self.provider, self.api_user
+
+	@property
+	def has_balance(self) -> bool:
+		return self.quota is not None
+
+	def to_dict(self) -> dict:
+		return asdict(self)
+
+	@classmethod
+	def from_dict(cls, data: dict) -> 'AccountResult':
+		return cls(**data)
+
+
+@dataclass
+class RunResult:
+	"""一次签到周期的汇总结果：只包含需要通知的账号（失败账号与余额变化账号，各自按账号顺序）"""
+
+	execution_time: str
+	total_count: int
+	success_count: int
+	errors: list[str] = field(default_factory=list)  # 与具体账号无关的错误（如缺失的分片）
+	failures: list[AccountResult] = field(default_factory=list)
+	balances: list[AccountResult] = field(default_factory=list)
+
+	@property
+	def failed_count(self) -> int:
+		return self.total_count - self.success_count
+
+	@property
+	def status(self) -> RunStatus:
+		if self.success_count == self.total_count:
+			return 'success'
+		return 'partial' if self.success_count > 0 else 'error'
+
+	@property
+	def has_notification(self) -> bool:
+		return bool(self.errors or self.failures or self.balances)
+
+	# 渲染结果按格式缓存，日志输出与多个渠道共用同一份文本
+	@cached_property
+	def text(self) -> str:
+		return render_text(self)
+
+	@cached_property
+	def markdown(self) -> str:
+		return render_markdown(self)
+
+
+STATUS_LINES: dict[RunStatus, str] = {
+	'success': '[SUCCESS] All accounts check-in successful!',
+	'partial': '[WARN] Some accounts check-in successful',
+	'error': '[ERROR] All accounts check-in failed',
+}
+
+
+def balance_line(account: AccountResult) -> str:
+	line = f'Current balance: ${account.quota}, Used: ${account.used_quota}'
+	if account.change is not None:
+		line += f', Change: ${account.change:+}'
+	return line
+
+
+def failure_detail(account: AccountResult) -> str | None:
+	"""失败账号的说明：有余额时显示余额，否则显示失败原因"""
+	if account.has_balance:
+		return f':money: Current balance: ${account.quota}, Used: ${account.used_quota}'
+	return account.error
+
+
+def render_text(run: RunResult) -> str:
+	"""渲染纯文本通知：执行时间、错误与账号、统计信息三段"""
+	lines = [f'[FAIL] {error}' for error in run.errors]
+	for account in run.failures:
+		if account.exception is not None:
+			lines.append(f'[FAIL] {account.name} exception: {account.exception[:50]}...')
+			continue
+		detail = failure_detail(account)
+		lines.append(f'[FAIL] {account.name}' + (f'\n{detail}' if detail else ''))
+	for account in run.balances:
+		lines.append(f'[BALANCE] {account.name}\n:money: {balance_line(account)}')
+
+	stats = [
+		'[STATS] Check-in result statistics:',
+		f'[SUCCESS] Success: {run.success_count}/{run.total_count}',
+		f'[FAIL] Failed: {run.failed_count}/{run.total_count}',
+		STATUS_LINES[run.status],
+	]
+	return '\n\n'.join([f'[TIME] Execution time: {run.execution_time}', '\n'.join(lines), '\n'.join(stats)])
+
+
+def render_markdown(run: RunResult) -> str:
+	"""渲染 Markdown 通知；每个账号仍以 [TAG] 开头，便于按账号边界拆分长消息"""
+	lines = [f'[FAIL] **{error}**' for error in run.errors]
+	for account in run.failures:
+		if account.exception is not None:
+			lines.append(f'[FAIL] **{account.name}**  \nException: {account.exception[:50]}...')
+			continue
+		detail = failure_detail(account)
+		lines.append(f'[FAIL] **{account.name}**' + (f'  \n{detail.replace(":money:", "💰")}' if detail else ''))
+	for account in run.balances:
+		lines.append(f'[BALANCE] **{account.name}**  \n💰 {balance_line(account)}')
+
+	stats = (
+		f'[STATS] Success: **{run.success_count}/{run.total_count}**, Failed: **{run.failed_count}/{run.total_count}**'
+		f'  \n{STATUS_LINES[run.status]}'
+	)
+	return '\n\n'.join([f'[TIME] Execution time: {run.execution_time}', *lines, stats])
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+失败分类与重试策略模块
+"""
+
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Literal, TypeVar
+
+import httpx
+
+from utils.log import get_logger
+from utils.waf import is_waf_challenge
+
+logger = get_logger(__name__)
+
+FailureClass = Literal[
+	'network_timeout',  # 超时、连接失败等网络错误
+	'http_5xx',  # 服务端 5xx 错误
+	'rate_limited',  # HTTP 429 限流
+	'waf_challenge',  # 被 WAF 挑战页拦截
+	'session_expired',  # HTTP 401，session 已过期
+	'business_error',  # 接口返回的业务错误（msg 字段）
+]
+
+T = TypeVar('T')
+
+# 签到接口“今天已签到”回复的特征：签到请求不是幂等的，超时后服务端可能已完成签到
+ALREADY_CHECKED_IN_MARKERS = ('已经签到', '已签到', 'already checked in', 'already signed in')
+
+
+class CheckInError(Exception):
+	"""带失败分类的请求错误"""
+
+	def __init__(self, failure: FailureClass, message: str):
+		super().__init__(message)
+		self.failure = failure
+
+
+@dataclass
+class RetryPolicy:
+	"""单个失败类别的重试策略：带抖动的指数退避"""
+
+	max_retries: int
+	base_delay: float = 0.0
+	max_delay: float = 0.0
+
+	def delay(self, attempt: int) -> float:
+		"""第 attempt 次重试前的等待时间（full jitter）"""
+		return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+RETRY_POLICIES: dict[FailureClass, RetryPolicy] = {
+	'network_timeout': RetryPolicy(max_retries=3, base_delay=1.0, max_delay=10.0),
+	'http_5xx': RetryPolicy(max_retries=3, base_delay=2.0, max_delay=20.0),
+	'rate_limited': RetryPolicy(max_retries=2, base_delay=5.0, max_delay=30.0),
+	# 重新获取 WAF cookies 后立即重试一次
+	'waf_challenge': RetryPolicy(max_retries=1),
+	# 不可重试：重试只会浪费请求
+	'session_expired': RetryPolicy(max_retries=0),
+	'business_error': RetryPolicy(max_retries=0),
+}
+
+
+class RetryBudget:
+	"""整个运行共享的重试预算，避免大面积故障时重试请求成倍放大"""
+
+	def __init__(self, total: int = 0):
+		self.total = total
+		self.used = 0
+
+	def reset(self, total: int):
+		self.total = total
+		self.used = 0
+
+	def split(self, parts: int) -> list[int]:
+		"""将总预算精确拆分为 parts 份（进程池的各进程各一份），前 total % parts 份各多一次"""
+		share, extra = divmod(self.total, parts)
+		return [share + 1 if i < extra else share for i in range(parts)]
+
+	def try_consume(self) -> bool:
+		"""消耗一次重试额度，额度耗尽时返回 False"""
+		if self.used >= self.total:
+			return False
+		self.used += 1
+		return True
+
+
+def classify_response(response: httpx.Response) -> FailureClass | None:
+	"""根据 HTTP 响应判断失败类别，无法归类为可识别的失败时返回 None"""
+	if is_waf_challenge(response):
+		return 'waf_challenge'
+	if response.status_code == 401:
+		return 'session_expired'
+	if response.status_code == 429:
+		return 'rate_limited'
+	if response.status_code >= 500:
+		return 'http_5xx'
+	return None
+
+
+def classify_exception(error: Exception) -> FailureClass | None:
+	"""根据异常判断失败类别"""
+	if isinstance(error, CheckInError):
+		return error.failure
+	if isinstance(error, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)):
+		return 'network_timeout'
+	return None
+
+
+def is_already_checked_in(message: str) -> bool:
+	"""业务错误信息表示账号今天已经签到过"""
+	message = message.lower()
+	return any(marker in message for marker in ALREADY_CHECKED_IN_MARKERS)
+
+
+def raise_for_failure(response: httpx.Response, operation: str):
+	"""响应属于可识别的失败类别时抛出 CheckInError"""
+	failure = classify_response(response)
+	if failure == 'waf_challenge':
+		raise CheckInError(failure, f'{operation} blocked by WAF challenge')
+	if failure:
+		raise CheckInError(failure, f'{operation} failed: HTTP {response.status_code}')
+
+
+async def with_retry(
+	account_name: str,
+	operation: str,
+	request: Callable[[], Awaitable[T]],
+	budget: RetryBudget,
+	on_waf_challenge: Callable[[], Awaitable[None]] | None = None,
+) -> T:
+	"""执行请求，按失败类别的策略重试；不可重试或预算耗尽时抛出 CheckInError
+
+	每个失败类别单独计数重试次数，一次超时重试不会占用之后 WAF 挑战或限流的重试次数。
+	"""
+	attempts: dict[FailureClass, int] = {}
+	while True:
+		try:
+			return await request()
+		except Exception as e:
+			failure = classify_exception(e)
+			if failure is None:
+				raise
+
+			policy = RETRY_POLICIES[failure]
+			attempt = attempts.get(failure, 0)
+			retryable = attempt < policy.max_retries and (failure != 'waf_challenge' or on_waf_challenge is not None)
+			if retryable and not budget.try_consume():
+				logger.warning(f'{account_name}: Retry budget exhausted, not retrying {operation}')
+				retryable = False
+
+			if not retryable:
+				if isinstance(e, CheckInError):
+					raise
+				raise CheckInError(failure, f'{operation} failed: {str(e)[:50]}') from e
+
+			delay = policy.delay(attempt)
+			attempt = attempts[failure] = attempt + 1
+			logger.info(
+				f'{account_name}: {operation} failed ({failure}), retry {attempt}/{policy.max_retries} in {delay:.1f}s',
+				tag='RETRY',
+				failure=failure,
+			)
+			if failure == 'waf_challenge':
+				await on_waf_challenge()
+			await asyncio.sleep(delay)
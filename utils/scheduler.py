@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+常驻模式调度模块：cron 表达式解析、按计划等待与停止信号处理
+"""
+
+import asyncio
+import os
+import signal
+from datetime import datetime, timedelta
+
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SCHEDULE = '0 */6 * * *'
+
+# 等待下一次运行时的最长单次休眠（秒），避免系统休眠或时钟调整导致错过计划时间
+MAX_SLEEP_INTERVAL = 60.0
+
+# 五个字段的取值范围：分钟、小时、日、月、星期（0 和 7 均表示星期日）
+CRON_FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+def parse_cron_field(field: str, low: int, high: int) -> set[int]:
+	"""解析单个 cron 字段，支持 *、数字、a-b 区间、/n 步长与逗号列表"""
+	values = set()
+	for part in field.split(','):
+		expr, _, step_str = part.partition('/')
+		step = int(step_str) if step_str else 1
+		if step < 1:
+			raise ValueError(f'invalid step in "{part}"')
+
+		if expr == '*':
+			start, end = low, high
+		elif '-' in expr:
+			start_str, end_str = expr.split('-', 1)
+			start, end = int(start_str), int(end_str)
+		else:
+			start = int(expr)
+			end = high if step_str else start
+
+		if start < low or end > high or start > end:
+			raise ValueError(f'"{part}" is out of range {low}-{high}')
+		values.update(range(start, end + 1, step))
+	return values
+
+
+class CronSchedule:
+	"""五字段 cron 表达式（分 时 日 月 周），按本机时区计算"""
+
+	def __init__(self, expression: str):
+		fields = expression.split()
+		if len(fields) != 5:
+			raise ValueError(f'expected 5 fields, got {len(fields)}')
+
+		self.expression = expression
+		self.minutes, self.hours, self.days, self.months, weekdays = (
+			parse_cron_field(field, low, high) for field, (low, high) in zip(fields, CRON_FIELDS, strict=True)
+		)
+		# cron 中 0 和 7 都表示星期日，统一转换为 Python 的 weekday()（星期一为 0）
+		self.weekdays = {(day - 1) % 7 for day in weekdays}
+		self.days_restricted = fields[2] != '*'
+		self.weekdays_restricted = fields[4] != '*'
+
+	def _day_matches(self, dt: datetime) -> bool:
+		day_match = dt.day in self.days
+		weekday_match = dt.weekday() in self.weekdays
+		# 与 cron 一致：日与星期同时限定时满足其一即可
+		if self.days_restricted and self.weekdays_restricted:
+			return day_match or weekday_match
+		return day_match and weekday_match
+
+	def next_after(self, dt: datetime) -> datetime:
+		"""返回严格晚于 dt 的下一个计划时间"""
+		candidate = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+		# 最多向后查找 5 年（覆盖 2 月 29 日等稀疏表达式）
+		limit = candidate + timedelta(days=366 * 5)
+		while candidate < limit:
+			if candidate.month not in self.months:
+				candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+			elif not self._day_matches(candidate):
+				candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+			elif candidate.hour not in self.hours:
+				candidate = candidate.replace(minute=0) + timedelta(hours=1)
+			elif candidate.minute not in self.minutes:
+				candidate += timedelta(minutes=1)
+			else:
+				return candidate
+		raise ValueError(f'schedule "{self.expression}" never fires')
+
+
+def load_schedule() -> CronSchedule:
+	"""从环境变量加载常驻模式的 cron 计划，默认每 6 小时一次"""
+	expression = os.getenv('CHECKIN_SCHEDULE', '').strip() or DEFAULT_SCHEDULE
+	try:
+		return CronSchedule(expression)
+	except ValueError as e:
+		logger.warning(f'Invalid CHECKIN_SCHEDULE value "{expression}" ({e}), using "{DEFAULT_SCHEDULE}"')
+		return CronSchedule(DEFAULT_SCHEDULE)
+
+
+class StopSignal:
+	"""SIGTERM/SIGINT 处理：第一次信号在当前周期结束后停止，第二次信号取消正在执行的周期"""
+
+	def __init__(self):
+		self.event = asyncio.Event()
+		self.task: asyncio.Task | None = None
+
+	@property
+	def stopped(self) -> bool:
+		return self.event.is_set()
+
+	def install(self):
+		"""注册信号处理，不支持 add_signal_handler 的平台（Windows）回退到 signal.signal"""
+		loop = asyncio.get_running_loop()
+		for sig in (signal.SIGTERM, signal.SIGINT):
+			try:
+				loop.add_signal_handler(sig, self.trigger, sig)
+			except (NotImplementedError, RuntimeError):
+				signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(self.trigger, signum))
+
+	def trigger(self, sig: int = signal.SIGTERM):
+		name = signal.Signals(sig).name
+		if not self.event.is_set():
+			logger.info(f'Received {name}, stopping after the current cycle')
+			self.event.set()
+		elif self.task is not None and not self.task.done():
+			logger.warning(f'Received {name} again, cancelling the current cycle')
+			self.task.cancel()
+
+	async def wait_until(self, when: datetime) -> bool:
+		"""等待到指定时间，期间收到停止信号则提前返回 False"""
+		while not self.event.is_set():
+			remaining = (when - datetime.now()).total_seconds()
+			if remaining <= 0:
+				return True
+			try:
+				await asyncio.wait_for(self.event.wait(), timeout=min(remaining, MAX_SLEEP_INTERVAL))
+			except asyncio.TimeoutError:
+				pass
+		return False
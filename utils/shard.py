@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+账号分片模块
+
+按 (provider, api_user) 的稳定哈希将账号分配到 N 个分片，多个 runner 各自处理一个分片，
+并将结果写入分片结果文件，最后由合并步骤统一比较余额并发送通知。
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+
+from utils.config import AccountConfig
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SHARD_RESULTS_DIR = 'shard_results'
+SHARD_FILE_PATTERN = re.compile(r'^shard-(\d+)-of-(\d+)-(.+)\.jsonl$')
+RUN_ID_PATTERN = re.compile(r'^[\w.-]+$')
+
+
+def load_shard_results_dir() -> str:
+	"""从环境变量加载分片结果文件目录"""
+	return os.getenv('SHARD_RESULTS_DIR', '').strip() or DEFAULT_SHARD_RESULTS_DIR
+
+
+def load_shard_run_id() -> str:
+	"""从环境变量 SHARD_RUN_ID 加载本次运行的标识，未设置时使用当天日期
+
+	分片与合并必须使用相同的标识，结果目录中其他运行遗留的分片文件不会被合并。
+	"""
+	run_id = os.getenv('SHARD_RUN_ID', '').strip()
+	today = datetime.now().strftime('%Y-%m-%d')
+	if not run_id:
+		return today
+	if not RUN_ID_PATTERN.match(run_id):
+		logger.warning(f'Invalid SHARD_RUN_ID value "{run_id}", using {today}')
+		return today
+	return run_id
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+	"""解析 i/N 形式的分片参数（i 从 1 开始）"""
+	match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', value)
+	if not match:
+		raise ValueError(f'shard must look like i/N, got "{value}"')
+
+	index, count = int(match.group(1)), int(match.group(2))
+	if count < 1 or not 1 <= index <= count:
+		raise ValueError(f'shard index must be between 1 and {count}, got {index}')
+	return index, count
+
+
+def shard_of(account_key: str, shard_count: int) -> int:
+	"""账号所属分片（从 1 开始），只取决于账号标识与分片数，增删其他账号不影响分配"""
+	digest = hashlib.sha256(account_key.encode('utf-8')).digest()
+	return int.from_bytes(digest[:8], 'big') % shard_count + 1
+
+
+def shard_file_path(results_dir: str, shard_index: int, shard_count: int, run_id: str) -> str:
+	return os.path.join(results_dir, f'shard-{shard_index}-of-{shard_count}-{run_id}.jsonl')
+
+
+class ShardedAccounts:
+	"""只包含指定分片账号的视图，保留账号在完整列表中的序号"""
+
+	def __init__(self, accounts: Iterable[AccountConfig], shard_index: int, shard_count: int):
+		self.accounts = accounts
+		self.shard_index = shard_index
+		self.shard_count = shard_count
+		self._count: int | None = None
+
+	def indexed(self) -> Iterator[tuple[int, AccountConfig]]:
+		"""按需产出 (完整列表中的序号, 账号)"""
+		for i, account in enumerate(self.accounts):
+			if shard_of(account.key, self.shard_count) == self.shard_index:
+				yield i, account
+
+	def __iter__(self) -> Iterator[AccountConfig]:
+		return (account for _, account in self.indexed())
+
+	def __len__(self) -> int:
+		if self._count is None:
+			self._count = sum(1 for _ in self.indexed())
+		return self._count
+
+
+class ShardResultWriter:
+	"""逐条写入分片结果（JSON Lines），完成后原子重命名，避免合并步骤读到不完整的文件"""
+
+	def __init__(self, results_dir: str, shard_index: int, shard_count: int, run_id: str):
+		os.makedirs(results_dir, exist_ok=True)
+		self.path = shard_file_path(results_dir, shard_index, shard_count, run_id)
+		self._temp_path = f'{self.path}.tmp'
+		self._file = open(self._temp_path, 'w', encoding='utf-8')
+
+	def write(self, record: dict):
+		self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+	def close(self):
+		self._file.close()
+		os.replace(self._temp_path, self.path)
+
+
+def find_shard_files(results_dir: str, run_id: str) -> tuple[dict[int, str], int | None]:
+	"""查找本次运行的分片结果文件，返回 ({分片序号: 路径}, 分片数)；存在多个分片数时使用最大的一组
+
+	运行标识不同的文件（之前运行遗留在结果目录中的分片）不参与合并。
+	"""
+	groups: dict[int, dict[int, str]] = {}
+	if os.path.isdir(results_dir):
+		for name in sorted(os.listdir(results_dir)):
+			match = SHARD_FILE_PATTERN.match(name)
+			if match and match.group(3) == run_id:
+				index, count = int(match.group(1)), int(match.group(2))
+				groups.setdefault(count, {})[index] = os.path.join(results_dir, name)
+
+	if not groups:
+		return {}, None
+
+	shard_count = max(groups)
+	return groups[shard_count], shard_count
+
+
+def read_shard_records(path: str) -> Iterator[dict]:
+	"""流式读取分片结果文件中的账号记录"""
+	with open(path, 'r', encoding='utf-8') as f:
+		for line in f:
+			if line.strip():
+				yield json.loads(line)
+
+
+def remove_shard_files(shard_files: Iterable[str]):
+	"""合并成功后删除已合并的分片结果文件，避免在复用的结果目录中被再次合并"""
+	for path in shard_files:
+		try:
+			os.remove(path)
+		except FileNotFoundError:
+			pass
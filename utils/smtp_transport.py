@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+SMTP 传输方式记忆模块
+
+按 SMTP 服务器记录上一次成功的连接方式（SMTP_SSL 465 / STARTTLS 587），
+下次运行优先尝试，避免只支持 587 的服务器每次先等待 465 端口超时。
+"""
+
+import json
+import os
+
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# (方式, 端口, 是否直接使用 SSL)，未记录时按此顺序尝试
+SMTP_TRANSPORTS = [('SMTP_SSL', 465, True), ('STARTTLS', 587, False)]
+
+
+def parse_recipients(value: str) -> list[str]:
+	"""解析逗号（或分号）分隔的收件人列表，去除空白与重复项"""
+	recipients = []
+	for address in value.replace(';', ',').split(','):
+		address = address.strip()
+		if address and address not in recipients:
+			recipients.append(address)
+	return recipients
+
+
+class SmtpTransportCache:
+	"""按 SMTP 服务器持久化到磁盘的传输方式记录"""
+
+	def __init__(self, path: str):
+		self.path = path
+		self._entries: dict[str, str] | None = None
+
+	def _load(self) -> dict[str, str]:
+		if self._entries is None:
+			self._entries = {}
+			try:
+				if os.path.exists(self.path):
+					with open(self.path, 'r', encoding='utf-8') as f:
+						data = json.load(f)
+					if isinstance(data, dict):
+						self._entries = data
+			except Exception as e:
+				logger.warning(f'Failed to load SMTP transport cache: {e}')
+		return self._entries
+
+	def _save(self):
+		try:
+			temp_path = f'{self.path}.tmp'
+			with open(temp_path, 'w', encoding='utf-8') as f:
+				json.dump(self._load(), f)
+			os.replace(temp_path, self.path)
+		except Exception as e:
+			logger.warning(f'Failed to save SMTP transport cache: {e}')
+
+	def transports(self, host: str) -> list[tuple[str, int, bool]]:
+		"""返回该服务器的尝试顺序，上次成功的方式排在最前"""
+		method = self._load().get(host)
+		return sorted(SMTP_TRANSPORTS, key=lambda transport: transport[0] != method)
+
+	def remember(self, host: str, method: str):
+		"""记录成功的方式，未变化时不写盘"""
+		if self._load().get(host) != method:
+			self._load()[host] = method
+			self._save()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+分阶段耗时统计与运行报告模块
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from utils.log import get_logger, log_context
+
+logger = get_logger(__name__)
+
+# 报告中列出的最慢账号数量
+SLOWEST_ACCOUNTS_LIMIT = 10
+
+DEFAULT_RUN_REPORT_FILE = 'run_report.json'
+
+
+def load_run_report_file() -> str:
+	"""从环境变量加载运行报告文件路径"""
+	return os.getenv('RUN_REPORT_FILE', '').strip() or DEFAULT_RUN_REPORT_FILE
+
+
+class PhaseTimer:
+	"""记录一个账号（或整个运行）各阶段的累计耗时"""
+
+	def __init__(self, name: str = ''):
+		self.name = name
+		self.phases: dict[str, float] = {}
+
+	def add(self, phase: str, seconds: float):
+		self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+	@contextmanager
+	def phase(self, phase: str):
+		started_at = time.perf_counter()
+		try:
+			yield
+		finally:
+			seconds = time.perf_counter() - started_at
+			self.add(phase, seconds)
+			if logger.isEnabledFor(logging.DEBUG):
+				logger.debug(
+					f'{self.name}: {phase} took {seconds:.3f}s', tag='TIMING', phase=phase, duration=round(seconds, 4)
+				)
+
+
+# 当前协程所属账号的计时器，asyncio 任务创建时会复制上下文
+current_timer: ContextVar[PhaseTimer | None] = ContextVar('current_timer', default=None)
+
+
+@contextmanager
+def phase(name: str):
+	"""在当前账号的计时器上记录一个阶段（没有计时器时不计时），阶段内的日志记录都带有 phase 字段"""
+	token = log_context.set({**log_context.get(), 'phase': name})
+	try:
+		timer = current_timer.get()
+		if timer is None:
+			yield
+		else:
+			with timer.phase(name):
+				yield
+	finally:
+		log_context.reset(token)
+
+
+def percentile(values: list[float], pct: float) -> float:
+	"""最近秩法计算百分位数"""
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	rank = max(1, math.ceil(pct / 100 * len(ordered)))
+	return ordered[rank - 1]
+
+
+class RunReport:
+	"""一次运行的耗时报告：运行级阶段、每个账号的阶段耗时及汇总统计"""
+
+	def __init__(self):
+		self.started_at = datetime.now()
+		self.run = PhaseTimer('run')
+		self.accounts: dict[int, PhaseTimer] = {}
+
+	def account(self, index: int, name: str) -> PhaseTimer:
+		"""获取（或创建）指定账号的计时器"""
+		timer = self.accounts.get(index)
+		if timer is None:
+			timer = self.accounts[index] = PhaseTimer(name)
+		return timer
+
+	def to_dict(self) -> dict:
+		timers = [self.accounts[i] for i in sorted(self.accounts)]
+
+		phase_values: dict[str, list[float]] = {}
+		for timer in timers:
+			for name, seconds in timer.phases.items():
+				phase_values.setdefault(name, []).append(seconds)
+
+		phases = {
+			name: {
+				'count': len(values),
+				'total': round(sum(values), 4),
+				'p50': round(percentile(values, 50), 4),
+				'p95': round(percentile(values, 95), 4),
+				'p99': round(percentile(values, 99), 4),
+				'max': round(max(values), 4),
+			}
+			for name, values in phase_values.items()
+		}
+
+		slowest = sorted(timers, key=lambda t: t.phases.get('total', 0.0), reverse=True)[:SLOWEST_ACCOUNTS_LIMIT]
+
+		return {
+			'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S'),
+			'account_count': len(timers),
+			'run_phases': {name: round(seconds, 4) for name, seconds in self.run.phases.items()},
+			'account_phases': phases,
+			'slowest_accounts': [
+				{'name': t.name, 'phases': {name: round(seconds, 4) for name, seconds in t.phases.items()}}
+				for t in slowest
+			],
+		}
+
+	def save(self, path: str):
+		"""保存 JSON 运行报告"""
+		try:
+			with open(path, 'w', encoding='utf-8') as f:
+				json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+			logger.info(f'Run timing report saved to {path}')
+		except Exception as e:
+			logger.warning(f'Failed to save run timing report: {e}')
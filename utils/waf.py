@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+WAF cookies 管理模块
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Awaitable, Callable
+
+from utils.config import ProviderConfig
+from utils.log import get_logger
+from utils.metrics import waf_acquisition_seconds, waf_acquisitions_total, waf_cookie_lookups_total
+
+logger = get_logger(__name__)
+
+# 阿里云 WAF 挑战页特征
+WAF_CHALLENGE_MARKERS = ('acw_sc__v2', 'arg1=')
+
+# 会话 cookie（无过期时间）的默认有效期（秒）
+DEFAULT_WAF_COOKIE_TTL = 1800
+
+# 距离过期不足该秒数的 cookie 视为已过期
+WAF_COOKIE_EXPIRY_MARGIN = 60
+
+
+def is_waf_challenge(response) -> bool:
+	"""判断响应是否为 WAF 挑战页"""
+	content_type = response.headers.get('content-type', '')
+	if 'json' in content_type:
+		return False
+
+	text = response.text
+	return any(marker in text for marker in WAF_CHALLENGE_MARKERS)
+
+
+def load_waf_cookie_ttl() -> int:
+	"""从环境变量加载会话 WAF cookie 的默认有效期"""
+	ttl_str = os.getenv('WAF_COOKIE_TTL', '').strip()
+	if not ttl_str:
+		return DEFAULT_WAF_COOKIE_TTL
+
+	try:
+		return max(0, int(ttl_str))
+	except ValueError:
+		logger.warning(f'Invalid WAF_COOKIE_TTL value "{ttl_str}", using default {DEFAULT_WAF_COOKIE_TTL}s')
+		return DEFAULT_WAF_COOKIE_TTL
+
+
+def cookies_expire_at(cookies: dict[str, dict], default_ttl: int) -> float:
+	"""计算一组 cookies 中最早的过期时间，会话 cookie 使用默认有效期"""
+	session_expires = time.time() + default_ttl
+	expires = [c['expires'] if c.get('expires', -1) > 0 else session_expires for c in cookies.values()]
+	return min(expires) if expires else session_expires
+
+
+class WafCookieCache:
+	"""按 provider 域名持久化到磁盘的 WAF cookies 缓存，跨运行复用"""
+
+	def __init__(self, path: str, default_ttl: int = DEFAULT_WAF_COOKIE_TTL):
+		self.path = path
+		self.default_ttl = default_ttl
+		self._entries: dict[str, dict] | None = None
+
+	def _load(self) -> dict[str, dict]:
+		if self._entries is None:
+			self._entries = {}
+			try:
+				if os.path.exists(self.path):
+					with open(self.path, 'r', encoding='utf-8') as f:
+						data = json.load(f)
+					if isinstance(data, dict):
+						self._entries = data
+			except Exception as e:
+				logger.warning(f'Failed to load WAF cookie cache: {e}')
+		return self._entries
+
+	def _save(self):
+		try:
+			# 进程池模式下多个进程可能同时写入缓存，临时文件按进程区分
+			temp_path = f'{self.path}.{os.getpid()}.tmp'
+			with open(temp_path, 'w', encoding='utf-8') as f:
+				json.dump(self._load(), f)
+			os.replace(temp_path, self.path)
+		except Exception as e:
+			logger.warning(f'Failed to save WAF cookie cache: {e}')
+
+	def get(self, domain: str, required_cookies: list[str]) -> tuple[dict, float] | None:
+		"""获取仍然有效的缓存 cookies，返回 (cookie 值, 过期时间)"""
+		entry = self._load().get(domain)
+		if not isinstance(entry, dict):
+			return None
+
+		cookies = entry.get('cookies', {})
+		if any(name not in cookies for name in required_cookies):
+			return None
+
+		expires_at = entry.get('expires_at', 0)
+		if expires_at - WAF_COOKIE_EXPIRY_MARGIN <= time.time():
+			return None
+
+		return {name: cookies[name]['value'] for name in required_cookies}, expires_at
+
+	def put(self, domain: str, cookies: dict[str, dict]) -> float:
+		"""写入 cookies 及其过期元数据，返回整体过期时间"""
+		expires_at = cookies_expire_at(cookies, self.default_ttl)
+		self._load()[domain] = {'cookies': cookies, 'expires_at': expires_at}
+		self._save()
+		return expires_at
+
+	def evict(self, domain: str):
+		"""移除指定域名的缓存"""
+		if self._load().pop(domain, None) is not None:
+			self._save()
+
+
+class WafCookieManager:
+	"""按 provider 域名共享 WAF cookies，同一域名同时只会有一次获取（single-flight）"""
+
+	def __init__(
+		self, acquire: Callable[[str, str, list[str]], Awaitable[dict | None]], cache: WafCookieCache | None = None
+	):
+		self._acquire = acquire
+		self._cache = cache
+		self._cookies: dict[str, tuple[dict, float]] = {}
+		self._inflight: dict[str, asyncio.Future] = {}
+		self.hits = 0
+		self.misses = 0
+
+	async def get(self, account_name: str, provider_config: ProviderConfig) -> dict | None:
+		"""获取 provider 的 WAF cookies，首个账号触发获取，其余账号等待并复用结果"""
+		key = provider_config.domain
+		shared = self._cookies.get(key)
+		if shared and shared[1] - WAF_COOKIE_EXPIRY_MARGIN > time.time():
+			logger.info(f'{account_name}: Reusing shared WAF cookies for {key}')
+			self.hits += 1
+			waf_cookie_lookups_total.inc(result='shared')
+			return shared[0]
+
+		if key not in self._inflight and self._cache:
+			cached = self._cache.get(key, provider_config.waf_cookie_names)
+			if cached:
+				logger.info(f'{account_name}: Using cached WAF cookies for {key}, browser not required')
+				self.hits += 1
+				waf_cookie_lookups_total.inc(result='disk_cache')
+				self._cookies[key] = cached
+				return cached[0]
+
+		future = self._inflight.get(key)
+		if future is None:
+			self.misses += 1
+			waf_cookie_lookups_total.inc(result='miss')
+			login_url = f'{provider_config.domain}{provider_config.login_path}'
+			future = asyncio.ensure_future(
+				self._acquire_observed(key, account_name, login_url, provider_config.waf_cookie_names)
+			)
+			self._inflight[key] = future
+			future.add_done_callback(lambda f: self._finish(key, f))
+		else:
+			logger.info(f'{account_name}: Waiting for in-flight WAF cookie acquisition for {key}')
+			self.hits += 1
+			waf_cookie_lookups_total.inc(result='inflight')
+
+		# shield 保证单个等待方被取消时不会中断其他账号共享的获取任务
+		cookies = await asyncio.shield(future)
+		return {name: cookie['value'] for name, cookie in cookies.items()} if cookies else None
+
+	async def _acquire_observed(self, key: str, account_name: str, login_url: str, waf_cookie_names: list[str]):
+		"""获取 WAF cookies 并记录获取次数、结果与耗时指标"""
+		outcome = 'error'
+		try:
+			with waf_acquisition_seconds.time(domain=key):
+				cookies = await self._acquire(account_name, login_url, waf_cookie_names)
+			outcome = 'success' if cookies else 'failed'
+			return cookies
+		finally:
+			waf_acquisitions_total.inc(domain=key, outcome=outcome)
+
+	def _finish(self, key: str, future: asyncio.Future):
+		"""获取完成后记录结果并写入磁盘缓存，失败结果不缓存以便后续重试"""
+		if self._inflight.get(key) is future:
+			del self._inflight[key]
+		if future.cancelled() or future.exception() is not None or not future.result():
+			return
+
+		cookies = future.result()
+		if self._cache:
+			expires_at = self._cache.put(key, cookies)
+		else:
+			expires_at = cookies_expire_at(cookies, DEFAULT_WAF_COOKIE_TTL)
+		self._cookies[key] = ({name: cookie['value'] for name, cookie in cookies.items()}, expires_at)
+
+	def invalidate(self, provider_config: ProviderConfig, stale_cookies: dict):
+		"""请求遇到 WAF 挑战时作废共享 cookies，仅当缓存仍是请求使用的那一份时才清除"""
+		key = provider_config.domain
+		shared = self._cookies.get(key)
+		if shared and all(stale_cookies.get(name) == value for name, value in shared[0].items()):
+			logger.info(f'Invalidating shared WAF cookies for {key}')
+			del self._cookies[key]
+			if self._cache:
+				self._cache.evict(key)
+
+	def clear(self):
+		"""清空所有共享 cookies"""
+		self._cookies.clear()
+
+	def reset_stats(self):
+		"""清零缓存命中统计（进程池 worker 复用于下一个分片时调用）"""
+		self.hits = 0
+		self.misses = 0
+
+	def print_stats(self):
+		"""输出 WAF cookies 缓存命中统计"""
+		logger.info(f'WAF cookie cache: {self.hits} hit(s), {self.misses} miss(es)')